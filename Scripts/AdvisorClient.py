@@ -0,0 +1,38 @@
+import os
+import requests
+import pandas as pd
+
+ADVISOR_API_URL = os.getenv("ADVISOR_API_URL")
+
+class AdvisorBusy(Exception):
+    """The advisor service refused (503) or timed out (504) the request."""
+
+def ask(question, session_id, prompt=None, base_url=ADVISOR_API_URL, timeout=120):
+    """POST a question to the advisor service (Server.py); returns its JSON reply.
+
+    `prompt` is a name from Prompts.PROMPTS, or None for the chain's default.
+    """
+    response = requests.post(
+        f"{base_url.rstrip('/')}/ask",
+        json={"question": question, "session_id": session_id, "prompt": prompt},
+        timeout=timeout,
+    )
+    if response.status_code in (503, 504):
+        raise AdvisorBusy(response.json().get("error", "busy"))
+    response.raise_for_status()
+    return response.json()
+
+def reply_table(reply):
+    """The screener table in a reply as a DataFrame, or None."""
+    table = reply.get("table")
+    return pd.DataFrame(**table) if table else None
+
+def remote_answer(question, session_id, memory, prompt=None):
+    """Ask the service and mirror the exchange into the local chat memory.
+
+    Returns (title, table, answer, sources) where title/table are None unless
+    the service answered from the screener, and sources is newline-joined.
+    """
+    reply = ask(question, session_id, prompt)
+    memory.save_context({"question": question}, {"answer": reply["answer"]})
+    return reply.get("title"), reply_table(reply), reply["answer"], "\n".join(reply.get("sources", []))
@@ -0,0 +1,239 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import argparse
+import threading
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+ANSWER_CACHE = os.getenv("ANSWER_CACHE_PATH", ".cache/answers.sqlite")
+WATCHED = ["faiss_index_fund_data", "Data/fund_risk_metrics.json", "Data/fund_metadata.json"]
+THRESHOLD = 0.95
+TTL_SECONDS = 24 * 3600
+MAX_ENTRIES = 5000
+
+def normalize_question(text):
+    """Lower-case, drop punctuation and collapse whitespace, keeping tickers and numbers."""
+    text = re.sub(r"[^\w\s.%-]", " ", text.lower())
+    return re.sub(r"\s+", " ", text).strip(" .")
+
+def context_fingerprint(docs):
+    """Hash of the retrieved chunks, so a question only hits when it would see the same context."""
+    h = hashlib.sha256()
+    for doc in docs:
+        h.update(doc.metadata.get("source", "").encode("utf-8"))
+        h.update(b"\0")
+        h.update(doc.page_content.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+def chain_fingerprint(qa_chain):
+    """Hash of the chain's combine prompt and model, so apps with different prompts never share answers."""
+    llm_chain = qa_chain.combine_docs_chain.llm_chain
+    h = hashlib.sha256(llm_chain.prompt.pretty_repr().encode("utf-8"))
+    h.update(b"\0")
+    h.update(getattr(llm_chain.llm, "_llm_type", "").encode("utf-8"))
+    h.update(json.dumps(getattr(llm_chain.llm, "_identifying_params", {}), sort_keys=True, default=str).encode("utf-8"))
+    return h.hexdigest()
+
+def data_version(paths=WATCHED):
+    """Fingerprint of the index and metric files; changes whenever any of them is rewritten."""
+    h = hashlib.sha256()
+    for path in paths:
+        files = [path]
+        if os.path.isdir(path):
+            files = sorted(os.path.join(path, f) for f in os.listdir(path))
+        for f in files:
+            try:
+                st = os.stat(f)
+            except OSError:
+                continue
+            h.update(f"{f}:{st.st_size}:{st.st_mtime_ns}".encode("utf-8"))
+    return h.hexdigest()
+
+class AnswerCache:
+    """Cross-session cache of chain answers, shared through a SQLite file.
+
+    An entry matches when the normalized question embeds within `threshold`
+    cosine similarity of a cached one, the retrieved context is identical
+    and it was answered by a chain with the same prompt and model (see
+    chain_fingerprint). Entries expire after `ttl` seconds and are dropped
+    as soon as the FAISS index or the metric files change.
+    """
+
+    def __init__(self, embedding, path=ANSWER_CACHE, threshold=THRESHOLD, ttl=TTL_SECONDS,
+                 watched=WATCHED, max_entries=MAX_ENTRIES):
+        self.embedding = embedding
+        self.threshold = threshold
+        self.ttl = ttl
+        self.watched = watched
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.latency_saved = 0.0
+        self.lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS answers ("
+            " id INTEGER PRIMARY KEY, version TEXT NOT NULL, question TEXT NOT NULL, qvec BLOB NOT NULL,"
+            " context TEXT NOT NULL, answer TEXT NOT NULL, sources TEXT NOT NULL,"
+            " latency REAL NOT NULL, created REAL NOT NULL, chain TEXT NOT NULL DEFAULT '')"
+        )
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(answers)")]
+        if "chain" not in columns:
+            # Caches written before answers were keyed by chain can never match one again
+            self.conn.execute("ALTER TABLE answers ADD COLUMN chain TEXT NOT NULL DEFAULT ''")
+        self.conn.commit()
+        self._loaded = None
+        self._matrix = np.empty((0, 0), dtype=np.float32)
+        self._rows = []
+
+    def _vector(self, question):
+        v = np.asarray(self.embedding.embed_query(normalize_question(question)), dtype=np.float32)
+        return v / (np.linalg.norm(v) or 1.0)
+
+    def _refresh(self, version, now):
+        """Reload the live entries into one matrix when another session (or this one) wrote new rows."""
+        if self.conn.execute("DELETE FROM answers WHERE version != ? OR created < ?", (version, now - self.ttl)).rowcount:
+            self.conn.commit()
+        (marker,) = self.conn.execute("SELECT COALESCE(MAX(id), 0) || ':' || COUNT(*) FROM answers").fetchone()
+        if marker == self._loaded:
+            return
+        rows = self.conn.execute(
+            "SELECT id, qvec, context, created, chain FROM answers WHERE version = ? ORDER BY id", (version,)
+        ).fetchall()
+        self._rows = [(r[0], r[2], r[3], r[4]) for r in rows]
+        self._matrix = (np.vstack([np.frombuffer(r[1], dtype=np.float32) for r in rows])
+                        if rows else np.empty((0, 0), dtype=np.float32))
+        self._loaded = marker
+
+    def lookup(self, question, docs, chain=""):
+        """Cached result dict for the question, its retrieved docs and the chain_fingerprint, or None."""
+        start = time.perf_counter()
+        vector = self._vector(question)
+        context = context_fingerprint(docs)
+        now = time.time()
+        with self.lock:
+            self._refresh(data_version(self.watched), now)
+            best = None
+            if len(self._rows):
+                sims = self._matrix @ vector
+                for i in np.argsort(-sims):
+                    if sims[i] < self.threshold:
+                        break
+                    row_id, row_context, created, row_chain = self._rows[i]
+                    if row_context == context and row_chain == chain and created >= now - self.ttl:
+                        best = row_id
+                        break
+            if best is None:
+                self.misses += 1
+                return None
+            answer, sources, latency = self.conn.execute(
+                "SELECT answer, sources, latency FROM answers WHERE id = ?", (best,)
+            ).fetchone()
+            self.hits += 1
+            self.latency_saved += max(0.0, latency - (time.perf_counter() - start))
+        return {
+            "answer": answer,
+            "source_documents": [Document(page_content=d["content"], metadata=d["metadata"]) for d in json.loads(sources)],
+            "cached": True,
+        }
+
+    def store(self, question, docs, result, latency, chain=""):
+        sources = [{"content": d.page_content, "metadata": d.metadata} for d in result.get("source_documents", [])]
+        vector = self._vector(question)
+        with self.lock:
+            self.conn.execute(
+                "INSERT INTO answers (version, question, qvec, context, answer, sources, latency, created, chain)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (data_version(self.watched), question, vector.tobytes(), context_fingerprint(docs),
+                 result.get("answer", ""), json.dumps(sources), latency, time.time(), chain),
+            )
+            self.conn.execute(
+                "DELETE FROM answers WHERE id IN (SELECT id FROM answers ORDER BY id DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self.conn.commit()
+
+    def clear(self):
+        with self.lock:
+            self.conn.execute("DELETE FROM answers")
+            self.conn.commit()
+            self._loaded = None
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "latency_saved_s": round(self.latency_saved, 3),
+        }
+
+class RetrievedDocs(BaseRetriever):
+    """Hands back documents that were already retrieved, so a cache miss does not search twice."""
+
+    docs: list
+
+    def _get_relevant_documents(self, query, *, run_manager=None):
+        return list(self.docs)
+
+def cached_invoke(cache, qa_chain, memory, retriever, question, callbacks=None):
+    """qa_chain.invoke({"question": ...}) with the answer cache in front.
+
+    Only opening questions are cached: a follow-up depends on the chat
+    history, so it always goes to the chain. On a hit the exchange is still
+    written to `memory`, so the conversation carries on normally; on a miss
+    the chain answers from the documents already retrieved for the lookup.
+    `callbacks` (e.g. a streaming handler) only see chain runs, not hits.
+    """
+    config = {"callbacks": callbacks} if callbacks else None
+    if memory.chat_memory.messages:
+        return qa_chain.invoke({"question": question}, config=config)
+    docs = retriever.invoke(question)
+    chain = chain_fingerprint(qa_chain)
+    result = cache.lookup(question, docs, chain)
+    if result is not None:
+        memory.save_context({"question": question}, {"answer": result["answer"]})
+        return result
+    start = time.perf_counter()
+    # Shallow copy: same memory, prompt and LLM, only the retrieval step is replaced
+    result = qa_chain.model_copy(update={"retriever": RetrievedDocs(docs=docs)}).invoke({"question": question}, config=config)
+    cache.store(question, docs, result, time.perf_counter() - start, chain)
+    return result
+
+if __name__ == "__main__":
+    # Offline demo: stub LLM and hash embeddings over the local index
+    from langchain_community.vectorstores import FAISS
+    from langchain.chains import ConversationalRetrievalChain
+    from langchain.memory import ConversationBufferMemory
+    from Fakes import HashEmbeddings, StubChatModel
+    from HybridRetriever import HybridRetriever
+
+    parser = argparse.ArgumentParser(description="Replay questions through the answer cache with a stub LLM.")
+    parser.add_argument("questions", nargs="+")
+    parser.add_argument("--sessions", type=int, default=3, help="Times each question is asked, each in a new session.")
+    parser.add_argument("--latency", type=float, default=0.5, help="Stub LLM seconds per call.")
+    args = parser.parse_args()
+
+    embedding = HashEmbeddings()
+    vectorstore = FAISS.load_local("faiss_index_fund_data", embedding, allow_dangerous_deserialization=True)
+    retriever = HybridRetriever.from_vectorstore(vectorstore)
+    llm = StubChatModel(latency=args.latency)
+    cache = AnswerCache(embedding, path=":memory:")
+
+    for _ in range(args.sessions):
+        for question in args.questions:
+            memory = ConversationBufferMemory(memory_key="chat_history", return_messages=True, output_key="answer")
+            chain = ConversationalRetrievalChain.from_llm(
+                llm=llm, retriever=retriever, memory=memory, return_source_documents=True, output_key="answer")
+            result = cached_invoke(cache, chain, memory, retriever, question)
+            print(f"{'HIT ' if result.get('cached') else 'MISS'} {question}")
+    print(json.dumps({**cache.stats(), "llm_calls": llm.calls}, indent=2))
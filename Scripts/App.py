@@ -1,90 +1,24 @@
-import os
-from dotenv import load_dotenv
-from langchain_community.vectorstores import FAISS
-from langchain_openai import AzureOpenAIEmbeddings, AzureChatOpenAI
-from langchain.chains import ConversationalRetrievalChain
-from langchain.memory import ConversationBufferMemory
-from langchain.prompts import PromptTemplate
+import uuid
 import streamlit as st
 from fpdf import FPDF
 
-# --- Load environment variables
-load_dotenv()
+from Prompts import PROMPTS
+from AdvisorClient import ADVISOR_API_URL, AdvisorBusy, remote_answer
+from AnswerCache import cached_invoke
+from Streaming import AnswerStream
+from Resources import get_retriever, get_llm, get_answer_cache, get_screener, session_chain, session_memory
+from Screener import SOURCES, narrative_prompt
 
-# --- Initialize embeddings
-embedding = AzureOpenAIEmbeddings(
-    model="text-embedding-ada-002",
-    azure_endpoint=os.getenv("AZURE_API_BASE"),
-    api_key=os.getenv("AZURE_API_KEY"),
-    deployment=os.getenv("AZURE_EMBED_DEPLOYMENT"),
-    api_version=os.getenv("AZURE_EMBED_VERSION"),
-    chunk_size=1000,
-)
-
-# --- Load FAISS index and set up retriever
-vectorstore = FAISS.load_local(
-    "faiss_index_fund_data",
-    embedding,
-    allow_dangerous_deserialization=True
-)
-retriever = vectorstore.as_retriever()
-
-# --- Configure Azure OpenAI chat model
-llm = AzureChatOpenAI(
-    deployment_name=os.getenv("AZURE_CHAT_DEPLOYMENT"),
-    model="gpt-4.1",
-    azure_endpoint=os.getenv("AZURE_API_BASE"),
-    api_key=os.getenv("AZURE_API_KEY"),
-    api_version=os.getenv("AZURE_CHAT_VERSION"),
-    temperature=0,
-)
-
-custom_prompt = PromptTemplate.from_template("""
-INSTRUCTION: First, provide a direct and concise answer to the user's question in 2-3 sentences and label it as 'Answer:'. After that, clearly label and provide your full explanation or reasoning as 'Explanation:' based on the chain-of-thought steps.
+# --- Shared resources (built once per server process, see Resources.py)
+# With ADVISOR_API_URL set, the advisor service (Server.py) owns them and this app is a thin client
+if not ADVISOR_API_URL:
+    retriever = get_retriever()
+    llm = get_llm()
+    answer_cache = get_answer_cache()
+    screener = get_screener()
 
-You are an expert mutual fund assistant. For any question about a specific ticker or fund, use this rigorous chain-of-thought reasoning:
-
-Step 1: Identify user intent and which ticker(s) or fund(s) are referenced.
-Step 2: Retrieve and present the most relevant sections from each fund's prospectus summary:
-- For risk questions: Use "Principal Risks" and risk disclosures.
-- For investment approach: Use "Investment Objective" and "Strategy".
-- For cost questions: Use "Fees and Expenses".
-- For suitability: Use "Who Should Invest".
-- For returns: Use "Performance" and historical data.
-Step 3: Supplement your answer with key quantitative risk metrics and fund metadata:
-- **Alpha:** Indicates outperformance vs. benchmark.
-  - Positive alpha: Fund beat its benchmark (good).
-  - Negative alpha: Fund lagged benchmark (bad).
-- **Sharpe Ratio:** Return per unit of total risk.
-  - Positive: Fund outperformed the risk-free rate (good, higher is better).
-  - Negative: Underperformed risk-free rate; took risk but lost money.
-- **Sortino Ratio:** Like Sharpe but penalizes only downside risk.
-  - Positive: Good risk-adjusted performance.
-  - Negative: High downside risk or negative returns.
-- **Treynor Ratio:** Return per unit of market risk (beta).
-  - Positive: Compensated for market risk.
-  - Negative: Took market risk but underperformed risk-free rate.
-- **Standard Deviation:** Measures volatility.
-  - Higher = more volatile, riskier.
-  - Lower = more stable.
-- **Max Drawdown:** Greatest observed loss from a peak to a trough.
-- **Expense Ratio, AUM, Inception Date, etc.**
-Step 4: If any risk metric is negative, always explain what that means for the user.
-  - E.g., "A negative Sharpe ratio means the fund underperformed safe assets and took on unnecessary risk."
-Step 5: Structure your answer:
-- **Start with the relevant prospectus summary** for official narrative and disclosures.
-- **Follow with a table or bullet points** of quantitative data, including risk metrics and fees.
-- **Interpret results in plain language, especially if metrics are negative or unusually high/low.**
-- Offer practical insights or suitability if possible (e.g., “This fund may not be suitable for conservative investors given its high volatility.”)
-Step 6: If any requested data is missing, reply:  
-"That information is not available in the provided context."
-
-Context:
-{context}
-
-Question:
-{question}
-""")
+PROMPT = "app"
+custom_prompt = PROMPTS[PROMPT]
 
 # --- Streamlit page configuration
 st.set_page_config(page_title="GenAI Fund Advisor", layout="wide")
@@ -163,28 +97,18 @@ st.markdown("""
 
 # --- Clear conversation button
 if st.button("Clear Conversation"):
-    for key in ("memory", "qa_chain"):
+    for key in ("memory", "qa_chain", "session_id"):
         if key in st.session_state:
             del st.session_state[key]
     st.rerun()
 
 # --- Initialize memory and QA chain
-if "memory" not in st.session_state:
-    st.session_state.memory = ConversationBufferMemory(
-        memory_key="chat_history",
-        return_messages=True,
-        output_key="answer"
-    )
-
-if "qa_chain" not in st.session_state:
-    st.session_state.qa_chain = ConversationalRetrievalChain.from_llm(
-        llm=llm,
-        retriever=retriever,
-        memory=st.session_state.memory,
-        return_source_documents=True,
-        combine_docs_chain_kwargs={"prompt": custom_prompt},
-        output_key="answer"
-    )
+if ADVISOR_API_URL:
+    session_memory(summarize=False)
+    if "session_id" not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
+else:
+    session_chain(custom_prompt)
 
 # --- Display chat history
 if st.session_state.memory.chat_memory.messages:
@@ -211,25 +135,69 @@ if "pdf_path" not in st.session_state:
     st.session_state.pdf_path = ""
 
 if query:
-    result = st.session_state.qa_chain.invoke({"question": query})
-    answer = result.get("answer")
-    source_docs = result.get("source_documents", [])
-    sources = "\n".join(doc.metadata.get("source", "N/A") for doc in source_docs)
+    # --- Answer and Explanation cards, filled in as tokens stream
+    header_slot, answer_slot, explanation_slot = st.empty(), st.empty(), st.empty()
+
+    def show_answer(text):
+        header_slot.markdown("### Response:")
+        answer_slot.markdown(f"<div class='custom-answer'><strong>Answer:</strong> {text}</div>", unsafe_allow_html=True)
+
+    def show_explanation(text):
+        explanation_slot.markdown(f"<div class='custom-explanation'><strong>Explanation:</strong> {text}</div>", unsafe_allow_html=True)
+
+    stream = AnswerStream(show_answer, show_explanation)
+    intent = None if ADVISOR_API_URL else screener.parse_intent(query)
+    if ADVISOR_API_URL:
+        # Thin client: retrieval, screening and generation run in the advisor service
+        try:
+            title, table, answer, sources = remote_answer(
+                query, st.session_state.session_id, st.session_state.memory, PROMPT)
+        except AdvisorBusy:
+            st.warning("The advisor is busy right now. Please try again in a few seconds.")
+            st.stop()
+        if table is not None:
+            st.markdown(f"### {title}")
+            st.dataframe(table, hide_index=True, use_container_width=True)
+            header_slot, answer_slot, explanation_slot = st.empty(), st.empty(), st.empty()
+    elif intent:
+        # Comparisons and rankings come straight from the metric store; the LLM only narrates the table
+        title, table = screener.answer(intent)
+        st.markdown(f"### {title}")
+        st.dataframe(table, hide_index=True, use_container_width=True)
+        header_slot, answer_slot, explanation_slot = st.empty(), st.empty(), st.empty()
+        answer = llm.invoke(narrative_prompt(query, title, table), config={"callbacks": [stream.arm()]}).content
+        st.session_state.memory.save_context({"question": query}, {"answer": answer})
+        sources = SOURCES
+    else:
+        result = cached_invoke(answer_cache, st.session_state.qa_chain, st.session_state.memory, retriever, query,
+                               callbacks=[stream])
+        answer = result.get("answer")
+        source_docs = result.get("source_documents", [])
+        sources = "\n".join(doc.metadata.get("source", "N/A") for doc in source_docs)
+    st.session_state.ttft = stream.ttft
 
     if not answer or "context does not include" in answer.lower():
+        header_slot.empty()
+        answer_slot.empty()
+        explanation_slot.empty()
         st.warning("No relevant data found for that question.")
         st.session_state.pdf_ready = False
         st.session_state.pdf_path = ""
     else:
-        st.markdown("### Response:")
-
-        # --- Split LLM output into Answer and Explanation cards
+        # --- Final render: split LLM output into Answer and Explanation cards
+        header_slot.markdown("### Response:")
         if "Explanation:" in answer:
             answer_part, explanation_part = answer.split("Explanation:", 1)
-            st.markdown(f"<div class='custom-answer'><strong>Answer:</strong> {answer_part.replace('Answer:', '').strip()}</div>", unsafe_allow_html=True)
-            st.markdown(f"<div class='custom-explanation'><strong>Explanation:</strong> {explanation_part.strip()}</div>", unsafe_allow_html=True)
+            show_answer(answer_part.replace('Answer:', '').strip())
+            show_explanation(explanation_part.strip())
         else:
-            st.markdown(f"<div class='custom-answer'>{answer.strip()}</div>", unsafe_allow_html=True)
+            answer_slot.markdown(f"<div class='custom-answer'>{answer.strip()}</div>", unsafe_allow_html=True)
+        if stream.ttft is not None:
+            memory_stats = st.session_state.memory.stats()
+            st.caption(
+                f"First token after {stream.ttft:.2f}s · history {memory_stats['last_history_tokens']} tokens"
+                f" · summaries {memory_stats['summary_calls']} calls / {memory_stats['summary_input_tokens']} tokens in"
+            )
 
         if sources.strip():
             st.markdown(f"<p><b>Sources:</b><br>{sources}</p>", unsafe_allow_html=True)
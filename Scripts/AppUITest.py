@@ -1,44 +1,22 @@
-import os
-from dotenv import load_dotenv
-from langchain_community.vectorstores import FAISS
-from langchain_openai import AzureOpenAIEmbeddings, AzureChatOpenAI
-from langchain.chains import ConversationalRetrievalChain
-from langchain.memory import ConversationBufferMemory
-from langchain.prompts import PromptTemplate
+import uuid
 import streamlit as st
 from fpdf import FPDF
 import time
 
-# Load environment variables
-load_dotenv()
-
-# Initialize embeddings
-embedding = AzureOpenAIEmbeddings(
-    model="text-embedding-ada-002",
-    azure_endpoint=os.getenv("AZURE_API_BASE"),
-    api_key=os.getenv("AZURE_API_KEY"),
-    deployment=os.getenv("AZURE_EMBED_DEPLOYMENT"),
-    api_version=os.getenv("AZURE_EMBED_VERSION"),
-    chunk_size=1000,
-)
-
-# Load FAISS index and set up retriever
-vectorstore = FAISS.load_local(
-    "faiss_index_fund_data",
-    embedding,
-    allow_dangerous_deserialization=True
-)
-retriever = vectorstore.as_retriever()
-
-# Configure Azure OpenAI chat model
-llm = AzureChatOpenAI(
-    deployment_name=os.getenv("AZURE_CHAT_DEPLOYMENT"),
-    model="gpt-4.1",
-    azure_endpoint=os.getenv("AZURE_API_BASE"),
-    api_key=os.getenv("AZURE_API_KEY"),
-    api_version=os.getenv("AZURE_CHAT_VERSION"),
-    temperature=0,
-)
+from Prompts import PROMPTS
+from AdvisorClient import ADVISOR_API_URL, AdvisorBusy, remote_answer
+from AnswerCache import cached_invoke
+from Streaming import AnswerStream
+from Resources import get_retriever, get_llm, get_answer_cache, get_screener, session_chain, session_memory
+from Screener import SOURCES, narrative_prompt
+
+# --- Shared resources (built once per server process, see Resources.py)
+# With ADVISOR_API_URL set, the advisor service (Server.py) owns them and this app is a thin client
+if not ADVISOR_API_URL:
+    retriever = get_retriever()
+    llm = get_llm()
+    answer_cache = get_answer_cache()
+    screener = get_screener()
 
 # Streamlit page configuration
 st.set_page_config(
@@ -337,62 +315,22 @@ function setQuery(query) {
 col1, col2, col3 = st.columns([1, 2, 1])
 with col2:
     if st.button("🗑️ Clear Conversation", key="clear_btn"):
-        for key in ("memory", "qa_chain"):
+        for key in ("memory", "qa_chain", "session_id"):
             if key in st.session_state:
                 del st.session_state[key]
         st.rerun()
 
 # Custom prompt (unchanged)
-custom_prompt = PromptTemplate.from_template("""
-You are a financial assistant helping users with mutual fund questions.
-
-You have access to:
-- Definitions of terms (e.g., Sortino, Sharpe)
-- Fund risk metrics (Sharpe, Sortino, Treynor, Std Dev)
-- Fund metadata (inception date, AUM, expense ratio)
-
-Before answering, use chain-of-thought reasoning:
-
-STEP 1: Identify the question type:
-  - Definition/info question? ("What is AUM?")
-  - Fund comparison? ("Compare VWELX vs VFIAX")
-  - Fund recommendation? ("Suggest a low-risk long-term fund")
-
-STEP 2: Handle accordingly:
-  - For definitions: Explain the term from context.
-  - For comparisons: Compare metrics from context across funds.
-  - For recommendations:
-      a. Infer user profile (risk, time horizon, ESG, etc.)
-      b. Filter based on context metrics (Sortino, Sharpe, Expense, etc.)
-      c. Recommend and justify based on real data.
-
-If context is missing, reply: "That information is not available in the provided context."
-
-Context:
-{context}
-
-Question:
-{question}
-""")
+PROMPT = "ui_test"
+custom_prompt = PROMPTS[PROMPT]
 
 # Initialize memory and QA chain
-if "memory" not in st.session_state:
-    st.session_state.memory = ConversationBufferMemory(
-        memory_key="chat_history",
-        return_messages=True,
-        output_key="answer"
-    )
-
-
-if "qa_chain" not in st.session_state:
-    st.session_state.qa_chain = ConversationalRetrievalChain.from_llm(
-        llm=llm,
-        retriever=retriever,
-        memory=st.session_state.memory,
-        return_source_documents=True,
-        combine_docs_chain_kwargs={"prompt": custom_prompt},
-        output_key="answer"
-    )
+if ADVISOR_API_URL:
+    session_memory(summarize=False)
+    if "session_id" not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
+else:
+    session_chain(custom_prompt)
 
 # Display chat history
 if st.session_state.memory.chat_memory.messages:
@@ -438,19 +376,47 @@ st.markdown('</div>', unsafe_allow_html=True)
 # Process query
 if ask_button and query:
     with st.spinner("🔍 Analyzing your request..."):
-        result = st.session_state.qa_chain.invoke({"question": query})
-        answer = result.get("answer")
-        source_docs = result.get("source_documents", [])
-        sources = "\n".join(doc.metadata.get("source", "N/A") for doc in source_docs)
-
-        st.markdown(f"""
-        <div class="main-container">
-            <div class="response-card">
-                <h3>📈 Analysis Results</h3>
-                <div style="margin-top: 1rem; line-height: 1.6;">{answer}</div>
+        intent = None if ADVISOR_API_URL else screener.parse_intent(query)
+        title, table = screener.answer(intent) if intent else (None, None)
+        if ADVISOR_API_URL:
+            # Thin client: retrieval, screening and generation run in the advisor service
+            try:
+                title, table, answer, sources = remote_answer(
+                    query, st.session_state.session_id, st.session_state.memory, PROMPT)
+            except AdvisorBusy:
+                st.warning("The advisor is busy right now. Please try again in a few seconds.")
+                st.stop()
+        if table is not None:
+            # Comparisons and rankings are answered from the metric store; the LLM only narrates
+            st.markdown(f"**{title}**")
+            st.dataframe(table, hide_index=True, use_container_width=True)
+
+        # Filled in as tokens stream, then once more with the final answer
+        result_slot = st.empty()
+
+        def show_result(text):
+            result_slot.markdown(f"""
+            <div class="main-container">
+                <div class="response-card">
+                    <h3>📈 Analysis Results</h3>
+                    <div style="margin-top: 1rem; line-height: 1.6;">{text}</div>
+                </div>
             </div>
-        </div>
-        """, unsafe_allow_html=True)
+            """, unsafe_allow_html=True)
+
+        stream = AnswerStream(show_result)
+        if intent:
+            answer = llm.invoke(narrative_prompt(query, title, table), config={"callbacks": [stream.arm()]}).content
+            st.session_state.memory.save_context({"question": query}, {"answer": answer})
+            sources = SOURCES
+        elif not ADVISOR_API_URL:
+            result = cached_invoke(answer_cache, st.session_state.qa_chain, st.session_state.memory, retriever, query,
+                                   callbacks=[stream])
+            answer = result.get("answer")
+            source_docs = result.get("source_documents", [])
+            sources = "\n".join(doc.metadata.get("source", "N/A") for doc in source_docs)
+        st.session_state.ttft = stream.ttft
+        show_result(answer)
 
         if sources.strip():
             st.markdown(f"""
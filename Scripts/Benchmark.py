@@ -0,0 +1,282 @@
+"""Offline benchmarks for metric computation, chunking, indexing, FAISS queries and the QA chain.
+
+Everything runs on synthetic prices and text, HashEmbeddings and the
+StubChatModel, so numbers are comparable across machines and runs without
+network access or API keys. Results are written as JSON; --compare checks
+them against an earlier run and flags regressions.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import tempfile
+import argparse
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from langchain_core.documents import Document
+from langchain_community.vectorstores import FAISS
+from langchain.chains import ConversationalRetrievalChain
+
+from Fakes import HashEmbeddings, StubChatModel
+from SortinoEngine import sortino_matrix
+from DrawdownEngine import drawdown_matrix
+from RiskMetrics import risk_metrics
+from RollingMetrics import rolling_metrics
+from Chunking import chunk_text
+from ChunkingBenchmark import synthetic_prospectus
+from Index import iter_documents, update_index
+from HybridRetriever import HybridRetriever
+from ContextPacker import PackedRetriever
+from ConversationMemory import BudgetedConversationMemory
+
+SUITES = ["metrics", "chunking", "index", "faiss", "chain"]
+TICKER_SIZES = [10, 1000, 10000]
+FAISS_SIZES = [1000, 10000, 100000]
+DATA_FILES = ["Data/fund_risk_metrics.json", "Data/fund_metadata.json", "Data/Definitions.json"]
+QUESTIONS = [
+    "What is the Sortino ratio of VWELX over 10 years?",
+    "Which conservative funds have the highest Sharpe ratio?",
+    "Compare VFIAX and PRBLX on standard deviation.",
+    "What does Treynor ratio measure?",
+    "How risky is FSPTX compared to VSMAX?",
+    "Tell me about the Vanguard Total Bond Market Index Fund.",
+]
+FOLLOW_UPS = ["And over 3 years?", "Which of those has lower volatility?"]
+TOLERANCE = 1.25
+
+def percentiles(samples):
+    s = np.asarray(samples, dtype=float) * 1000
+    return {
+        "p50_ms": round(float(np.percentile(s, 50)), 3),
+        "p95_ms": round(float(np.percentile(s, 95)), 3),
+        "p99_ms": round(float(np.percentile(s, 99)), 3),
+    }
+
+def best_of(fn, repeat):
+    """Fastest of `repeat` runs, in seconds."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+# --- Metric engines ---
+def synthetic_prices(tickers, years=10, seed=0):
+    """Business-day closes with a few gaps and late starts, like a real fund universe."""
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=252 * years)
+    returns = rng.normal(0.0003, 0.01, (len(index), tickers)).astype(np.float64)
+    prices = 100 * np.exp(np.cumsum(returns, axis=0))
+    late = rng.integers(0, len(index) // 2, size=tickers // 10)
+    for col, start in zip(range(0, tickers, 10), late):
+        prices[:start, col] = np.nan
+    prices[rng.random(prices.shape) < 0.001] = np.nan
+    frame = pd.DataFrame(prices, index=index, columns=[f"T{i:05d}" for i in range(tickers)])
+    benchmark = pd.Series(100 * np.exp(np.cumsum(rng.normal(0.0003, 0.01, len(index)))), index=index)
+    return frame, benchmark
+
+def bench_metrics(sizes=TICKER_SIZES, repeat=3):
+    end_date = datetime.today()
+    engines = [
+        ("sortino_matrix", lambda p, b: sortino_matrix(p, end_date=end_date)),
+        ("drawdown_matrix", lambda p, b: drawdown_matrix(p, end_date=end_date)),
+        ("risk_metrics", lambda p, b: risk_metrics(p, b, end_date=end_date)),
+        ("rolling_metrics", lambda p, b: rolling_metrics(p)),
+    ]
+    rows = []
+    for n in sizes:
+        prices, benchmark = synthetic_prices(n)
+        runs = repeat if n < 10000 else 1
+        for name, fn in engines:
+            seconds = best_of(lambda: fn(prices, benchmark), runs)
+            rows.append({
+                "suite": "metrics", "name": f"{name}@{n}", "tickers": n, "rows": len(prices.index),
+                "seconds": round(seconds, 4), "tickers_per_s": round(n / seconds, 1),
+            })
+        del prices, benchmark
+    return rows
+
+# --- Chunking and index build ---
+def synthetic_docs(docs, sentences):
+    return [
+        Document(page_content=synthetic_prospectus(sentences, seed=i), metadata={"source": "synthetic", "key": f"DOC{i}"})
+        for i in range(docs)
+    ]
+
+def bench_chunking(docs=200, sentences=400, repeat=3):
+    texts = [d.page_content for d in synthetic_docs(docs, sentences)]
+    total = sum(len(t) for t in texts)
+    rows = []
+    for name, kwargs in [("chunk_text", {}), ("chunk_text_tokens", {"max_tokens": 256, "overlap": 32})]:
+        chunks = []
+        seconds = best_of(lambda: chunks.append(sum(len(chunk_text(t, **kwargs)) for t in texts)), repeat)
+        rows.append({
+            "suite": "chunking", "name": name, "docs": docs, "seconds": round(seconds, 4),
+            "mb_per_s": round(total / 1e6 / seconds, 2), "chunks": chunks[-1],
+        })
+    return rows
+
+def bench_index(docs=200, sentences=100, batch_size=64, concurrency=4):
+    """Chunk + embed + FAISS add through Index.update_index, full build then a no-op update."""
+    chunks = [
+        Document(page_content=c, metadata=d.metadata)
+        for d in synthetic_docs(docs, sentences) for c in chunk_text(d.page_content)
+    ]
+    workdir = tempfile.mkdtemp(prefix="bench-index-")
+    try:
+        embedding = HashEmbeddings()
+        rows = []
+        for name, full in [("index_full_build", True), ("index_noop_update", False)]:
+            start = time.perf_counter()
+            update_index(chunks, embedding, workdir, model="bench-hash", full=full, batch_size=batch_size,
+                         concurrency=concurrency, tokens_per_minute=10 ** 9)
+            seconds = time.perf_counter() - start
+            rows.append({
+                "suite": "index", "name": name, "chunks": len(chunks), "seconds": round(seconds, 4),
+                "chunks_per_s": round(len(chunks) / seconds, 1),
+            })
+        return rows
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+# --- FAISS queries ---
+def bench_faiss(sizes=FAISS_SIZES, dim=256, queries=200, k=4):
+    rng = np.random.default_rng(0)
+    rows = []
+    for n in sizes:
+        vectors = rng.normal(size=(n, dim)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        start = time.perf_counter()
+        store = FAISS.from_embeddings(
+            [(f"doc {i}", v) for i, v in enumerate(vectors.tolist())], HashEmbeddings(dim), ids=[str(i) for i in range(n)])
+        build = time.perf_counter() - start
+        probes = rng.normal(size=(queries, dim)).astype(np.float32)
+        samples = []
+        for q in probes.tolist():
+            start = time.perf_counter()
+            store.similarity_search_with_score_by_vector(q, k=k)
+            samples.append(time.perf_counter() - start)
+        lat = percentiles(samples)
+        rows.append({
+            "suite": "faiss", "name": f"query@{n}", "vectors": n, "dim": dim, "k": k,
+            "seconds": round(lat["p50_ms"] / 1000, 6), **lat, "build_s": round(build, 3),
+        })
+        del store, vectors
+    return rows
+
+# --- End-to-end QA chain ---
+def bench_chain(rounds=5, llm_latency=0.0, files=DATA_FILES):
+    """qa_chain.invoke latency with the production retriever stack over the real data files."""
+    embedding = HashEmbeddings()
+    docs = list(iter_documents(files))
+    vectorstore = FAISS.from_documents(docs, embedding)
+    retriever = PackedRetriever(base=HybridRetriever.from_vectorstore(vectorstore, k=8))
+    llm = StubChatModel(latency=llm_latency, token_delay=0.0)
+    memory = BudgetedConversationMemory(memory_key="chat_history", return_messages=True, output_key="answer")
+    chain = ConversationalRetrievalChain.from_llm(
+        llm=llm, retriever=retriever, memory=memory, return_source_documents=True, output_key="answer")
+
+    retrieval, opening, follow_up = [], [], []
+    for _ in range(rounds):
+        for question in QUESTIONS:
+            start = time.perf_counter()
+            retriever.invoke(question)
+            retrieval.append(time.perf_counter() - start)
+
+            memory.clear()
+            start = time.perf_counter()
+            chain.invoke({"question": question})
+            opening.append(time.perf_counter() - start)
+            for text in FOLLOW_UPS:
+                start = time.perf_counter()
+                chain.invoke({"question": text})
+                follow_up.append(time.perf_counter() - start)
+
+    rows = []
+    for name, samples in [("retriever_invoke", retrieval), ("qa_chain_opening", opening), ("qa_chain_follow_up", follow_up)]:
+        lat = percentiles(samples)
+        rows.append({
+            "suite": "chain", "name": name, "calls": len(samples), "llm_latency_s": llm_latency,
+            "seconds": round(lat["p50_ms"] / 1000, 6), **lat,
+        })
+    return rows
+
+# --- Reporting ---
+def compare(results, baseline, tolerance=TOLERANCE):
+    """Rows of (suite, name, old, new, ratio, regressed) for entries present in both runs."""
+    old = {(r["suite"], r["name"]): r["seconds"] for r in baseline["results"]}
+    out = []
+    for r in results:
+        key = (r["suite"], r["name"])
+        if key in old and old[key]:
+            ratio = r["seconds"] / old[key]
+            out.append((r["suite"], r["name"], old[key], r["seconds"], round(ratio, 3), ratio > tolerance))
+    return out
+
+def run(suites, args):
+    results = []
+    for suite in suites:
+        print(f"Running {suite}...", file=sys.stderr)
+        if suite == "metrics":
+            results += bench_metrics(args.tickers, args.repeat)
+        elif suite == "chunking":
+            results += bench_chunking(repeat=args.repeat)
+        elif suite == "index":
+            results += bench_index()
+        elif suite == "faiss":
+            results += bench_faiss(args.faiss_sizes, queries=args.queries)
+        elif suite == "chain":
+            results += bench_chain(args.rounds, args.llm_latency)
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "suites": suites,
+        },
+        "results": results,
+    }
+
+def sizes(text):
+    return [int(x) for x in text.split(",") if x]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline performance baseline for the fund advisor.")
+    parser.add_argument("suites", nargs="*", help=f"Suites to run (default: all of {', '.join(SUITES)}).")
+    parser.add_argument("--tickers", type=sizes, default=TICKER_SIZES, help="Comma-separated universe sizes.")
+    parser.add_argument("--faiss-sizes", type=sizes, default=FAISS_SIZES, help="Comma-separated index sizes.")
+    parser.add_argument("--queries", type=int, default=200, help="FAISS queries per index size.")
+    parser.add_argument("--rounds", type=int, default=5, help="Passes over the sample questions in the chain suite.")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Seconds the stub LLM waits per call.")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per timing; the fastest is kept.")
+    parser.add_argument("--output", default="benchmark.json", help="Write results as JSON to this path.")
+    parser.add_argument("--compare", default=None, help="Earlier results JSON to compare against.")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE,
+                        help="Slowdown ratio above which an entry counts as a regression.")
+    args = parser.parse_args()
+    unknown = [suite for suite in args.suites if suite not in SUITES]
+    if unknown:
+        parser.error(f"unknown suites {unknown}; choose from {SUITES}")
+
+    report = run(args.suites or SUITES, args)
+    for r in report["results"]:
+        extra = {k: v for k, v in r.items() if k not in ("suite", "name", "seconds")}
+        print(f"{r['suite']:>9} {r['name']:<24} {r['seconds']:>10.4f}s  {extra}")
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results saved to '{args.output}'")
+
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+        rows = compare(report["results"], baseline, args.tolerance)
+        for suite, name, old, new, ratio, regressed in rows:
+            print(f"{'REGRESSION' if regressed else 'ok':>10} {suite:>9} {name:<24} {old:>10.4f}s -> {new:>10.4f}s  x{ratio}")
+        sys.exit(1 if any(row[-1] for row in rows) else 0)
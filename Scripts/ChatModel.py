@@ -0,0 +1,23 @@
+import os
+
+def azure_chat(streaming=True):
+    from langchain_openai import AzureChatOpenAI
+    return AzureChatOpenAI(
+        deployment_name=os.getenv("AZURE_CHAT_DEPLOYMENT"),
+        model="gpt-4.1",
+        azure_endpoint=os.getenv("AZURE_API_BASE"),
+        api_key=os.getenv("AZURE_API_KEY"),
+        api_version=os.getenv("AZURE_CHAT_VERSION"),
+        temperature=0,
+        streaming=streaming,
+    )
+
+def chat_model(streaming=True):
+    """The project's chat model.
+
+    Set CHAT_BACKEND=local to use the offline StubChatModel instead of Azure.
+    """
+    if os.getenv("CHAT_BACKEND") == "local":
+        from Fakes import StubChatModel
+        return StubChatModel(streaming=streaming)
+    return azure_chat(streaming=streaming)
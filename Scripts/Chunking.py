@@ -0,0 +1,152 @@
+import os
+import re
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    _ENCODING = None
+
+def count_tokens(text):
+    """cl100k_base token count (the ada-002 / GPT-4 tokenizer), or ~4 chars per token without tiktoken."""
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text, disallowed_special=()))
+    return max(1, len(text) // 4)
+
+# --- Sentence splitting ---
+ABBREVIATIONS = {
+    "e.g", "i.e", "etc", "vs", "inc", "corp", "co", "ltd", "llc", "no", "mr", "mrs", "ms", "dr",
+    "jr", "sr", "st", "jan", "feb", "mar", "apr", "jun", "jul", "aug", "sep", "sept", "oct",
+    "nov", "dec", "u.s", "u.k", "approx", "est", "fig", "avg", "yr", "yrs",
+}
+
+class RegexSentenceSplitter:
+    """Precompiled, download-free sentence splitter.
+
+    Splits after . ! ? (optionally followed by closing quotes/brackets) when
+    whitespace follows, and, as punkt does, straight after the point when
+    punctuation follows with no space ('assets.", "next' breaks before the
+    quote). Breaks that follow a known abbreviation or a single capital
+    initial are rejoined. Decimals such as 1.99 never split because
+    no whitespace follows the point.
+    """
+
+    BOUNDARY = re.compile(r"(?<=[.!?])(?:[\"')\]]*\s+|(?=[\"')\]};:*@'(\[{]+[^\s\"')\]};:*@'(\[{]))")
+    LAST_WORD = re.compile(r"(\S+)[.][\"')\]]*$")
+
+    def __init__(self, abbreviations=ABBREVIATIONS):
+        self.abbreviations = frozenset(a.lower() for a in abbreviations)
+
+    def _is_abbreviation(self, fragment):
+        m = self.LAST_WORD.search(fragment)
+        if not m:
+            return False
+        word = m.group(1).lstrip("(\"'").lower()
+        return word in self.abbreviations or (len(word) == 1 and word.isalpha())
+
+    def __call__(self, text):
+        sentences = []
+        begin = last = 0
+        for m in self.BOUNDARY.finditer(text):
+            end = m.start() + len(m.group(0).rstrip())
+            if not self._is_abbreviation(text[last:end]):
+                sentence = text[begin:end].strip()
+                if sentence:
+                    sentences.append(sentence)
+                begin = m.end()
+            last = m.end()
+        tail = text[begin:].strip()
+        if tail:
+            sentences.append(tail)
+        return sentences
+
+default_splitter = RegexSentenceSplitter()
+
+def nltk_splitter(language="english"):
+    """NLTK punkt splitter if its data is already installed; never downloads."""
+    import nltk
+    nltk.data.find("tokenizers/punkt_tab")
+    from nltk.tokenize import sent_tokenize
+    return partial(sent_tokenize, language=language)
+
+# --- Chunking ---
+def _split_oversized(sentence, budget, size):
+    """Break a sentence longer than the budget on word boundaries."""
+    pieces, cur, cur_size = [], [], 0
+    for word in sentence.split():
+        word_size = size(word) + (1 if cur else 0)
+        if cur and cur_size + word_size > budget:
+            pieces.append(" ".join(cur))
+            cur, cur_size = [], 0
+            word_size = size(word)
+        cur.append(word)
+        cur_size += word_size
+    if cur:
+        pieces.append(" ".join(cur))
+    return pieces
+
+def chunk_text(text, max_chunk=800, splitter=None, max_tokens=None, overlap=0, token_counter=count_tokens):
+    """Pack sentences into chunks in linear time.
+
+    By default chunks stay under `max_chunk` characters, matching the
+    original concatenation rule. With `max_tokens`, chunks hold at most that
+    many tokens (by `token_counter`) and over-long sentences are split on
+    words. `overlap` repeats trailing sentences, up to that many characters
+    (or tokens), at the start of the next chunk.
+    """
+    splitter = splitter or default_splitter
+    sentences = splitter(text)
+
+    if max_tokens is not None:
+        size, sep = token_counter, 0
+        units = []
+        for s in sentences:
+            units.extend(_split_oversized(s, max_tokens, size) if size(s) > max_tokens else [s])
+        sentences = units
+        fits = lambda cur_size, s_size: cur_size + s_size <= max_tokens
+    else:
+        # Same rule as the old `len(cur) + len(s) < max_chunk`, where cur was
+        # " s1 s2 ..." for the first chunk and "s1 s2 ..." after each flush.
+        size, sep = len, 1
+        fits = lambda cur_size, s_size: cur_size + s_size < max_chunk
+
+    chunks = []
+    parts, sizes, cur_size = [], [], 0
+    for s in sentences:
+        s_size = size(s)
+        if not chunks and not parts:
+            parts, sizes, cur_size = [s], [s_size], s_size + sep
+            continue
+        if fits(cur_size, s_size):
+            parts.append(s)
+            sizes.append(s_size)
+            cur_size += sep + s_size
+            continue
+        chunks.append(" ".join(parts))
+        carried, carried_sizes, carried_size = [], [], 0
+        for p, p_size in zip(reversed(parts), reversed(sizes)):
+            if carried_size + p_size > overlap or not fits(carried_size + p_size + sep, s_size):
+                break
+            carried.insert(0, p)
+            carried_sizes.insert(0, p_size)
+            carried_size += p_size + sep
+        parts, sizes = carried + [s], carried_sizes + [s_size]
+        cur_size = carried_size + s_size
+    if parts:
+        chunks.append(" ".join(parts))
+    return [c.strip() for c in chunks if c.strip()]
+
+def _chunk_one(text, kwargs):
+    return chunk_text(text, **kwargs)
+
+def chunk_many(texts, workers=None, **kwargs):
+    """chunk_text over many documents across processes; returns one list of chunks per text."""
+    texts = list(texts)
+    if workers == 1 or len(texts) < 2:
+        return [chunk_text(t, **kwargs) for t in texts]
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, len(texts) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_chunk_one, texts, [kwargs] * len(texts), chunksize=chunksize))
@@ -0,0 +1,165 @@
+import re
+import json
+import numpy as np
+from typing import Any
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.callbacks.manager import dispatch_custom_event
+
+from Chunking import count_tokens
+
+MAX_CONTEXT_TOKENS = 1200
+WORD_RE = re.compile(r"[a-z0-9.%-]+")
+STATS_EVENT = "context_packer_stats"
+
+def words(text):
+    return set(WORD_RE.findall(text.lower()))
+
+def parse_entry(doc):
+    """(key, dict) for a whole JSON entry as Index.py writes it, or (key, None) for a text fragment."""
+    key = doc.metadata.get("key")
+    text = doc.page_content
+    start = text.find("{")
+    if key is None or start < 0:
+        return key, None
+    try:
+        value = json.loads(text[start:])
+    except ValueError:
+        return key, None
+    return key, value if isinstance(value, dict) else None
+
+def render_metrics(metrics):
+    """{metric: {"3y": v, ...}} as one compact line per metric."""
+    horizons = list(dict.fromkeys(h for by_h in metrics.values() if isinstance(by_h, dict) for h in by_h))
+    lines = [f"Metric | {' | '.join(horizons)}"]
+    for metric, by_h in metrics.items():
+        if isinstance(by_h, dict):
+            lines.append(f"{metric} | {' | '.join(str(by_h.get(h, 'N/A')) for h in horizons)}")
+        else:
+            lines.append(f"{metric} | {by_h}")
+    return "\n".join(lines)
+
+def render_fields(fields):
+    return "; ".join(f"{k}: {v}" for k, v in fields.items() if k != "name" and not isinstance(v, (dict, list)))
+
+def render_group(key, entries):
+    """One compact block for every parsed entry sharing a key (fund or term)."""
+    head = key
+    fields, metrics = {}, {}
+    for value in entries:
+        for k, v in value.items():
+            if isinstance(v, dict):
+                metrics[k] = v
+            elif k == "name" and v != key:
+                head = f"{key} ({v})"
+            else:
+                fields.setdefault(k, v)
+    parts = [head]
+    if fields:
+        parts.append(render_fields(fields))
+    if metrics:
+        parts.append(render_metrics(metrics))
+    return "\n".join(parts)
+
+class PackedRetriever(BaseRetriever):
+    """Wraps a retriever and hands the chain a compact, deduplicated context.
+
+    Near-duplicate chunks (word sets `dedupe_threshold` contained in an
+    earlier chunk) are dropped; whole JSON entries sharing a key (a fund's
+    metadata and risk metrics, say) are merged into one block with metrics as
+    a small table; blocks are ordered by maximal marginal relevance and
+    packed until `max_tokens` is reached. Relevance and redundancy use
+    `embedding` when given, otherwise the base retriever's rank and word
+    overlap. Each call reports its counts to the caller's callbacks as the
+    custom event STATS_EVENT, and passes those callbacks on to `base`.
+    """
+
+    base: Any
+    embedding: Any = None
+    max_tokens: int = MAX_CONTEXT_TOKENS
+    lambda_mult: float = 0.6
+    dedupe_threshold: float = 0.9
+
+    def dedupe(self, docs):
+        kept, kept_words = [], []
+        for doc in docs:
+            w = words(doc.page_content)
+            if any(w and len(w & k) / len(w) >= self.dedupe_threshold for k in kept_words):
+                continue
+            kept.append(doc)
+            kept_words.append(w)
+        return kept
+
+    def merge(self, docs):
+        """Group parsed entries by key in first-seen order; fragments stay as they are."""
+        units, groups = [], {}
+        for doc in docs:
+            key, value = parse_entry(doc)
+            if value is None:
+                units.append({"text": doc.page_content, "sources": [doc.metadata.get("source", "N/A")], "key": key})
+                continue
+            if key not in groups:
+                groups[key] = {"entries": [], "sources": [], "key": key}
+                units.append(groups[key])
+            groups[key]["entries"].append(value)
+            groups[key]["sources"].append(doc.metadata.get("source", "N/A"))
+        for unit in units:
+            if "entries" in unit:
+                unit["text"] = render_group(unit["key"], unit.pop("entries"))
+        return units
+
+    def similarities(self, query, units):
+        """(relevance per unit, unit x unit similarity)."""
+        if self.embedding is not None:
+            vectors = np.asarray(self.embedding.embed_documents([u["text"] for u in units]), dtype=np.float32)
+            vectors /= np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-12
+            q = np.asarray(self.embedding.embed_query(query), dtype=np.float32)
+            q /= np.linalg.norm(q) + 1e-12
+            return vectors @ q, vectors @ vectors.T
+        relevance = 1.0 / (1.0 + np.arange(len(units)))
+        sets = [words(u["text"]) for u in units]
+        sim = np.array([[len(a & b) / (len(a | b) or 1) for b in sets] for a in sets])
+        return relevance, sim
+
+    def mmr(self, query, units):
+        if len(units) < 2:
+            return units
+        relevance, sim = self.similarities(query, units)
+        chosen, left = [], list(range(len(units)))
+        while left:
+            redundancy = sim[np.ix_(left, chosen)].max(axis=1) if chosen else np.zeros(len(left))
+            score = self.lambda_mult * relevance[left] - (1 - self.lambda_mult) * redundancy
+            chosen.append(left.pop(int(np.argmax(score))))
+        return [units[i] for i in chosen]
+
+    def pack(self, units):
+        packed, used = [], 0
+        for unit in units:
+            tokens = count_tokens(unit["text"])
+            if used + tokens > self.max_tokens:
+                if packed:
+                    continue  # a smaller later block may still fit
+                unit = {**unit, "text": unit["text"][:self.max_tokens * 4]}
+                tokens = count_tokens(unit["text"])
+            packed.append(unit)
+            used += tokens
+        return packed, used
+
+    def _get_relevant_documents(self, query, *, run_manager=None):
+        callbacks = run_manager.get_child() if run_manager is not None else None
+        docs = self.base.invoke(query, config={"callbacks": callbacks})
+        unique = self.dedupe(docs)
+        units = self.mmr(query, self.merge(unique))
+        packed, used = self.pack(units)
+        if callbacks is not None:
+            dispatch_custom_event(STATS_EVENT, {
+                "retrieved": len(docs),
+                "after_dedupe": len(unique),
+                "blocks": len(packed),
+                "tokens_before": sum(count_tokens(d.page_content) for d in docs),
+                "tokens_after": used,
+            }, config={"callbacks": callbacks})
+        return [
+            Document(page_content=u["text"], metadata={"source": ", ".join(dict.fromkeys(u["sources"])), "key": u["key"]})
+            for u in packed
+        ]
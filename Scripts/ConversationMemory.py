@@ -0,0 +1,187 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List
+from pydantic import PrivateAttr
+from langchain.memory import ConversationBufferMemory
+from langchain_core.messages import SystemMessage, get_buffer_string
+
+from Chunking import count_tokens
+
+MAX_HISTORY_TOKENS = 1200
+WINDOW_TURNS = 3
+SUMMARY_WORKERS = 4
+
+# One pool for every memory in the process (one per Streamlit or server session)
+_summary_executor = None
+_summary_executor_lock = threading.Lock()
+
+def summary_executor():
+    global _summary_executor
+    with _summary_executor_lock:
+        if _summary_executor is None:
+            _summary_executor = ThreadPoolExecutor(max_workers=SUMMARY_WORKERS, thread_name_prefix="memory-summary")
+        return _summary_executor
+
+SUMMARY_PROMPT = """Progressively summarize a conversation between an investor and a mutual fund assistant.
+Keep every fund ticker, metric value, risk preference and time horizon the investor mentioned. Reply with the new summary only, under 150 words.
+
+Current summary:
+{summary}
+
+New lines of conversation:
+{lines}
+
+New summary:"""
+
+class BudgetedConversationMemory(ConversationBufferMemory):
+    """Chat memory whose history never exceeds `max_tokens`.
+
+    The last `window_turns` exchanges are kept verbatim. Older messages are
+    folded into a running summary by `llm` on a background thread shared by
+    all memories, one summary at a time per memory, so save_context never
+    waits for the summarizer; until a summary lands, the evicted messages
+    are still sent if they fit the budget. A failed summary is retried on
+    the next turn, and meanwhile unsummarized messages beyond the budget are
+    dropped. Without an `llm` old turns are simply dropped. `chat_memory`
+    only holds the window, which keeps chat-history rendering constant-size
+    too.
+    """
+
+    llm: Any = None
+    max_tokens: int = MAX_HISTORY_TOKENS
+    window_turns: int = WINDOW_TURNS
+    summary: str = ""
+    turn_tokens: List[int] = []
+
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+    _pending: list = PrivateAttr(default_factory=list)
+    _future: Any = PrivateAttr(default=None)
+    _scheduled: bool = PrivateAttr(default=False)
+    _generation: int = PrivateAttr(default=0)
+    _summary_stats: dict = PrivateAttr(default_factory=lambda: {
+        "calls": 0, "input_tokens": 0, "output_tokens": 0, "seconds": 0.0, "errors": 0})
+
+    def _messages(self):
+        """Summary, not-yet-summarized messages and the window, trimmed oldest-first to the token budget."""
+        with self._lock:
+            summary, pending = self.summary, list(self._pending)
+        window = list(self.chat_memory.messages)
+        costs = [count_tokens(m.content) for m in pending + window]
+        total = sum(costs)
+        summary_tokens = count_tokens(summary) if summary else 0
+        drop = 0
+        while drop < len(costs) and total + summary_tokens > self.max_tokens:
+            total -= costs[drop]
+            drop += 1
+        messages = (pending + window)[drop:]
+        if summary:
+            if summary_tokens > self.max_tokens - total:
+                # Hard cap even for an over-long summary: keep its head, ~4 chars per token
+                summary = summary[:max(0, self.max_tokens - total) * 4]
+            if summary:
+                messages.insert(0, SystemMessage(content=f"Summary of the earlier conversation: {summary}"))
+        return messages
+
+    def load_memory_variables(self, inputs):
+        messages = self._messages()
+        self.turn_tokens.append(sum(count_tokens(m.content) for m in messages))
+        if self.return_messages:
+            return {self.memory_key: messages}
+        return {self.memory_key: get_buffer_string(messages, human_prefix=self.human_prefix, ai_prefix=self.ai_prefix)}
+
+    def save_context(self, inputs, outputs):
+        super().save_context(inputs, outputs)
+        overflow = len(self.chat_memory.messages) - 2 * self.window_turns
+        if overflow > 0:
+            evicted = self.chat_memory.messages[:overflow]
+            self.chat_memory.messages = self.chat_memory.messages[overflow:]
+            if self.llm is not None:
+                with self._lock:
+                    self._pending.extend(evicted)
+        if self.llm is not None:
+            with self._lock:
+                if self._pending and not self._scheduled:
+                    self._schedule()
+
+    def _schedule(self):
+        """Queue a summary job; the caller holds the lock."""
+        self._scheduled = True
+        self._future = summary_executor().submit(self._summarize)
+
+    def _summarize(self):
+        """Fold every pending message into the summary (runs on the shared summary pool)."""
+        with self._lock:
+            batch = list(self._pending)
+            summary, generation = self.summary, self._generation
+            if not batch:  # cleared before this job started
+                self._scheduled = False
+                return
+        prompt = SUMMARY_PROMPT.format(
+            summary=summary or "(none)",
+            lines=get_buffer_string(batch, human_prefix=self.human_prefix, ai_prefix=self.ai_prefix),
+        )
+        start = time.perf_counter()
+        try:
+            new_summary = self.llm.invoke(prompt).content.strip()
+        except Exception:
+            with self._lock:
+                self._summary_stats["errors"] += 1
+                self._scheduled = False
+                # Retried on the next turn; until then keep only what still fits the budget
+                costs = [count_tokens(m.content) for m in self._pending]
+                total = sum(costs) + (count_tokens(self.summary) if self.summary else 0)
+                drop = 0
+                while drop < len(costs) and total > self.max_tokens:
+                    total -= costs[drop]
+                    drop += 1
+                del self._pending[:drop]
+            return
+        with self._lock:
+            self._scheduled = False
+            if generation == self._generation:  # otherwise cleared meanwhile: drop this summary
+                self.summary = new_summary
+                del self._pending[:len(batch)]
+            stats = self._summary_stats
+            stats["calls"] += 1
+            stats["input_tokens"] += count_tokens(prompt)
+            stats["output_tokens"] += count_tokens(new_summary)
+            stats["seconds"] += time.perf_counter() - start
+            if self._pending:
+                self._schedule()  # messages evicted while this summary ran
+
+    def wait(self):
+        """Block until queued summaries are written or have failed (for scripts and benchmarks)."""
+        while True:
+            with self._lock:
+                future = self._future
+            if future is None:
+                return
+            future.result()
+            with self._lock:
+                if self._future is future:
+                    return
+
+    def clear(self):
+        super().clear()
+        with self._lock:
+            self.summary = ""
+            self._pending.clear()
+            self._generation += 1
+        self.turn_tokens = []
+
+    def stats(self):
+        with self._lock:
+            summary_stats = dict(self._summary_stats)
+            pending = len(self._pending)
+        return {
+            "history_tokens_per_turn": list(self.turn_tokens),
+            "last_history_tokens": self.turn_tokens[-1] if self.turn_tokens else 0,
+            "summary_tokens": count_tokens(self.summary) if self.summary else 0,
+            "pending_messages": pending,
+            "summary_calls": summary_stats["calls"],
+            "summary_input_tokens": summary_stats["input_tokens"],
+            "summary_output_tokens": summary_stats["output_tokens"],
+            "summary_seconds": round(summary_stats["seconds"], 3),
+            "summary_errors": summary_stats["errors"],
+        }
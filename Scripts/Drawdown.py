@@ -0,0 +1,57 @@
+import argparse
+import json
+import pandas as pd
+from datetime import datetime, timedelta
+
+from PriceStore import PriceStore
+from DrawdownEngine import drawdown_matrix, rolling_drawdown
+from SortinoEngine import min_rows_per_year, periods
+from FundUniverse import FundUniverse, add_shard_argument, shard_path
+
+def display(value):
+    """JSON-friendly value: ISO dates, rounded floats, "N/A" when missing."""
+    if isinstance(value, pd.Timestamp):
+        return value.strftime("%Y-%m-%d")
+    if value is None or pd.isna(value):
+        return "N/A"
+    return round(float(value), 4)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Max drawdown, drawdown dates and underwater durations for the fund list.")
+    parser.add_argument("--offline", action="store_true",
+                        help="Use only prices already held in the local price store.")
+    parser.add_argument("--rolling", type=int, default=0, metavar="DAYS",
+                        help="Also write each fund's drawdown from its trailing DAYS-row high to drawdown_rolling.csv.")
+    add_shard_argument(parser)
+    args = parser.parse_args()
+
+    tickers = FundUniverse.load(shard=args.shard).tickers_by_profile()
+    end_date = datetime.today()
+    start_date = end_date - timedelta(days=365 * max(periods))
+    symbols = [symbol for symbol_list in tickers.values() for symbol in symbol_list]
+    store = PriceStore(offline=args.offline)
+    store.update(symbols, start_date, end_date)
+    prices = store.window(symbols, start_date, end_date)
+    drawdowns = drawdown_matrix(prices, periods=periods, min_rows_per_year=min_rows_per_year, end_date=end_date)
+
+    results = []
+    for category, symbol_list in tickers.items():
+        for symbol in symbol_list:
+            for yrs in periods:
+                row = drawdowns.loc[(symbol, yrs)]
+                results.append({
+                    "Category": category,
+                    "Ticker": symbol,
+                    "Years": yrs,
+                    **{column: display(row[column]) for column in drawdowns.columns},
+                })
+
+    print(json.dumps(results, indent=2))
+
+    with open(shard_path("drawdown.json", args.shard), "w") as f:
+        json.dump(results, f, indent=2)
+
+    if args.rolling:
+        rolling_path = shard_path("drawdown_rolling.csv", args.shard)
+        rolling_drawdown(prices, args.rolling).round(6).to_csv(rolling_path)
+        print(f"Rolling {args.rolling}-day drawdowns saved to '{rolling_path}'")
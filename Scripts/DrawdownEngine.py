@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+
+from SortinoEngine import TRADING_DAYS, window_starts, min_rows_per_year, periods
+
+def last_high_rows(filled, peak):
+    """For every row, the latest row at or before it where the close set the running high; -1 before any close."""
+    rows = filled.shape[0]
+    at_high = ~np.isnan(filled) & (filled >= peak)
+    return np.maximum.accumulate(np.where(at_high, np.arange(rows)[:, None], -1), axis=0)
+
+def drawdown_window(filled, dates):
+    """Drawdown statistics for a (rows x tickers) block of forward-filled closes.
+
+    The running high restarts at the first row of the block. Returns a dict
+    of per-ticker arrays: max drawdown (a negative fraction), peak, valley
+    and recovery rows (-1 when there is none; the peak row when the close
+    never fell), the current drawdown and the longest underwater spell in
+    calendar days.
+    """
+    rows, cols = filled.shape
+    col = np.arange(cols)
+    peak = np.fmax.accumulate(filled, axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        drawdown = filled / peak - 1
+    has_data = ~np.isnan(drawdown).all(axis=0)
+
+    valley = np.argmin(np.where(np.isnan(drawdown), np.inf, drawdown), axis=0)
+    max_dd = np.where(has_data, drawdown[valley, col], np.nan)
+    high_rows = last_high_rows(filled, peak)
+    peak_row = np.where(has_data, high_rows[valley, col], -1)
+
+    # Recovery: first close after the valley back at the pre-drawdown high
+    after = np.arange(rows)[:, None] > valley[None, :]
+    recovered = after & (filled >= peak[valley, col][None, :])
+    recovery_row = np.where(recovered.any(axis=0) & (max_dd < 0), recovered.argmax(axis=0), -1)
+    # Never below its high: not underwater, so it counts as recovered at the peak
+    recovery_row = np.where(max_dd == 0, peak_row, recovery_row)
+
+    # Underwater spell at each row: calendar days since the latest high
+    day = dates.to_numpy(dtype="datetime64[D]").astype(np.int64)
+    since_high = np.where(high_rows >= 0, day[:, None] - day[np.maximum(high_rows, 0)], 0)
+    current = drawdown[-1] if rows else np.full(cols, np.nan)
+    return {
+        "max_drawdown": max_dd,
+        "peak_row": peak_row,
+        "valley_row": np.where(has_data, valley, -1),
+        "recovery_row": recovery_row,
+        "current_drawdown": current,
+        "longest_underwater_days": np.where(has_data, since_high.max(axis=0), np.nan),
+    }
+
+def row_dates(dates, rows):
+    """Dates for an array of row numbers, NaT where the row is -1."""
+    values = dates.to_numpy()[np.maximum(rows, 0)]
+    return pd.DatetimeIndex(np.where(rows >= 0, values, np.datetime64("NaT")))
+
+def drawdown_matrix(prices, periods=periods, min_rows_per_year=min_rows_per_year, end_date=None):
+    """Max drawdown, its dates and underwater durations for every ticker and horizon.
+
+    `prices` is a dates x tickers frame of closes. Each horizon is one
+    running-max pass over the trailing window for all tickers together.
+    Returns a long frame indexed by (ticker, years) with columns
+    Max Drawdown (fraction, e.g. -0.34), Peak Date, Valley Date,
+    Recovery Date (NaT while still underwater, the Peak Date when the fund
+    never fell), Duration Days (peak to recovery, or to the last close when
+    not yet recovered; 0 when it never fell), Current Drawdown and Longest
+    Underwater Days. Windows with too few rows are NaN.
+    """
+    prices = prices.sort_index()
+    dates = prices.index
+    values = prices.to_numpy(dtype=float)
+    valid = ~np.isnan(values)
+    last_day = dates[-1] if len(dates) else None
+
+    starts = window_starts(dates, periods, end_date)
+    frames = []
+    for yrs, start in starts.items():
+        window = pd.DataFrame(values[start:], index=dates[start:]).ffill().to_numpy()
+        window_dates = dates[start:]
+        stats = drawdown_window(window, window_dates)
+        enough = valid[start:].sum(axis=0) >= min_rows_per_year[yrs]
+
+        peak = row_dates(window_dates, stats["peak_row"])
+        recovery = row_dates(window_dates, stats["recovery_row"])
+        duration = (recovery.fillna(last_day) - peak).days.to_numpy(dtype=float) if last_day is not None else np.nan
+        frame = pd.DataFrame({
+            "Max Drawdown": stats["max_drawdown"],
+            "Peak Date": peak,
+            "Valley Date": row_dates(window_dates, stats["valley_row"]),
+            "Recovery Date": recovery,
+            "Duration Days": duration,
+            "Current Drawdown": stats["current_drawdown"],
+            "Longest Underwater Days": stats["longest_underwater_days"],
+        }, index=pd.MultiIndex.from_product([prices.columns, [yrs]], names=["Ticker", "Years"]))
+        frame.loc[frame.index[~enough], :] = np.nan
+        frames.append(frame)
+    order = pd.MultiIndex.from_product([prices.columns, list(starts)], names=["Ticker", "Years"])
+    return pd.concat(frames).reindex(order)
+
+def rolling_drawdown(prices, window=TRADING_DAYS):
+    """Drawdown of every close from the highest close of the trailing `window` rows (dates x tickers)."""
+    filled = prices.sort_index().ffill()
+    high = filled.rolling(window, min_periods=1).max()
+    return filled / high - 1
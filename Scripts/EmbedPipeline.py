@@ -0,0 +1,134 @@
+import time
+import asyncio
+import random
+from itertools import islice
+from langchain_community.vectorstores import FAISS
+
+from Chunking import count_tokens
+
+def batched(iterable, size):
+    it = iter(iterable)
+    while True:
+        batch = list(islice(it, size))
+        if not batch:
+            return
+        yield batch
+
+def is_rate_limited(error):
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    return status == 429 or type(error).__name__ == "RateLimitError"
+
+def retry_after(error):
+    value = getattr(error, "retry_after", None)
+    if value is None:
+        headers = getattr(getattr(error, "response", None), "headers", None) or {}
+        value = headers.get("retry-after")
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+class TokenBudget:
+    """Async tokens-per-minute budget shared by all embedding requests.
+
+    `pause()` holds every caller back after a 429 so the endpoint gets a
+    quiet period instead of a retry storm.
+    """
+
+    def __init__(self, tokens_per_minute):
+        self.rate = tokens_per_minute / 60.0
+        self.capacity = tokens_per_minute
+        self.tokens = tokens_per_minute
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = asyncio.Lock()
+
+    async def acquire(self, n):
+        n = min(n, self.capacity)
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= n:
+                    self.tokens -= n
+                    return
+                await asyncio.sleep((n - self.tokens) / self.rate)
+
+    def pause(self, seconds):
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+async def embed_batch(embedder, texts, budget, max_retries=6):
+    await budget.acquire(sum(count_tokens(t) for t in texts))
+    for attempt in range(max_retries):
+        try:
+            return await embedder.aembed_documents(texts)
+        except Exception as e:
+            if attempt + 1 == max_retries:
+                raise
+            delay = retry_after(e) if is_rate_limited(e) else None
+            delay = delay if delay is not None else random.uniform(0, min(60.0, 2.0 * 2 ** attempt))
+            if is_rate_limited(e):
+                budget.pause(delay)
+            print(f"Embedding batch failed ({e}); retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+async def embed_into(vectorstore, items, embedding, batch_size=64, concurrency=4,
+                     tokens_per_minute=350_000, checkpoint=None, checkpoint_every=20):
+    """Embed (doc_id, Document) pairs concurrently and add them to `vectorstore` as they land.
+
+    `items` may be any iterable (including a generator); at most
+    `concurrency * 2` batches are held in memory. A FAISS store is created on
+    the first batch if `vectorstore` is None. `checkpoint(vectorstore)` is
+    called every `checkpoint_every` batches and once more at the end, also
+    when a batch ultimately fails, so a rerun resumes from what was saved.
+    Returns (vectorstore, embedded_count).
+    """
+    budget = TokenBudget(tokens_per_minute)
+    queue = asyncio.Queue(maxsize=concurrency * 2)
+    state = {"store": vectorstore, "done": 0, "batches": 0}
+
+    def add(batch, vectors):
+        ids = [i for i, _ in batch]
+        docs = [d for _, d in batch]
+        pairs = list(zip((d.page_content for d in docs), vectors))
+        metadatas = [d.metadata for d in docs]
+        if state["store"] is None:
+            state["store"] = FAISS.from_embeddings(pairs, embedding, metadatas=metadatas, ids=ids)
+        else:
+            state["store"].add_embeddings(pairs, metadatas=metadatas, ids=ids)
+        state["done"] += len(batch)
+        state["batches"] += 1
+        if checkpoint is not None and state["batches"] % checkpoint_every == 0:
+            checkpoint(state["store"])
+
+    async def producer():
+        for batch in batched(items, batch_size):
+            await queue.put(batch)
+        for _ in range(concurrency):
+            await queue.put(None)
+
+    async def worker():
+        while True:
+            batch = await queue.get()
+            if batch is None:
+                return
+            vectors = await embed_batch(embedding, [d.page_content for _, d in batch], budget)
+            add(batch, vectors)
+
+    tasks = [asyncio.create_task(producer())] + [asyncio.create_task(worker()) for _ in range(concurrency)]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        if checkpoint is not None and state["store"] is not None:
+            checkpoint(state["store"])
+    return state["store"], state["done"]
+
+def run_embed_into(vectorstore, items, embedding, **kwargs):
+    """Synchronous entry point for embed_into."""
+    return asyncio.run(embed_into(vectorstore, items, embedding, **kwargs))
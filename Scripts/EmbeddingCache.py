@@ -0,0 +1,148 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+EMBED_MODEL = "text-embedding-ada-002"
+EMBED_CACHE = os.getenv("EMBED_CACHE_PATH", ".cache/embeddings.sqlite")
+MAX_ENTRIES = 200_000
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that serves repeated texts from a local SQLite store.
+
+    Vectors are keyed by (model, sha256(text)) and stored as float32 blobs,
+    so index builds and queries share one cache. The store is trimmed to
+    `max_entries` by least-recent use; `hits`/`misses` count lookups.
+    """
+
+    def __init__(self, backend, model=EMBED_MODEL, path=EMBED_CACHE, max_entries=MAX_ENTRIES):
+        self.backend = backend
+        self.model = model
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " model TEXT NOT NULL, hash TEXT NOT NULL, vec BLOB NOT NULL, last_used REAL NOT NULL,"
+            " PRIMARY KEY (model, hash))"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS embeddings_lru ON embeddings (last_used)")
+        self.conn.commit()
+        # Counted once here and kept up to date by _store/_evict, not on every insert
+        (self.count,) = self.conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+
+    @staticmethod
+    def _hash(text):
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _lookup(self, hashes):
+        found = {}
+        unique = list(dict.fromkeys(hashes))
+        for i in range(0, len(unique), 500):
+            batch = unique[i:i + 500]
+            marks = ",".join("?" * len(batch))
+            rows = self.conn.execute(
+                f"SELECT hash, vec FROM embeddings WHERE model = ? AND hash IN ({marks})",
+                [self.model, *batch],
+            ).fetchall()
+            for h, blob in rows:
+                found[h] = np.frombuffer(blob, dtype=np.float32).tolist()
+        return found
+
+    def _store(self, items, now):
+        # Another thread may have stored the same text meanwhile; ignoring it keeps the count exact
+        cursor = self.conn.executemany(
+            "INSERT OR IGNORE INTO embeddings (model, hash, vec, last_used) VALUES (?, ?, ?, ?)",
+            [(self.model, h, np.asarray(v, dtype=np.float32).tobytes(), now) for h, v in items],
+        )
+        self.count += cursor.rowcount
+
+    def _touch(self, hashes, now):
+        self.conn.executemany(
+            "UPDATE embeddings SET last_used = ? WHERE model = ? AND hash = ?",
+            [(now, self.model, h) for h in set(hashes)],
+        )
+
+    def _evict(self):
+        if self.count > self.max_entries:
+            cursor = self.conn.execute(
+                "DELETE FROM embeddings WHERE rowid IN "
+                "(SELECT rowid FROM embeddings ORDER BY last_used LIMIT ?)",
+                (self.count - self.max_entries,),
+            )
+            self.count -= cursor.rowcount
+
+    def _embed(self, texts, compute):
+        hashes = [self._hash(t) for t in texts]
+        with self.lock:
+            found = self._lookup(hashes)
+        missing = {}
+        for h, t in zip(hashes, texts):
+            if h not in found:
+                missing.setdefault(h, t)
+        hit_count = sum(1 for h in hashes if h in found)
+
+        fresh = {}
+        if missing:
+            vectors = compute(list(missing.values()))
+            fresh = {
+                h: np.asarray(v, dtype=np.float32).tolist()
+                for h, v in zip(missing, vectors)
+            }
+
+        now = time.time()
+        with self.lock:
+            self.hits += hit_count
+            self.misses += len(hashes) - hit_count
+            self._touch([h for h in hashes if h in found], now)
+            if fresh:
+                self._store(fresh.items(), now)
+                self._evict()
+            self.conn.commit()
+        found.update(fresh)
+        return [found[h] for h in hashes]
+
+    def embed_documents(self, texts):
+        return self._embed(list(texts), self.backend.embed_documents)
+
+    def embed_query(self, text):
+        return self._embed([text], lambda ts: [self.backend.embed_query(ts[0])])[0]
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+def azure_embeddings():
+    from langchain_openai import AzureOpenAIEmbeddings
+    return AzureOpenAIEmbeddings(
+        model=EMBED_MODEL,
+        azure_endpoint=os.getenv("AZURE_API_BASE"),
+        api_key=os.getenv("AZURE_API_KEY"),
+        deployment=os.getenv("AZURE_EMBED_DEPLOYMENT"),
+        api_version=os.getenv("AZURE_EMBED_VERSION"),
+        chunk_size=1000,
+    )
+
+def cached_embeddings(path=EMBED_CACHE, max_entries=MAX_ENTRIES):
+    """The project's embedder behind the persistent cache.
+
+    Set EMBEDDINGS_BACKEND=local to use the deterministic HashEmbeddings
+    stand-in instead of Azure (no network, separate cache namespace).
+    """
+    if os.getenv("EMBEDDINGS_BACKEND") == "local":
+        from Fakes import HashEmbeddings
+        return CachedEmbeddings(HashEmbeddings(), model="local-hash", path=path, max_entries=max_entries)
+    return CachedEmbeddings(azure_embeddings(), model=EMBED_MODEL, path=path, max_entries=max_entries)
@@ -0,0 +1,136 @@
+"""Deterministic local stand-ins for the Azure models, for offline runs and tests."""
+import re
+import time
+import random
+import asyncio
+import hashlib
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel, generate_from_stream
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+class HashEmbeddings(Embeddings):
+    """Feature-hashing bag-of-words embedder.
+
+    Same text always gives the same unit vector, and texts sharing words
+    land close together, which is enough for retrieval and cache tests.
+    """
+
+    def __init__(self, dim=256):
+        self.dim = dim
+
+    def _embed(self, text):
+        vec = np.zeros(self.dim, dtype=np.float32)
+        for token in TOKEN_RE.findall(text.lower()):
+            digest = hashlib.md5(token.encode("utf-8")).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dim
+            vec[bucket] += 1.0 if digest[4] & 1 else -1.0
+        norm = np.linalg.norm(vec)
+        if norm:
+            vec /= norm
+        return vec.tolist()
+
+    def embed_documents(self, texts):
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+class RateLimited(Exception):
+    """Shape of an HTTP 429 from the embedding endpoint."""
+
+    status_code = 429
+
+    def __init__(self, retry_after=None):
+        super().__init__("429 Too Many Requests")
+        self.retry_after = retry_after
+
+class FlakyEmbeddings(Embeddings):
+    """Stands in for a throttling embedding server.
+
+    Every call waits `latency` seconds and fails with RateLimited with
+    probability `rate_limit_p` (seeded, so runs are reproducible). Vectors
+    come from `backend`, HashEmbeddings by default.
+    """
+
+    def __init__(self, backend=None, latency=0.05, rate_limit_p=0.2, retry_after=0.05, seed=0):
+        self.backend = backend or HashEmbeddings()
+        self.latency = latency
+        self.rate_limit_p = rate_limit_p
+        self.retry_after = retry_after
+        self.rng = random.Random(seed)
+        self.calls = 0
+        self.rejected = 0
+
+    def _maybe_reject(self):
+        self.calls += 1
+        if self.rng.random() < self.rate_limit_p:
+            self.rejected += 1
+            raise RateLimited(self.retry_after)
+
+    def embed_documents(self, texts):
+        time.sleep(self.latency)
+        self._maybe_reject()
+        return self.backend.embed_documents(texts)
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(self, texts):
+        await asyncio.sleep(self.latency)
+        self._maybe_reject()
+        return self.backend.embed_documents(texts)
+
+    async def aembed_query(self, text):
+        return (await self.aembed_documents([text]))[0]
+
+class StubChatModel(BaseChatModel):
+    """Offline chat model with a fixed `latency` per call.
+
+    Condense prompts get the follow-up question back unchanged; anything
+    else gets an Answer/Explanation reply derived from the prompt, so the
+    same prompt always gives the same text. With `streaming` the reply is
+    emitted word by word, `token_delay` seconds apart, after `latency`.
+    """
+
+    latency: float = 0.5
+    token_delay: float = 0.02
+    streaming: bool = False
+    calls: int = 0
+
+    @property
+    def _llm_type(self):
+        return "stub-chat"
+
+    def reply(self, prompt):
+        if "Standalone question:" in prompt:
+            m = re.search(r"Follow Up Input:\s*(.*)", prompt)
+            return m.group(1).strip() if m else prompt.strip()
+        lines = [l.strip() for l in prompt.splitlines() if l.strip()]
+        question = next((l for l in reversed(lines) if l.endswith("?")), lines[-1] if lines else "")
+        digest = hashlib.md5(prompt.encode("utf-8")).hexdigest()[:8]
+        return (
+            f"Answer: Stub answer to \"{question}\" ({digest}).\n"
+            f"Explanation: Generated offline from a {len(prompt)}-character prompt."
+        )
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        if self.streaming:
+            return generate_from_stream(self._stream(messages, stop, run_manager, **kwargs))
+        time.sleep(self.latency)
+        self.calls += 1
+        text = self.reply(messages[-1].content)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(self.latency)
+        self.calls += 1
+        for token in re.findall(r"\S+\s*", self.reply(messages[-1].content)):
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+            time.sleep(self.token_delay)
@@ -0,0 +1,149 @@
+import os
+import json
+import zlib
+import argparse
+
+from JsonStream import iter_json_items
+
+UNIVERSE_JSON = "Data/fund_universe.json"
+METADATA_JSON = "Data/fund_metadata.json"
+RISK_PROFILES = ["Conservative", "Moderate", "Aggressive"]
+
+def risk_profile_for(category):
+    """Map a Morningstar category onto the Conservative/Moderate/Aggressive buckets."""
+    c = (category or "").lower()
+    if any(w in c for w in ("sector", "small", "foreign", "emerging", "technology", "growth")):
+        return "Aggressive"
+    if "bond" in c or "conservative" in c or "income" in c:
+        return "Conservative"
+    if c:
+        return "Moderate"
+    return None
+
+# --- Sharding ---
+def parse_shard(text):
+    """argparse type for "i/N" (0-based shard i of N)."""
+    try:
+        index, count = (int(part) for part in text.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected i/N, got '{text}'")
+    if count < 1 or not 0 <= index < count:
+        raise argparse.ArgumentTypeError(f"shard index must be in 0..N-1, got '{text}'")
+    return index, count
+
+def add_shard_argument(parser):
+    parser.add_argument("--shard", type=parse_shard, default=None, metavar="i/N",
+                        help="Only process shard i of N of the fund universe (0-based).")
+
+def in_shard(ticker, shard):
+    """Stable assignment by ticker hash, so adding funds does not reshuffle the others."""
+    if shard is None:
+        return True
+    index, count = shard
+    return zlib.crc32(ticker.encode("utf-8")) % count == index
+
+def shard_path(path, shard):
+    """'sortino.json' -> 'sortino.shard-1-of-4.json' when sharded."""
+    if shard is None:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.shard-{shard[0]}-of-{shard[1]}{ext}"
+
+# --- Registry ---
+def iter_funds(path=UNIVERSE_JSON, shard=None):
+    """Stream {"ticker", "name", "category", "risk_profile"} records, one decoded at a time."""
+    for ticker, entry in iter_json_items(path):
+        if in_shard(ticker, shard):
+            yield {"ticker": ticker, **entry}
+
+class FundUniverse:
+    """The fund list every scraper, calculator and the indexer iterates over.
+
+    Backed by Data/fund_universe.json ({ticker: {name, category,
+    risk_profile}}), kept in file order and indexed by ticker, category and
+    risk profile.
+    """
+
+    def __init__(self, funds):
+        self.funds = list(funds)
+        self.by_ticker = {f["ticker"]: f for f in self.funds}
+        self.by_category, self.by_profile = {}, {}
+        for fund in self.funds:
+            self.by_category.setdefault(fund.get("category"), []).append(fund["ticker"])
+            self.by_profile.setdefault(fund.get("risk_profile"), []).append(fund["ticker"])
+
+    @classmethod
+    def load(cls, path=UNIVERSE_JSON, shard=None):
+        return cls(iter_funds(path, shard))
+
+    def __iter__(self):
+        return iter(self.funds)
+
+    def __len__(self):
+        return len(self.funds)
+
+    def __contains__(self, ticker):
+        return ticker in self.by_ticker
+
+    def get(self, ticker):
+        return self.by_ticker.get(ticker)
+
+    def tickers(self):
+        return [f["ticker"] for f in self.funds]
+
+    def tickers_by_profile(self):
+        """{risk_profile: [ticker, ...]} in universe order (the old hard-coded `tickers` shape)."""
+        return dict(self.by_profile)
+
+    def names_by_profile(self):
+        """{risk_profile: {ticker: name}} (the old hard-coded `funds` shape)."""
+        out = {}
+        for fund in self.funds:
+            out.setdefault(fund.get("risk_profile"), {})[fund["ticker"]] = fund.get("name", fund["ticker"])
+        return out
+
+    def risk_profiles(self):
+        return {f["ticker"]: f.get("risk_profile") for f in self.funds}
+
+    def shard(self, shard):
+        return FundUniverse(f for f in self.funds if in_shard(f["ticker"], shard))
+
+    def save(self, path=UNIVERSE_JSON):
+        entries = {f["ticker"]: {k: v for k, v in f.items() if k != "ticker"} for f in self.funds}
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entries, f, indent=2)
+            f.write("\n")
+        os.replace(tmp, path)
+
+def add_from_metadata(universe, metadata_path=METADATA_JSON):
+    """The universe plus any metadata fund it lacks, profiled by category; returns (universe, added)."""
+    funds = list(universe)
+    added = 0
+    for ticker, meta in iter_json_items(metadata_path):
+        if ticker in universe:
+            continue
+        funds.append({
+            "ticker": ticker,
+            "name": meta.get("name", ticker),
+            "category": meta.get("category"),
+            "risk_profile": risk_profile_for(meta.get("category")),
+        })
+        added += 1
+    return FundUniverse(funds), added
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="List or extend the fund universe.")
+    parser.add_argument("action", choices=["list", "add-from-metadata"])
+    parser.add_argument("--universe", default=UNIVERSE_JSON)
+    parser.add_argument("--metadata", default=METADATA_JSON)
+    add_shard_argument(parser)
+    args = parser.parse_args()
+
+    if args.action == "list":
+        for fund in iter_funds(args.universe, args.shard):
+            print(fund["ticker"])
+    else:
+        universe, added = add_from_metadata(FundUniverse.load(args.universe), args.metadata)
+        universe.save(args.universe)
+        print(f"Added {added} funds; the universe now holds {len(universe)}.")
@@ -0,0 +1,195 @@
+import re
+import math
+import time
+import numpy as np
+from typing import Any, List, Optional
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.callbacks.manager import dispatch_custom_event
+from langchain_community.vectorstores.utils import DistanceStrategy
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+TICKER_RE = re.compile(r"\b[A-Z]{2,6}\b")
+STATS_EVENT = "hybrid_retriever_stats"
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+class BM25:
+    """Okapi BM25 over a fixed list of texts, with postings stored as NumPy arrays."""
+
+    def __init__(self, texts, k1=1.5, b=0.75):
+        self.k1, self.b = k1, b
+        self.n = len(texts)
+        postings = {}
+        lengths = np.zeros(self.n, dtype=np.float32)
+        for i, text in enumerate(texts):
+            tokens = tokenize(text)
+            lengths[i] = len(tokens)
+            counts = {}
+            for t in tokens:
+                counts[t] = counts.get(t, 0) + 1
+            for t, c in counts.items():
+                postings.setdefault(t, ([], []))
+                postings[t][0].append(i)
+                postings[t][1].append(c)
+        avg = float(lengths.mean()) if self.n else 0.0
+        self.norm = k1 * (1 - b + b * lengths / avg) if avg else np.full(self.n, k1, dtype=np.float32)
+        self.postings = {
+            t: (np.array(rows, dtype=np.int64), np.array(tfs, dtype=np.float32))
+            for t, (rows, tfs) in postings.items()
+        }
+        self.idf = {
+            t: math.log(1 + (self.n - len(rows) + 0.5) / (len(rows) + 0.5))
+            for t, (rows, _) in self.postings.items()
+        }
+
+    def scores(self, query):
+        """BM25 score of every text for `query` (zeros where no term matches)."""
+        out = np.zeros(self.n, dtype=np.float32)
+        for t in set(tokenize(query)):
+            if t not in self.postings:
+                continue
+            rows, tf = self.postings[t]
+            out[rows] += self.idf[t] * tf * (self.k1 + 1) / (tf + self.norm[rows])
+        return out
+
+class HybridIndex:
+    """Metadata inverted index plus BM25 over the chunks of a loaded FAISS store.
+
+    Built once at load time. Rows are FAISS positions, so candidate vectors
+    can be pulled straight out of the index with reconstruct.
+    """
+
+    def __init__(self, vectorstore):
+        self.vectorstore = vectorstore
+        self.doc_ids = [vectorstore.index_to_docstore_id[i] for i in range(vectorstore.index.ntotal)]
+        self.docs = [vectorstore.docstore.search(i) for i in self.doc_ids]
+        self.by_key, self.by_source = {}, {}
+        phrases = set()
+        for row, doc in enumerate(self.docs):
+            key = doc.metadata.get("key")
+            if key:
+                key = str(key)
+                self.by_key.setdefault(key.lower(), []).append(row)
+                # Upper-case keys are tickers; anything else (metric or term names) is matched as a phrase
+                if not key.isupper():
+                    phrases.add(key.lower())
+            source = doc.metadata.get("source")
+            if source:
+                self.by_source.setdefault(source, []).append(row)
+        self.by_key = {k: np.array(v, dtype=np.int64) for k, v in self.by_key.items()}
+        self.by_source = {k: np.array(v, dtype=np.int64) for k, v in self.by_source.items()}
+        phrases = sorted(phrases, key=len, reverse=True)
+        self.phrase_re = re.compile(r"\b(" + "|".join(re.escape(p) for p in phrases) + r")\b") if phrases else None
+        self.bm25 = BM25([d.page_content for d in self.docs])
+
+    def entities(self, query):
+        """(tickers, phrases) from the query that exist as metadata keys. Tickers must be written in capitals."""
+        tickers = [t for t in dict.fromkeys(TICKER_RE.findall(query)) if t.lower() in self.by_key]
+        phrases = list(dict.fromkeys(self.phrase_re.findall(query.lower()))) if self.phrase_re else []
+        return tickers, phrases
+
+    def candidates(self, query, sources=None):
+        """Rows whose key is named in the query, optionally limited to some sources; None if nothing matched."""
+        tickers, phrases = self.entities(query)
+        rows = [self.by_key[k.lower()] for k in tickers + phrases]
+        if not rows:
+            return None
+        rows = np.unique(np.concatenate(rows))
+        if sources:
+            rows = rows[self.source_mask(sources)[rows]]
+        return rows if len(rows) else None
+
+    def source_mask(self, sources):
+        mask = np.zeros(len(self.docs), dtype=bool)
+        for s in sources:
+            mask[self.by_source.get(s, np.empty(0, dtype=np.int64))] = True
+        return mask
+
+    def _query(self, query_vector):
+        q = np.asarray(query_vector, dtype=np.float32)
+        if self.vectorstore._normalize_L2:
+            q = q / (np.linalg.norm(q) or 1.0)
+        return q
+
+    def vector_scores(self, query_vector, rows):
+        """Similarity (higher is better) between the query and the given rows' stored vectors."""
+        vectors = self.vectorstore.index.reconstruct_batch(rows)
+        q = self._query(query_vector)
+        if self.vectorstore.distance_strategy == DistanceStrategy.MAX_INNER_PRODUCT:
+            return vectors @ q
+        return -np.square(vectors - q).sum(axis=1)
+
+    def vector_search(self, query_vector, k):
+        """Global FAISS search returning rows, best first."""
+        k = min(k, len(self.docs))
+        _, rows = self.vectorstore.index.search(self._query(query_vector)[None, :], k)
+        return rows[0][rows[0] >= 0]
+
+def rrf(rankings, weights, k=60):
+    """Reciprocal rank fusion of several row rankings into {row: score}."""
+    fused = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, row in enumerate(ranking):
+            fused[row] = fused.get(row, 0.0) + weight / (k + rank + 1)
+    return fused
+
+class HybridRetriever(BaseRetriever):
+    """Drop-in for `vectorstore.as_retriever()` that uses tickers and metric names in the query.
+
+    When the query names tickers or defined terms, vector and BM25 scoring run
+    only over the chunks tagged with those keys; otherwise (or when that
+    leaves fewer than k chunks) the global FAISS search fills in. The two
+    rankings are merged with reciprocal rank fusion. Each call reports its
+    candidate count and time to the caller's callbacks as the custom event
+    STATS_EVENT; the retriever itself keeps no per-call state, so one
+    instance can serve every session.
+    """
+
+    index: Any
+    k: int = 4
+    fetch_k: int = 20
+    vector_weight: float = 1.0
+    bm25_weight: float = 1.0
+    sources: Optional[List[str]] = None
+
+    @classmethod
+    def from_vectorstore(cls, vectorstore, **kwargs):
+        return cls(index=HybridIndex(vectorstore), **kwargs)
+
+    def _rank(self, query, query_vector, rows):
+        index = self.index
+        if rows is not None:
+            vector = rows[np.argsort(-index.vector_scores(query_vector, rows), kind="stable")][:self.fetch_k]
+            bm25 = index.bm25.scores(query)[rows]
+            order = np.argsort(-bm25, kind="stable")[:self.fetch_k]
+            keyword = rows[order[bm25[order] > 0]]
+        else:
+            mask = index.source_mask(self.sources) if self.sources else None
+            vector = index.vector_search(query_vector, self.fetch_k * (4 if mask is not None else 1))
+            if mask is not None:
+                vector = vector[mask[vector]]
+            vector = vector[:self.fetch_k]
+            bm25 = index.bm25.scores(query)
+            if mask is not None:
+                bm25 = np.where(mask, bm25, 0)
+            keyword = np.argsort(-bm25, kind="stable")[:self.fetch_k]
+            keyword = keyword[bm25[keyword] > 0]
+        fused = rrf([vector.tolist(), keyword.tolist()], [self.vector_weight, self.bm25_weight])
+        return sorted(fused, key=fused.get, reverse=True)
+
+    def _get_relevant_documents(self, query, *, run_manager=None):
+        start = time.perf_counter()
+        rows = self.index.candidates(query, self.sources)
+        query_vector = self.index.vectorstore._embed_query(query)
+        ranked = self._rank(query, query_vector, rows)[:self.k]
+        if rows is not None and len(ranked) < self.k:
+            # Too few tagged chunks: top up from the global search
+            seen = set(ranked)
+            ranked += [r for r in self._rank(query, query_vector, None) if r not in seen][:self.k - len(ranked)]
+        if run_manager is not None:
+            dispatch_custom_event(STATS_EVENT, {
+                "candidates": None if rows is None else int(len(rows)),
+                "seconds": time.perf_counter() - start,
+            }, config={"callbacks": run_manager.get_child()})
+        return [self.index.docs[r] for r in ranked]
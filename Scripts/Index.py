@@ -1,20 +1,21 @@
 import os
 import json
 import time
+import hashlib
+import argparse
 from tqdm import tqdm
 from dotenv import load_dotenv
 from langchain_core.documents import Document
 from langchain_community.vectorstores import FAISS
-from langchain_openai import AzureOpenAIEmbeddings
 
-# --- Robust NLTK sentence tokenizer setup ---
-import nltk
-# Ensure nltk downloads go to a user-writable path (fixes some Windows issues)
-NLTK_PATH = os.path.expanduser(r'C:\Users\krock\nltk_data')
-if NLTK_PATH not in nltk.data.path:
-    nltk.data.path.append(NLTK_PATH)
-nltk.download('punkt', download_dir=NLTK_PATH, quiet=True)
-nltk.download('punkt_tab', download_dir=NLTK_PATH, quiet=True)
+from EmbeddingCache import EMBED_MODEL, cached_embeddings
+from EmbedPipeline import run_embed_into
+from JsonStream import iter_json_items
+from Chunking import chunk_text
+from FundUniverse import FundUniverse
+
+# Files keyed by ticker; with a fund universe only its funds are indexed from them
+FUND_FILES = {"fund_risk_metrics.json", "fund_metadata.json"}
 
 def clean_text(text):
     """Remove problematic characters, collapse whitespace, etc."""
@@ -22,78 +23,171 @@ def clean_text(text):
     text = re.sub(r'\s+', ' ', text)
     return text.strip()
 
-def chunk_text(text, max_chunk=800):
-    """Chunk text using NLTK's sentence tokenizer."""
-    from nltk.tokenize import sent_tokenize
-    sentences = sent_tokenize(text)
-    chunks, cur = [], ""
-    for s in sentences:
-        if len(cur) + len(s) < max_chunk:
-            cur += " " + s
-        else:
-            chunks.append(cur.strip())
-            cur = s
-    if cur:
-        chunks.append(cur.strip())
-    return chunks
+# --- Document loading ---
+def iter_documents(file_paths, stats=None, funds=None):
+    """Yield Documents from JSON/JSONL data files one entry at a time.
 
-# --- Main Logic ---
-load_dotenv()
+    Files are parsed incrementally, so neither the corpus nor its
+    pretty-printed form is ever held in memory at once. Unreadable files are
+    counted in stats["skipped"] when a dict is passed in. With `funds` (a
+    set of tickers), entries of ticker-keyed files outside it are left out.
+    """
+    for path in tqdm(file_paths):
+        is_metrics = "risk_metrics" in path or "fund_risk_metrics" in path.lower()
+        is_fund_file = os.path.basename(path) in FUND_FILES
+        try:
+            for key, content in iter_json_items(path):
+                if funds is not None and is_fund_file and key not in funds:
+                    continue
+                if key is not None:
+                    # Only chunk narrative docs, not fund metrics
+                    if is_metrics:
+                        doc_text = clean_text(f"Fund: {key}\nRisk Metrics:\n{json.dumps(content, indent=2)}")
+                        yield Document(page_content=doc_text, metadata={"source": os.path.basename(path), "key": key})
+                    else:
+                        doc_text = clean_text(f"{key}\n{json.dumps(content, indent=2)}")
+                        for chunk in chunk_text(doc_text):
+                            yield Document(page_content=chunk, metadata={"source": os.path.basename(path), "key": key})
+                else:
+                    doc_text = clean_text(json.dumps(content, indent=2))
+                    for chunk in chunk_text(doc_text):
+                        yield Document(page_content=chunk, metadata={"source": os.path.basename(path)})
+        except Exception as e:
+            print(f"Error loading {path}: {e}")
+            if stats is not None:
+                stats["skipped"] = stats.get("skipped", 0) + 1
+
+class DocumentSource:
+    """Re-iterable view over the data files; each pass streams them from disk again."""
+
+    def __init__(self, file_paths, funds=None):
+        self.file_paths = file_paths
+        self.funds = funds
+        self.stats = {"skipped": 0}
 
-file_paths = [
-    "Data/fund_risk_metrics.json",
-    "Data/fund_metadata.json",
-    "Data/Definitions.json"
-]
+    def __iter__(self):
+        self.stats = {"skipped": 0}
+        return iter_documents(self.file_paths, self.stats, self.funds)
 
-docs = []
-skipped = 0
+# --- Incremental indexing ---
+INDEX_DIR = "faiss_index_fund_data"
+MANIFEST_NAME = "manifest.json"
 
-print("Loading and processing files...")
-for path in tqdm(file_paths):
+def doc_id(doc):
+    """Content hash identifying a chunk (and its vector) across builds."""
+    h = hashlib.sha256()
+    h.update(doc.metadata.get("source", "").encode("utf-8"))
+    h.update(b"\0")
+    h.update(str(doc.metadata.get("key", "")).encode("utf-8"))
+    h.update(b"\0")
+    h.update(doc.page_content.encode("utf-8"))
+    return h.hexdigest()
+
+def load_manifest(index_dir):
+    path = os.path.join(index_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return None
     with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def save_manifest(index_dir, model, chunks):
+    path = os.path.join(index_dir, MANIFEST_NAME)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"model": model, "chunks": chunks}, f, indent=2, sort_keys=True)
+
+def update_index(docs, embedding, index_dir=INDEX_DIR, model=EMBED_MODEL, full=False,
+                 batch_size=64, concurrency=4, tokens_per_minute=350_000):
+    """Bring the FAISS index in `index_dir` in line with `docs`, embedding only new chunks.
+
+    `docs` is iterated twice (a list, or a DocumentSource that re-streams the
+    files), and only chunk ids plus their source/key are kept between passes.
+
+    Chunks are identified by doc_id(); the manifest next to the index records
+    which ids it holds. Stale ids are deleted, new ones embedded in concurrent
+    batches and added as they arrive. Index and manifest are checkpointed
+    together while embedding, so an interrupted build resumes where it
+    stopped. Falls back to a full build when there is no usable manifest or
+    the embedding model changed. Returns (added, removed, vectorstore).
+    """
+    # Pass 1: ids only, so the corpus itself is never held in memory
+    chunks = {}
+    for doc in docs:
+        chunks.setdefault(doc_id(doc), {"source": doc.metadata.get("source"), "key": doc.metadata.get("key")})
+
+    manifest = None if full else load_manifest(index_dir)
+    vectorstore = None
+    if manifest is not None and manifest.get("model") == model:
         try:
-            data = json.load(f)
+            vectorstore = FAISS.load_local(index_dir, embedding, allow_dangerous_deserialization=True)
         except Exception as e:
-            print(f"Error loading {path}: {e}")
-            skipped += 1
-            continue
-
-    if isinstance(data, dict):
-        for key, content in data.items():
-            # Only chunk narrative docs, not fund metrics
-            if "risk_metrics" in path or "fund_risk_metrics" in path.lower():
-                doc_text = clean_text(f"Fund: {key}\nRisk Metrics:\n{json.dumps(content, indent=2)}")
-                docs.append(Document(page_content=doc_text, metadata={"source": os.path.basename(path), "key": key}))
-            else:
-                doc_text = clean_text(f"{key}\n{json.dumps(content, indent=2)}")
-                for chunk in chunk_text(doc_text):
-                    docs.append(Document(page_content=chunk, metadata={"source": os.path.basename(path), "key": key}))
-    elif isinstance(data, list):
-        for entry in data:
-            doc_text = clean_text(json.dumps(entry, indent=2))
-            for chunk in chunk_text(doc_text):
-                docs.append(Document(page_content=chunk, metadata={"source": os.path.basename(path)}))
+            print(f"Could not load existing index ({e}); rebuilding.")
+        if vectorstore is not None and set(vectorstore.index_to_docstore_id.values()) != set(manifest["chunks"]):
+            print("Index and manifest disagree; rebuilding.")
+            vectorstore = None
+
+    held = set(manifest["chunks"]) if vectorstore is not None else set()
+    stale = [i for i in held if i not in chunks]
+    new = {i for i in chunks if i not in held}
+    if stale:
+        vectorstore.delete(stale)
+
+    def checkpoint(store):
+        store.save_local(index_dir)
+        save_manifest(index_dir, model, {i: chunks[i] for i in store.index_to_docstore_id.values()})
+
+    def new_docs():
+        # Pass 2: stream the sources again, yielding each new chunk once
+        for doc in docs:
+            i = doc_id(doc)
+            if i in new:
+                new.discard(i)
+                yield i, doc
+
+    added = len(new)
+    if new:
+        vectorstore, _ = run_embed_into(
+            vectorstore, new_docs(), embedding,
+            batch_size=batch_size, concurrency=concurrency,
+            tokens_per_minute=tokens_per_minute, checkpoint=checkpoint,
+        )
+    elif vectorstore is not None:
+        checkpoint(vectorstore)
+    return added, len(stale), vectorstore
+
+# --- Main Logic ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or update the FAISS index over the fund data.")
+    parser.add_argument("--full", action="store_true", help="Ignore the manifest and re-embed everything.")
+    parser.add_argument("--batch-size", type=int, default=64, help="Chunks per embedding request.")
+    parser.add_argument("--concurrency", type=int, default=4, help="Embedding requests in flight.")
+    parser.add_argument("--tpm", type=int, default=350_000, help="Tokens-per-minute budget for the embedding endpoint.")
+    args = parser.parse_args()
+
+    load_dotenv()
+
+    file_paths = [
+        "Data/fund_risk_metrics.json",
+        "Data/fund_metadata.json",
+        "Data/Definitions.json"
+    ]
+
+    docs = DocumentSource(file_paths, funds=set(FundUniverse.load().tickers()))
+
+    # --- Embedding and Indexing ---
+    embedding = cached_embeddings()
+
+    print("Loading, processing and indexing files...")
+    t0 = time.time()
+    added, removed, vectorstore = update_index(
+        docs, embedding, INDEX_DIR, model=embedding.model, full=args.full,
+        batch_size=args.batch_size, concurrency=args.concurrency, tokens_per_minute=args.tpm,
+    )
+    t1 = time.time()
+
+    if vectorstore is None:
+        print(f"No documents found in {len(file_paths)} files (skipped {docs.stats['skipped']} files); nothing was indexed.")
     else:
-        print(f"Skipped: {path} (unsupported structure)")
-        skipped += 1
-
-
-# --- Embedding and Indexing ---
-embedding = AzureOpenAIEmbeddings(
-    model="text-embedding-ada-002",
-    deployment=os.getenv("AZURE_EMBED_DEPLOYMENT"),
-    openai_api_key=os.getenv("AZURE_API_KEY"),
-    azure_endpoint=os.getenv("AZURE_API_BASE"),
-    openai_api_type="azure",
-    openai_api_version=os.getenv("AZURE_EMBED_VERSION"),
-)
-
-print(f"Creating FAISS index for {len(docs)} documents...")
-t0 = time.time()
-vectorstore = FAISS.from_documents(docs, embedding)
-vectorstore.save_local("faiss_index_fund_data")
-t1 = time.time()
-
-print(f"Indexed {len(docs)} documents across {len(file_paths)} files (skipped {skipped} files).")
-print(f"FAISS index saved to 'faiss_index_fund_data'. Took {t1-t0:.1f} seconds.")
+        print(f"Indexed {vectorstore.index.ntotal} documents across {len(file_paths)} files (skipped {docs.stats['skipped']} files).")
+        print(f"Embedded {added} new chunks, removed {removed} stale chunks.")
+        print(f"FAISS index saved to '{INDEX_DIR}'. Took {t1-t0:.1f} seconds.")
+    print(f"Embedding cache: {embedding.stats()}")
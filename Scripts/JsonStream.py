@@ -0,0 +1,105 @@
+import json
+
+_WHITESPACE = " \t\r\n"
+_NUMBER_TAIL = ".eE+-0123456789"
+_decoder = json.JSONDecoder()
+
+class _Reader:
+    """Buffered reader that decodes one JSON value at a time from a text file."""
+
+    def __init__(self, f, chunk_size):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.read_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        data = self.f.read(self.read_size)
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+        if not data:
+            self.eof = True
+        return bool(data)
+
+    def peek(self):
+        """Next non-whitespace character without consuming it ('' at end of file)."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} but found {found!r}")
+        self.pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                obj, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                # Value runs past the buffer; read more (doubling, so a big
+                # value costs O(n) re-parses in total, not O(n^2)).
+                if not self._fill():
+                    raise
+                self.read_size *= 2
+                continue
+            # A number touching the buffer edge may be cut short ("12" of "12.5e3").
+            if (isinstance(obj, (int, float)) and not isinstance(obj, bool) and not self.eof
+                    and (end == len(self.buf) or self.buf[end] in _NUMBER_TAIL)
+                    and self._fill()):
+                continue
+            self.pos = end
+            self.read_size = self.chunk_size
+            return obj
+
+def iter_json_items(path, chunk_size=1 << 16):
+    """Yield (key, value) for each top-level entry of a JSON or JSONL file.
+
+    Objects yield their members, arrays and JSONL files yield (None, item),
+    and any other top-level value is yielded once as (None, value). Only one
+    entry is decoded and held at a time.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield None, json.loads(line)
+            return
+
+        reader = _Reader(f, chunk_size)
+        first = reader.peek()
+        if first == "{":
+            reader.expect("{")
+            if reader.peek() == "}":
+                return
+            while True:
+                key = reader.value()
+                reader.expect(":")
+                yield key, reader.value()
+                if reader.peek() == ",":
+                    reader.expect(",")
+                    continue
+                reader.expect("}")
+                return
+        elif first == "[":
+            reader.expect("[")
+            if reader.peek() == "]":
+                return
+            while True:
+                yield None, reader.value()
+                if reader.peek() == ",":
+                    reader.expect(",")
+                    continue
+                reader.expect("]")
+                return
+        elif first:
+            yield None, reader.value()
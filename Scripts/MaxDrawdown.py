@@ -1,5 +1,8 @@
-import time
+import argparse
+import numpy as np
 import pandas as pd
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
@@ -7,24 +10,11 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
 
-funds = {
-    "Conservative": {
-        "VWELX": "Vanguard Wellington Fund",
-        "AGG": "iShares Core U.S. Aggregate Bond ETF",
-        "VBTLX": "Vanguard Total Bond Market Index Fund"
-    },
-    "Moderate": {
-        "VFIAX": "Vanguard 500 Index Fund Admiral Shares",
-        "VTMFX": "Vanguard Tax-Managed Balanced Fund",
-        "PRBLX": "Parnassus Core Equity Fund"
-    },
-    "Aggressive": {
-        "FSPTX": "Fidelity Select Semiconductors Portfolio",
-        "VSMAX": "Vanguard Small-Cap Index Fund Admiral Shares",
-        "VTIAX": "Vanguard Total International Stock Index Fund",
-        "FCPGX": "Fidelity Small Cap Growth Fund"
-    }
-}
+from PriceStore import PriceStore
+from DrawdownEngine import drawdown_matrix
+from FundUniverse import iter_funds, add_shard_argument, shard_path
+
+DRAWDOWN_FIELDS = ["Max Drawdown (Investment)", "Drawdown Peak Date", "Drawdown Valley Date", "Drawdown Duration"]
 
 def setup_driver():
     options = Options()
@@ -46,7 +36,14 @@ def get_morningstar_risk(driver):
                 EC.element_to_be_clickable((By.XPATH, "//a[contains(., 'Ratings & Risk')]"))
             )
         tab.click()
-        time.sleep(3)
+
+        # Wait for the risk cells themselves rather than a fixed delay
+        try:
+            WebDriverWait(driver, 10).until(
+                EC.presence_of_element_located((By.XPATH, "//div[text()='3-Year' or text()='5-Year' or text()='10-Year']"))
+            )
+        except TimeoutException:
+            pass
 
         for term in ["3-Year", "5-Year", "10-Year"]:
             try:
@@ -60,7 +57,8 @@ def get_morningstar_risk(driver):
 
     return risk_data
 
-def extract_volatility_measures(driver):
+def extract_volatility_measures(driver, drawdown=True):
+    """Capture ratios and, unless `drawdown` is False, the drawdown cells of the volatility section."""
     data = {
         "Upside Capture (Category)": "N/A",
         "Downside Capture (Category)": "N/A",
@@ -73,12 +71,22 @@ def extract_volatility_measures(driver):
     try:
         # Scroll to bottom to trigger load of lower sections
         driver.execute_script("window.scrollTo(0, document.body.scrollHeight * 0.75);")
-        time.sleep(4)
 
-        # Find volatility section
+        # Find volatility section, then wait until its lazy-loaded cells have text
         section = WebDriverWait(driver, 10).until(
             EC.presence_of_element_located((By.XPATH, "//h2[contains(text(), 'Market Volatility Measures')]/.."))
         )
+        # The drawdown rows load last; without them the capture rows are enough
+        ready = "Maximum" if drawdown else "Upside"
+        try:
+            WebDriverWait(driver, 10).until(
+                lambda d: any(
+                    cell.text.strip() == ready
+                    for cell in section.find_elements(By.XPATH, ".//div[contains(@class, 'cell')]")
+                )
+            )
+        except TimeoutException:
+            pass
 
         rows = section.find_elements(By.XPATH, ".//div[contains(@class, 'cell')]")
 
@@ -100,41 +108,106 @@ def extract_volatility_measures(driver):
     except Exception as e:
         print(f"[Volatility Section Error] {e}")
 
+    if not drawdown:
+        for field in DRAWDOWN_FIELDS:
+            data.pop(field)
     return data
 
-def scrape_all():
-    driver = setup_driver()
-    all_data = []
+def local_drawdowns(symbols, years=3, offline=False):
+    """The Morningstar drawdown fields computed from the local price store, {ticker: {field: text}}.
+
+    Max drawdown is in percent like Morningstar's; dates are ISO and the
+    duration is calendar days from peak to recovery (or to today).
+    """
+    end_date = datetime.today()
+    store = PriceStore(offline=offline)
+    store.update(symbols, end_date - timedelta(days=365 * years), end_date)
+    prices = store.window(symbols, end_date - timedelta(days=365 * years), end_date)
+    stats = drawdown_matrix(prices, periods=[years], end_date=end_date)
+    fmt_date = lambda d: "N/A" if pd.isna(d) else d.strftime("%Y-%m-%d")
+    out = {}
+    for symbol in symbols:
+        row = stats.loc[(symbol, years)]
+        if np.isnan(row["Max Drawdown"]):
+            out[symbol] = {field: "N/A" for field in DRAWDOWN_FIELDS}
+            continue
+        out[symbol] = {
+            "Max Drawdown (Investment)": f"{row['Max Drawdown'] * 100:.2f}",
+            "Drawdown Peak Date": fmt_date(row["Peak Date"]),
+            "Drawdown Valley Date": fmt_date(row["Valley Date"]),
+            "Drawdown Duration": str(int(row["Duration Days"])),
+        }
+    return out
+
+def scrape_fund(driver, risk_level, ticker, name, drawdown=True):
+    print(f"Scraping {ticker} - {name}")
+    url = f"https://www.morningstar.com/funds/xnas/{ticker.lower()}/quote"
+    driver.get(url)
+    WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
+
+    risk = get_morningstar_risk(driver)
+    volatility = extract_volatility_measures(driver, drawdown)
+
+    return {
+        "Risk Profile": risk_level,
+        "Ticker": ticker,
+        "Name": name,
+        "3-Year Risk": risk["3y"],
+        "5-Year Risk": risk["5y"],
+        "10-Year Risk": risk["10y"],
+        **volatility
+    }
 
-    for risk_level, fund_dict in funds.items():
-        for ticker, name in fund_dict.items():
-            print(f"Scraping {ticker} - {name}")
-            url = f"https://www.morningstar.com/funds/xnas/{ticker.lower()}/quote"
+def scrape_shard(shard, drawdown=True):
+    """Scrape a list of (position, risk_level, ticker, name) on one dedicated driver."""
+    driver = setup_driver()
+    rows = []
+    try:
+        for position, risk_level, ticker, name in shard:
             try:
-                driver.get(url)
-                WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
-                time.sleep(3)
-
-                risk = get_morningstar_risk(driver)
-                volatility = extract_volatility_measures(driver)
-
-                all_data.append({
-                    "Risk Profile": risk_level,
-                    "Ticker": ticker,
-                    "Name": name,
-                    "3-Year Risk": risk["3y"],
-                    "5-Year Risk": risk["5y"],
-                    "10-Year Risk": risk["10y"],
-                    **volatility
-                })
-
+                rows.append((position, scrape_fund(driver, risk_level, ticker, name, drawdown)))
             except Exception as e:
                 print(f"[{ticker}] Load Failed: {e}")
-
-    driver.quit()
+    finally:
+        driver.quit()
+    return rows
+
+def scrape_all(workers=1, drawdown=True, shard=None):
+    """Scrape every fund of the universe (or of one `shard` of it), split round-robin across `workers` drivers.
+
+    Rows come back in universe order regardless of which worker scraped
+    them. With `drawdown` False the drawdown cells are not waited for or read.
+    """
+    indexed = [
+        (i, fund["risk_profile"], fund["ticker"], fund["name"])
+        for i, fund in enumerate(iter_funds(shard=shard))
+    ]
+    workers = max(1, min(workers, len(indexed)))
+    shards = [indexed[i::workers] for i in range(workers)]
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = [row for rows in executor.map(lambda shard: scrape_shard(shard, drawdown), shards) for row in rows]
+
+    all_data = [row for _, row in sorted(results, key=lambda r: r[0])]
     return pd.DataFrame(all_data)
 
 if __name__ == "__main__":
-    df = scrape_all()
+    parser = argparse.ArgumentParser(description="Scrape Morningstar risk and volatility measures.")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of browser drivers to shard the fund list across.")
+    parser.add_argument("--local-drawdown", action="store_true",
+                        help="Compute the drawdown columns from local prices instead of scraping them.")
+    parser.add_argument("--drawdown-years", type=int, default=3, choices=[3, 5, 10],
+                        help="Trailing window for --local-drawdown.")
+    parser.add_argument("--offline", action="store_true",
+                        help="With --local-drawdown, use only prices already in the local price store.")
+    add_shard_argument(parser)
+    args = parser.parse_args()
+
+    df = scrape_all(workers=args.workers, drawdown=not args.local_drawdown, shard=args.shard)
+    if args.local_drawdown and not df.empty:
+        drawdowns = local_drawdowns(list(df["Ticker"]), args.drawdown_years, args.offline)
+        for field in DRAWDOWN_FIELDS:
+            df[field] = [drawdowns[t][field] for t in df["Ticker"]]
     print(df)
-    df.to_csv("morningstar_risk_volatility.csv", index=False)
+    df.to_csv(shard_path("morningstar_risk_volatility.csv", args.shard), index=False)
@@ -0,0 +1,165 @@
+import os
+import json
+import argparse
+import numpy as np
+
+METRICS_JSON = "Data/fund_risk_metrics.json"
+STORE_DIR = "Data/metrics"
+VALUES_FILE = "values.npy"
+CODES_FILE = "codes.json"
+
+HORIZONS = ["3y", "5y", "10y"]
+MISSING = {"", "N/A", "NA", "--", "None"}
+
+def parse_value(text):
+    """String metric value from the JSON ("1.99", "N/A", "Inf") to float32, NaN when missing."""
+    if text is None:
+        return np.nan
+    if isinstance(text, (int, float)):
+        return float(text)
+    text = str(text).strip().replace(",", "").rstrip("%")
+    if text in MISSING:
+        return np.nan
+    if text.lower() == "inf":
+        return np.inf
+    try:
+        return float(text)
+    except ValueError:
+        return np.nan
+
+def format_value(value):
+    """Inverse of parse_value: shortest float32 repr, "N/A" for NaN."""
+    if np.isnan(value):
+        return "N/A"
+    if np.isinf(value):
+        return "Inf" if value > 0 else "-Inf"
+    return np.format_float_positional(np.float32(value), trim="-")
+
+class MetricStore:
+    """Dense float32 cube of fund metrics: values[ticker, metric, horizon].
+
+    Tickers, metrics and horizons are integer-coded by their position in
+    the `tickers`, `metrics` and `horizons` lists. Missing values are NaN.
+    Accessors return NumPy views, so a memory-mapped store is sliced without
+    copying.
+    """
+
+    def __init__(self, values, tickers, metrics, horizons=HORIZONS, categories=None):
+        self.values = values
+        self.tickers = list(tickers)
+        self.metrics = list(metrics)
+        self.horizons = list(horizons)
+        self.categories = dict(categories or {})
+        self.ticker_code = {t: i for i, t in enumerate(self.tickers)}
+        self.metric_code = {m: i for i, m in enumerate(self.metrics)}
+        self.horizon_code = {h: i for i, h in enumerate(self.horizons)}
+
+    # --- Construction ---
+    @classmethod
+    def from_dict(cls, data, horizons=HORIZONS):
+        """Build from either JSON shape: {ticker: {metric: {h: v}}} or
+        {ticker: {"Category": c, "Metrics": {metric: {h: v}}}}."""
+        tickers, metrics, categories = [], [], {}
+        rows = {}
+        for ticker, entry in data.items():
+            if isinstance(entry, dict) and "Metrics" in entry:
+                categories[ticker] = entry.get("Category")
+                entry = entry["Metrics"]
+            tickers.append(ticker)
+            rows[ticker] = entry
+            for metric in entry:
+                if metric not in metrics:
+                    metrics.append(metric)
+
+        values = np.full((len(tickers), len(metrics), len(horizons)), np.nan, dtype=np.float32)
+        metric_code = {m: i for i, m in enumerate(metrics)}
+        for t, ticker in enumerate(tickers):
+            for metric, by_horizon in rows[ticker].items():
+                for h, horizon in enumerate(horizons):
+                    values[t, metric_code[metric], h] = parse_value(by_horizon.get(horizon))
+        return cls(values, tickers, metrics, horizons, categories)
+
+    @classmethod
+    def from_json(cls, path=METRICS_JSON):
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+    # --- Persistence ---
+    def save(self, root=STORE_DIR):
+        os.makedirs(root, exist_ok=True)
+        np.save(os.path.join(root, VALUES_FILE), np.ascontiguousarray(self.values, dtype=np.float32))
+        with open(os.path.join(root, CODES_FILE), "w", encoding="utf-8") as f:
+            json.dump({
+                "tickers": self.tickers,
+                "metrics": self.metrics,
+                "horizons": self.horizons,
+                "categories": self.categories,
+            }, f, indent=2)
+
+    @classmethod
+    def load(cls, root=STORE_DIR, mmap=True):
+        """Open a saved store; with `mmap` the values stay on disk and are paged in on access."""
+        values = np.load(os.path.join(root, VALUES_FILE), mmap_mode="r" if mmap else None)
+        with open(os.path.join(root, CODES_FILE), "r", encoding="utf-8") as f:
+            codes = json.load(f)
+        return cls(values, codes["tickers"], codes["metrics"], codes["horizons"], codes.get("categories"))
+
+    @classmethod
+    def load_or_build(cls, json_path=METRICS_JSON, root=STORE_DIR):
+        """Open the saved store, rebuilding it first if the JSON is newer or it does not exist."""
+        values_path = os.path.join(root, VALUES_FILE)
+        if not os.path.exists(values_path) or os.path.getmtime(values_path) < os.path.getmtime(json_path):
+            cls.from_json(json_path).save(root)
+        return cls.load(root)
+
+    # --- Zero-copy slices ---
+    def metric(self, name):
+        """(tickers x horizons) view for one metric."""
+        return self.values[:, self.metric_code[name], :]
+
+    def horizon(self, horizon):
+        """(tickers x metrics) view for one horizon."""
+        return self.values[:, :, self.horizon_code[horizon]]
+
+    def column(self, metric, horizon):
+        """One value per ticker for a metric/horizon pair, as a strided view."""
+        return self.values[:, self.metric_code[metric], self.horizon_code[horizon]]
+
+    def fund(self, ticker):
+        """(metrics x horizons) view for one ticker."""
+        return self.values[self.ticker_code[ticker]]
+
+    def codes(self, tickers):
+        """Integer codes for a list of tickers (unknown tickers are skipped)."""
+        return np.array([self.ticker_code[t] for t in tickers if t in self.ticker_code], dtype=np.int32)
+
+    # --- Compatibility exports ---
+    def to_dict(self, tickers=None):
+        """The fund_risk_metrics.json shape: {ticker: {metric: {"3y": "1.99", ...}}}."""
+        out = {}
+        for ticker in tickers or self.tickers:
+            block = self.fund(ticker)
+            out[ticker] = {
+                metric: {h: format_value(block[m, i]) for i, h in enumerate(self.horizons)}
+                for m, metric in enumerate(self.metrics)
+            }
+        return out
+
+    def export_json(self, path=METRICS_JSON, indent=2):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=indent)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert between fund_risk_metrics.json and the columnar metric store.")
+    parser.add_argument("action", choices=["build", "export"])
+    parser.add_argument("--json", default=METRICS_JSON)
+    parser.add_argument("--store", default=STORE_DIR)
+    args = parser.parse_args()
+
+    if args.action == "build":
+        store = MetricStore.from_json(args.json)
+        store.save(args.store)
+        print(f"Stored {len(store.tickers)} funds x {len(store.metrics)} metrics x {len(store.horizons)} horizons in '{args.store}'")
+    else:
+        MetricStore.load(args.store).export_json(args.json)
+        print(f"Exported metric store to '{args.json}'")
@@ -0,0 +1,274 @@
+"""Nightly data refresh as a DAG of script stages.
+
+Each stage is one or more commands with declared input and output paths;
+a stage depends on whichever stages write its inputs. Stages whose inputs
+(file contents, including the stage's scripts and the local modules they
+import) and command are unchanged since their last successful run, and
+whose outputs are still as they left them, are skipped. Volatile stages
+fetch from the web and always run, but if they produce byte-identical
+outputs their dependents still skip. Only the "prices" stage writes the
+price store; the stages reading it run with --offline. Ready stages run
+concurrently as subprocesses, so the refresh takes about as long as its
+slowest chain of stages.
+"""
+import os
+import sys
+import json
+import time
+import ast
+import hashlib
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from RiskMetrics import BENCHMARK
+from RollingMetrics import HISTORY_YEARS
+from FundUniverse import FundUniverse, UNIVERSE_JSON
+
+STATE_FILE = ".cache/pipeline.json"
+LOG_DIR = ".cache/pipeline_logs"
+JOBS = 4
+SCRAPE_WORKERS = 4
+
+class Stage:
+    def __init__(self, name, commands, inputs=(), outputs=(), volatile=False):
+        self.name = name
+        self.commands = [commands] if isinstance(commands[0], str) else commands
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.volatile = volatile
+
+    def scripts(self):
+        """The entry scripts on the command lines plus every local module they import."""
+        return local_modules(arg for command in self.commands for arg in command if arg.endswith(".py"))
+
+def local_modules(scripts):
+    """`scripts` and, transitively, the sibling modules they import (Scripts/*.py), sorted."""
+    seen, todo = set(), list(scripts)
+    while todo:
+        path = todo.pop()
+        if path in seen or not os.path.exists(path):
+            continue
+        seen.add(path)
+        with open(path, "r", encoding="utf-8") as f:
+            tree = ast.parse(f.read(), filename=path)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                names = [node.module]
+            else:
+                continue
+            for name in names:
+                sibling = os.path.join(os.path.dirname(path), name.split(".")[0] + ".py")
+                if os.path.exists(sibling):
+                    todo.append(sibling)
+    return sorted(seen)
+
+def script(name, *args):
+    return [sys.executable, f"Scripts/{name}", *args]
+
+def default_stages():
+    symbols = FundUniverse.load().tickers()
+    prices = "Data/prices"
+    return [
+        Stage("prices", script("PriceStore.py", *symbols, BENCHMARK, "--years", str(HISTORY_YEARS)),
+              inputs=[UNIVERSE_JSON], outputs=[prices], volatile=True),
+        Stage("yahoo", script("WebScarper.py", "--workers", str(SCRAPE_WORKERS), "--offline"),
+              inputs=[prices, UNIVERSE_JSON], outputs=["fund_risk_metrics.json"], volatile=True),
+        Stage("morningstar", script("MaxDrawdown.py", "--workers", str(SCRAPE_WORKERS), "--local-drawdown", "--offline"),
+              inputs=[prices, UNIVERSE_JSON], outputs=["morningstar_risk_volatility.csv"], volatile=True),
+        Stage("sortino", script("Sortino.py", "--offline"), inputs=[prices, UNIVERSE_JSON], outputs=["sortino.json"]),
+        Stage("drawdown", script("Drawdown.py", "--offline"), inputs=[prices, UNIVERSE_JSON], outputs=["drawdown.json"]),
+        Stage("risk_metrics", script("RiskMetrics.py", "--offline", "--out", "local_risk_metrics.json"),
+              inputs=[prices, UNIVERSE_JSON], outputs=["local_risk_metrics.json"]),
+        Stage("rolling", script("RollingMetrics.py", "--offline", "--years", str(HISTORY_YEARS)),
+              inputs=[prices, UNIVERSE_JSON], outputs=["Data/rolling"]),
+        Stage("publish", [
+                  script("MetricStore.py", "build", "--json", "fund_risk_metrics.json"),
+                  script("MetricStore.py", "export", "--json", "Data/fund_risk_metrics.json"),
+              ],
+              inputs=["fund_risk_metrics.json"], outputs=["Data/metrics", "Data/fund_risk_metrics.json"]),
+        Stage("index", script("Index.py"),
+              inputs=["Data/fund_risk_metrics.json", "Data/fund_metadata.json", "Data/Definitions.json", UNIVERSE_JSON],
+              outputs=["faiss_index_fund_data"]),
+    ]
+
+# --- Content hashing ---
+def hash_path(path):
+    """sha256 over a file, or over every file under a directory (relative names included); None if missing."""
+    if not os.path.exists(path):
+        return None
+    h = hashlib.sha256()
+    files = [path] if os.path.isfile(path) else sorted(
+        os.path.join(root, f) for root, _, names in os.walk(path) for f in names
+    )
+    for file in files:
+        h.update(os.path.relpath(file, path).encode("utf-8"))
+        with open(file, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+    return h.hexdigest()
+
+def stage_key(stage):
+    """Hash of the stage's commands, input contents and the code it runs (scripts and their local imports)."""
+    h = hashlib.sha256(json.dumps(stage.commands).encode("utf-8"))
+    for path in sorted(set(stage.inputs + stage.scripts())):
+        h.update(f"{path}={hash_path(path)}".encode("utf-8"))
+    return h.hexdigest()
+
+def resolve(stages):
+    """{stage name: names of the stages writing its inputs}; raises ValueError on a cycle."""
+    writers = {}
+    for stage in stages:
+        for path in stage.outputs:
+            writers[os.path.normpath(path)] = stage.name
+    deps = {}
+    for stage in stages:
+        deps[stage.name] = {
+            writer for path in stage.inputs
+            for out, writer in writers.items()
+            if writer != stage.name and (os.path.normpath(path) == out or os.path.normpath(path).startswith(out + os.sep))
+        }
+    seen, done = set(), set()
+    def visit(name):
+        if name in done:
+            return
+        if name in seen:
+            raise ValueError(f"Pipeline has a cycle through '{name}'")
+        seen.add(name)
+        for dep in deps[name]:
+            visit(dep)
+        done.add(name)
+    for name in deps:
+        visit(name)
+    return deps
+
+class Pipeline:
+    """Runs stages in dependency order, `jobs` at a time, skipping unchanged ones."""
+
+    def __init__(self, stages, jobs=JOBS, state_file=STATE_FILE, log_dir=LOG_DIR):
+        self.stages = {stage.name: stage for stage in stages}
+        self.deps = resolve(stages)
+        self.jobs = jobs
+        self.state_file = state_file
+        self.log_dir = log_dir
+        self.state = {}
+        if os.path.exists(state_file):
+            with open(state_file, "r") as f:
+                self.state = json.load(f)
+
+    def _save_state(self):
+        os.makedirs(os.path.dirname(self.state_file) or ".", exist_ok=True)
+        tmp = self.state_file + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp, self.state_file)
+
+    def up_to_date(self, stage, key):
+        held = self.state.get(stage.name)
+        if held is None or held["key"] != key:
+            return False
+        return all(hash_path(path) == held["outputs"].get(path) for path in stage.outputs)
+
+    def execute(self, stage):
+        """Run the stage's commands in order, logging to its own file; returns (ok, seconds)."""
+        os.makedirs(self.log_dir, exist_ok=True)
+        start = time.perf_counter()
+        with open(os.path.join(self.log_dir, f"{stage.name}.log"), "w") as log:
+            for command in stage.commands:
+                log.write(f"$ {' '.join(command)}\n")
+                log.flush()
+                if subprocess.run(command, stdout=log, stderr=subprocess.STDOUT).returncode != 0:
+                    return False, time.perf_counter() - start
+        return True, time.perf_counter() - start
+
+    def run(self, only=None, force=False, offline=False, dry_run=False):
+        """Run the pipeline (or `only` these stages plus nothing else); returns the report rows."""
+        selected = [name for name in self.stages if not only or name in only]
+        pending = set(selected)
+        finished, changed, report = set(), set(), {}
+        started_at = time.perf_counter()
+
+        def ready(name):
+            return all(dep in finished or dep not in selected for dep in self.deps[name])
+
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            running = {}
+            while pending or running:
+                for name in [n for n in selected if n in pending and ready(n)]:
+                    pending.discard(name)
+                    stage = self.stages[name]
+                    failed_deps = [d for d in self.deps[name] if report.get(d, {}).get("status") in ("failed", "blocked")]
+                    key = stage_key(stage)
+                    if failed_deps:
+                        status = "blocked"
+                    elif stage.volatile and offline:
+                        status = "offline"
+                    elif dry_run:
+                        upstream = any(report.get(d, {}).get("status") == "would run" for d in self.deps[name])
+                        fresh = not (force or stage.volatile or upstream) and self.up_to_date(stage, key)
+                        status = "skipped" if fresh else "would run"
+                    elif not force and not stage.volatile and self.up_to_date(stage, key):
+                        status = "skipped"
+                    else:
+                        offset = time.perf_counter() - started_at
+                        running[executor.submit(self.execute, stage)] = (name, key, offset)
+                        continue
+                    report[name] = {"stage": name, "status": status, "seconds": 0.0, "started": None}
+                    finished.add(name)
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name, key, offset = running.pop(future)
+                    stage = self.stages[name]
+                    ok, seconds = future.result()
+                    if ok:
+                        outputs = {path: hash_path(path) for path in stage.outputs}
+                        previous = self.state.get(name, {}).get("outputs")
+                        self.state[name] = {"key": key, "outputs": outputs, "seconds": round(seconds, 3)}
+                        self._save_state()
+                        if outputs != previous:
+                            changed.add(name)
+                    report[name] = {
+                        "stage": name,
+                        "status": ("ran" if name in changed else "ran, unchanged") if ok else "failed",
+                        "seconds": round(seconds, 3),
+                        "started": round(offset, 3),
+                    }
+                    finished.add(name)
+
+        wall = time.perf_counter() - started_at
+        rows = [report[name] for name in selected]
+        return rows, round(wall, 3)
+
+def print_report(rows, wall):
+    width = max(len(row["stage"]) for row in rows)
+    print(f"{'stage':<{width}}  {'status':<15} {'start s':>8} {'took s':>8}")
+    for row in rows:
+        started = "" if row["started"] is None else f"{row['started']:.1f}"
+        print(f"{row['stage']:<{width}}  {row['status']:<15} {started:>8} {row['seconds']:>8.1f}")
+    serial = sum(row["seconds"] for row in rows)
+    print(f"Wall time {wall:.1f}s for {serial:.1f}s of stage work.")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the data refresh: prices, scrapes, metrics, publish and index.")
+    parser.add_argument("stages", nargs="*", help="Only these stages (default: all).")
+    parser.add_argument("--jobs", type=int, default=JOBS, help="Stages run at once.")
+    parser.add_argument("--force", action="store_true", help="Run stages even when their inputs are unchanged.")
+    parser.add_argument("--offline", action="store_true", help="Leave out the stages that fetch from the web.")
+    parser.add_argument("--dry-run", action="store_true", help="Show what would run without running it.")
+    parser.add_argument("--report", default=None, help="Also write the timing report to this JSON file.")
+    args = parser.parse_args()
+
+    pipeline = Pipeline(default_stages(), jobs=args.jobs)
+    unknown = [name for name in args.stages if name not in pipeline.stages]
+    if unknown:
+        parser.error(f"unknown stages {unknown}; choose from {list(pipeline.stages)}")
+    rows, wall = pipeline.run(only=args.stages, force=args.force, offline=args.offline, dry_run=args.dry_run)
+    print_report(rows, wall)
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump({"wall_seconds": wall, "stages": rows}, f, indent=2)
+    sys.exit(1 if any(row["status"] in ("failed", "blocked") for row in rows) else 0)
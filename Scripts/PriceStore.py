@@ -0,0 +1,177 @@
+import os
+import json
+import argparse
+from datetime import datetime, timedelta
+import pandas as pd
+
+PRICE_DIR = "Data/prices"
+MANIFEST = "manifest.json"
+
+# Rows re-downloaded ahead of the held tail. Adjusted closes are rewritten
+# after dividends and splits, so a mismatch here triggers a full refetch.
+OVERLAP_DAYS = 7
+ADJUST_TOLERANCE = 1e-6
+
+def download_closes(symbols, start_date, end_date):
+    """Wide (dates x tickers) Close matrix for one yf.download call."""
+    import yfinance as yf  # only needed when actually downloading
+
+    data = yf.download(
+        symbols,
+        start=start_date.strftime("%Y-%m-%d"),
+        end=end_date.strftime("%Y-%m-%d"),
+        progress=False,
+    )
+    if data.empty or "Close" not in data.columns.get_level_values(0):
+        return pd.DataFrame(columns=symbols, dtype=float)
+    closes = data["Close"]
+    if isinstance(closes, pd.Series):
+        closes = closes.to_frame(symbols[0])
+    return closes.reindex(columns=symbols)
+
+class PriceStore:
+    """Per-ticker Parquet files of daily closes with a manifest of what is held.
+
+    `update` downloads only the dates each ticker is missing; `window` and
+    `series` answer from disk without touching the network.
+    """
+
+    def __init__(self, root=PRICE_DIR, offline=False):
+        self.root = root
+        self.offline = offline
+        os.makedirs(root, exist_ok=True)
+        self.manifest_path = os.path.join(root, MANIFEST)
+        self.manifest = {}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, "r") as f:
+                self.manifest = json.load(f)
+
+    def _path(self, ticker):
+        return os.path.join(self.root, f"{ticker}.parquet")
+
+    def _save_manifest(self):
+        tmp = self.manifest_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp, self.manifest_path)
+
+    def held(self, ticker):
+        """Manifest entry for `ticker` (requested_start, fetched_until, first, last, rows) or None."""
+        return self.manifest.get(ticker)
+
+    def series(self, ticker, start_date=None, end_date=None):
+        """Stored closes for one ticker, optionally cut to [start_date, end_date)."""
+        path = self._path(ticker)
+        if not os.path.exists(path):
+            return pd.Series(dtype=float, name=ticker)
+        s = pd.read_parquet(path)["Close"].rename(ticker)
+        if start_date is not None:
+            s = s[s.index >= pd.Timestamp(start_date.strftime("%Y-%m-%d"))]
+        if end_date is not None:
+            s = s[s.index < pd.Timestamp(end_date.strftime("%Y-%m-%d"))]
+        return s
+
+    def window(self, tickers, start_date=None, end_date=None):
+        """Wide (dates x tickers) Close matrix from disk only."""
+        frame = pd.concat(
+            [self.series(t, start_date, end_date) for t in tickers], axis=1
+        ) if tickers else pd.DataFrame()
+        return frame.reindex(columns=list(tickers)).sort_index()
+
+    def _write(self, ticker, closes, requested_start, fetched_until):
+        closes = closes.dropna().sort_index()
+        closes = closes[~closes.index.duplicated(keep="last")]
+        # Other stages read these files while the store refreshes: never expose a half-written one
+        tmp = self._path(ticker) + ".tmp"
+        closes.to_frame("Close").to_parquet(tmp)
+        os.replace(tmp, self._path(ticker))
+        self.manifest[ticker] = {
+            "requested_start": requested_start.strftime("%Y-%m-%d"),
+            "fetched_until": fetched_until.strftime("%Y-%m-%d"),
+            "first": closes.index[0].strftime("%Y-%m-%d") if len(closes) else None,
+            "last": closes.index[-1].strftime("%Y-%m-%d") if len(closes) else None,
+            "rows": int(len(closes)),
+        }
+
+    def _plan(self, ticker, start_date, end_date):
+        """(fetch_start, full_refetch) for one ticker, or None when nothing is missing."""
+        entry = self.held(ticker)
+        if entry is None or not os.path.exists(self._path(ticker)):
+            return start_date, True
+        if start_date.strftime("%Y-%m-%d") < entry["requested_start"]:
+            return start_date, True
+        fetched_until = datetime.strptime(entry["fetched_until"], "%Y-%m-%d")
+        if fetched_until.date() >= end_date.date():
+            return None
+        if entry["last"] is None:
+            return start_date, True
+        # From the last row actually held, not from the last fetch, so nothing is skipped
+        tail_start = datetime.strptime(entry["last"], "%Y-%m-%d") - timedelta(days=OVERLAP_DAYS)
+        return tail_start, False
+
+    def update(self, tickers, start_date, end_date=None):
+        """Bring every ticker up to [start_date, end_date), downloading only missing dates.
+
+        Tickers sharing a fetch start are batched into one yf.download call.
+        A ticker whose download comes back empty is left as it was, manifest
+        included, so the next update asks for the same dates again.
+        Returns the list of tickers that were touched.
+        """
+        if self.offline:
+            return []
+        end_date = end_date or datetime.today()
+        groups = {}
+        for ticker in tickers:
+            plan = self._plan(ticker, start_date, end_date)
+            if plan is not None:
+                groups.setdefault(plan, []).append(ticker)
+
+        touched = []
+        refetch = []
+        for (fetch_start, full), symbols in groups.items():
+            fresh = download_closes(symbols, fetch_start, end_date)
+            for ticker in symbols:
+                new = fresh[ticker].dropna() if ticker in fresh else pd.Series(dtype=float)
+                if new.empty:
+                    continue  # failed or empty download: keep what is held and retry next time
+                if full:
+                    self._write(ticker, new, start_date, end_date)
+                    touched.append(ticker)
+                    continue
+                old = self.series(ticker)
+                overlap = old.index.intersection(new.index)
+                drift = (old[overlap] - new[overlap]).abs() > ADJUST_TOLERANCE * old[overlap].abs()
+                if drift.any():
+                    refetch.append(ticker)
+                    continue
+                requested_start = datetime.strptime(self.held(ticker)["requested_start"], "%Y-%m-%d")
+                self._write(ticker, pd.concat([old, new]), requested_start, end_date)
+                touched.append(ticker)
+
+        # Adjusted history moved under us: refetch the whole held range.
+        regroups = {}
+        for ticker in refetch:
+            requested_start = datetime.strptime(self.held(ticker)["requested_start"], "%Y-%m-%d")
+            regroups.setdefault(requested_start, []).append(ticker)
+        for requested_start, symbols in regroups.items():
+            fresh = download_closes(symbols, requested_start, end_date)
+            for ticker in symbols:
+                new = fresh[ticker].dropna() if ticker in fresh else pd.Series(dtype=float)
+                if new.empty:
+                    continue
+                self._write(ticker, new, requested_start, end_date)
+                touched.append(ticker)
+
+        self._save_manifest()
+        return touched
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refresh the local price store for a list of tickers.")
+    parser.add_argument("tickers", nargs="+")
+    parser.add_argument("--years", type=int, default=10, help="History to hold, in years.")
+    args = parser.parse_args()
+
+    end_date = datetime.today()
+    store = PriceStore()
+    touched = store.update(args.tickers, end_date - timedelta(days=365 * args.years), end_date)
+    print(f"Updated {len(touched)} of {len(args.tickers)} tickers in '{store.root}'")
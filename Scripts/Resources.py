@@ -0,0 +1,95 @@
+"""Process-wide resources for the Streamlit apps.
+
+Streamlit re-runs the app script on every interaction; everything here is
+built once per server process with st.cache_resource and shared by all
+sessions. Only memory and the (cheap) QA chain live in st.session_state.
+"""
+import streamlit as st
+from dotenv import load_dotenv
+from langchain_community.vectorstores import FAISS
+from langchain.chains import ConversationalRetrievalChain
+
+from EmbeddingCache import cached_embeddings
+from ChatModel import chat_model
+from ConversationMemory import BudgetedConversationMemory
+from HybridRetriever import HybridRetriever
+from ContextPacker import PackedRetriever
+from AnswerCache import AnswerCache, data_version
+from MetricStore import METRICS_JSON
+from Screener import Screener, METADATA_JSON
+from FundUniverse import UNIVERSE_JSON
+
+INDEX_DIR = "faiss_index_fund_data"
+
+load_dotenv()
+
+@st.cache_resource(show_spinner=False)
+def get_embedding():
+    return cached_embeddings()
+
+@st.cache_resource(show_spinner=False)
+def get_llm():
+    """Streaming chat model (see ChatModel.chat_model for the offline switch)."""
+    return chat_model(streaming=True)
+
+@st.cache_resource(show_spinner=False)
+def get_summary_llm():
+    """Non-streaming chat model for the background history summaries."""
+    return chat_model(streaming=False)
+
+# max_entries=1: loading a new version evicts the old index from memory
+@st.cache_resource(show_spinner=False, max_entries=1)
+def _load_retriever(index_dir, version):
+    vectorstore = FAISS.load_local(index_dir, get_embedding(), allow_dangerous_deserialization=True)
+    # Over-fetch, then dedupe/merge/pack down to the context token budget
+    return PackedRetriever(base=HybridRetriever.from_vectorstore(vectorstore, k=8))
+
+def get_retriever(index_dir=INDEX_DIR):
+    """Shared retriever over the FAISS index, reloaded once whenever the index directory changes."""
+    return _load_retriever(index_dir, data_version([index_dir]))
+
+@st.cache_resource(show_spinner=False, max_entries=1)
+def _load_screener(version):
+    return Screener.from_files()
+
+def get_screener():
+    return _load_screener(data_version([METRICS_JSON, METADATA_JSON, UNIVERSE_JSON]))
+
+@st.cache_resource(show_spinner=False)
+def get_answer_cache():
+    return AnswerCache(get_embedding())
+
+def session_memory(summarize=True):
+    """This session's token-budgeted conversation memory.
+
+    With `summarize=False` (thin-client mode, where it only feeds the chat
+    history display) old turns are dropped instead of summarized.
+    """
+    if "memory" not in st.session_state:
+        st.session_state.memory = BudgetedConversationMemory(
+            llm=get_summary_llm() if summarize else None,
+            memory_key="chat_history",
+            return_messages=True,
+            output_key="answer"
+        )
+    return st.session_state.memory
+
+def session_chain(prompt):
+    """This session's memory and QA chain on top of the shared LLM and retriever.
+
+    The chain is rebuilt, keeping the conversation, when the shared
+    retriever has been reloaded for a new index.
+    """
+    retriever = get_retriever()
+    session_memory()
+    if st.session_state.get("qa_chain") is None or st.session_state.get("qa_retriever") is not retriever:
+        st.session_state.qa_chain = ConversationalRetrievalChain.from_llm(
+            llm=get_llm(),
+            retriever=retriever,
+            memory=st.session_state.memory,
+            return_source_documents=True,
+            combine_docs_chain_kwargs={"prompt": prompt},
+            output_key="answer"
+        )
+        st.session_state.qa_retriever = retriever
+    return st.session_state.qa_chain
@@ -0,0 +1,154 @@
+import argparse
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+
+from PriceStore import PriceStore
+from MetricStore import MetricStore, HORIZONS
+from SortinoEngine import (TRADING_DAYS, risk_free_rate, min_rows_per_year, periods,
+                           daily_returns, prefix_sums, window_starts, window_bounds, sortino_matrix)
+from FundUniverse import FundUniverse, add_shard_argument, shard_path
+
+BENCHMARK = "SPY"
+BLOCK = 1000
+MONTH_DAYS = TRADING_DAYS / 12
+
+METRICS = [
+    "Alpha", "Beta", "Mean Annual Return", "R-Squared", "Standard Deviation",
+    "Sharpe Ratio", "Treynor Ratio", "Sortino Ratio", "Upside Capture", "Downside Capture",
+]
+DECIMALS = {"Sortino Ratio": 4}
+
+# Running sums needed per window, in the order they are stacked
+SUMS = ["n", "r", "rr", "n_joint", "r_joint", "b_joint", "rr_joint", "bb_joint", "rb_joint",
+        "n_up", "r_up", "b_up", "n_down", "r_down", "b_down"]
+
+def joint_returns(prices, benchmark):
+    """Fund and benchmark returns over the same day, for the benchmark-relative sums.
+
+    Returns (fund, bench, joint): `joint` marks rows where the fund and the
+    benchmark both have a close on that row and on the previous one, so a
+    gap in either series never pairs a multi-day return with a one-day one.
+    """
+    values = prices.to_numpy(dtype=float)
+    bench_values = benchmark.reindex(prices.index).to_numpy(dtype=float)
+    both = ~np.isnan(values) & ~np.isnan(bench_values)[:, None]
+    joint = np.zeros_like(both)
+    joint[1:] = both[1:] & both[:-1]
+    fund = np.zeros_like(values)
+    bench = np.zeros_like(values)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        fund[1:] = np.where(joint[1:], values[1:] / values[:-1] - 1, 0.0)
+        bench[1:] = np.where(joint[1:], (bench_values[1:] / bench_values[:-1] - 1)[:, None], 0.0)
+    return fund, bench, joint
+
+def return_sums(returns, defined, fund, bench, joint):
+    """(rows x len(SUMS) x tickers) terms whose window sums give every statistic."""
+    r = np.where(defined, returns, 0.0)
+    up, down = joint & (bench > 0), joint & (bench < 0)
+    terms = {
+        "n": defined, "r": r, "rr": r * r,
+        "n_joint": joint, "r_joint": fund, "b_joint": bench,
+        "rr_joint": fund * fund, "bb_joint": bench * bench, "rb_joint": fund * bench,
+        "n_up": up, "r_up": np.where(up, fund, 0.0), "b_up": np.where(up, bench, 0.0),
+        "n_down": down, "r_down": np.where(down, fund, 0.0), "b_down": np.where(down, bench, 0.0),
+    }
+    return np.stack([np.asarray(terms[name], dtype=float) for name in SUMS], axis=1)
+
+def risk_metrics(prices, benchmark, periods=periods, risk_free_rate=risk_free_rate,
+                 min_rows_per_year=min_rows_per_year, end_date=None, block=BLOCK):
+    """The fund_risk_metrics.json metrics for every ticker and horizon in one pass.
+
+    `prices` is a dates x tickers frame of closes and `benchmark` a series
+    of benchmark closes. All window sums come from one stacked prefix-sum
+    over daily returns, those against the benchmark only over days where
+    both series have consecutive closes (see joint_returns); means,
+    variances and the benchmark covariance are then annualized once. Units follow Yahoo's risk page: Alpha, Standard
+    Deviation and Treynor in percent per year, Mean Annual Return as the
+    mean monthly return in percent, R-Squared and capture ratios in percent.
+    Returns {metric: tickers x periods frame}, NaN where a window is too short.
+    Tickers are processed `block` columns at a time to bound memory.
+    """
+    prices = prices.sort_index()
+    if prices.shape[1] > block:
+        parts = [
+            risk_metrics(prices.iloc[:, lo:lo + block], benchmark, periods, risk_free_rate,
+                         min_rows_per_year, end_date, block)
+            for lo in range(0, prices.shape[1], block)
+        ]
+        return {metric: pd.concat([part[metric] for part in parts]) for metric in parts[0]}
+    returns, valid, defined = daily_returns(prices)
+    sums = prefix_sums(return_sums(returns, defined, *joint_returns(prices, benchmark)))
+    cols = np.arange(prices.shape[1])
+    daily_rf = risk_free_rate / TRADING_DAYS
+    starts = window_starts(prices.index, periods, end_date)
+    out = {metric: pd.DataFrame(np.nan, index=prices.columns, columns=list(periods)) for metric in METRICS}
+
+    for yrs, (first, counts) in window_bounds(valid, starts).items():
+        s = dict(zip(SUMS, sums[-1] - sums[first, :, cols].T))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            n, nj = s["n"], s["n_joint"]
+            mean = s["r"] / n
+            var = (s["rr"] - n * mean ** 2) / (n - 1)
+            mean_r, mean_b = s["r_joint"] / nj, s["b_joint"] / nj
+            cov = (s["rb_joint"] - nj * mean_r * mean_b) / (nj - 1)
+            var_rj = (s["rr_joint"] - nj * mean_r ** 2) / (nj - 1)
+            var_b = (s["bb_joint"] - nj * mean_b ** 2) / (nj - 1)
+            beta = cov / var_b
+
+            # One annualization step for everything below
+            annual_excess = (mean - daily_rf) * TRADING_DAYS
+            annual_std = np.sqrt(var * TRADING_DAYS)
+            alpha = ((mean_r - daily_rf) - beta * (mean_b - daily_rf)) * TRADING_DAYS
+            metrics = {
+                "Alpha": alpha * 100,
+                "Beta": beta,
+                "Mean Annual Return": mean * MONTH_DAYS * 100,
+                "R-Squared": cov ** 2 / (var_rj * var_b) * 100,
+                "Standard Deviation": annual_std * 100,
+                "Sharpe Ratio": annual_excess / annual_std,
+                "Treynor Ratio": annual_excess / beta * 100,
+                "Upside Capture": (s["r_up"] / s["n_up"]) / (s["b_up"] / s["n_up"]) * 100,
+                "Downside Capture": (s["r_down"] / s["n_down"]) / (s["b_down"] / s["n_down"]) * 100,
+            }
+        enough = (counts >= min_rows_per_year[yrs]) & (n > 1)
+        for metric, values in metrics.items():
+            out[metric][yrs] = np.where(enough & np.isfinite(values), values, np.nan)
+
+    out["Sortino Ratio"] = sortino_matrix(prices, periods, risk_free_rate, min_rows_per_year, end_date)
+    return out
+
+def to_metric_store(metrics, categories=None, horizons=HORIZONS):
+    """Round to the scraped precision and pack into a MetricStore (horizon "3y" <- period 3)."""
+    first = next(iter(metrics.values()))
+    values = np.full((len(first.index), len(metrics), len(horizons)), np.nan, dtype=np.float32)
+    for m, (metric, frame) in enumerate(metrics.items()):
+        for h, horizon in enumerate(horizons):
+            yrs = int(horizon.rstrip("y"))
+            if yrs in frame.columns:
+                values[:, m, h] = frame[yrs].round(DECIMALS.get(metric, 2)).to_numpy()
+    return MetricStore(values, first.index, list(metrics), horizons, categories)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compute the fund risk metrics from local prices against a benchmark.")
+    parser.add_argument("--benchmark", default=BENCHMARK, help="Ticker whose returns Alpha, Beta and capture are measured against.")
+    parser.add_argument("--out", default="fund_risk_metrics.json")
+    parser.add_argument("--offline", action="store_true",
+                        help="Use only prices already held in the local price store.")
+    add_shard_argument(parser)
+    args = parser.parse_args()
+
+    universe = FundUniverse.load(shard=args.shard)
+    end_date = datetime.today()
+    start_date = end_date - timedelta(days=365 * max(periods))
+    symbols = universe.tickers()
+    store = PriceStore(offline=args.offline)
+    store.update(symbols + [args.benchmark], start_date, end_date)
+    prices = store.window(symbols, start_date, end_date)
+    benchmark = store.series(args.benchmark, start_date, end_date)
+
+    metrics = risk_metrics(prices, benchmark, end_date=end_date)
+    result = to_metric_store({metric: metrics[metric] for metric in METRICS}, universe.risk_profiles())
+    out = shard_path(args.out, args.shard)
+    result.export_json(out)
+    print(f"Risk metrics for {len(symbols)} funds against {args.benchmark} saved to '{out}'")
@@ -0,0 +1,177 @@
+import os
+import json
+import argparse
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+
+from PriceStore import PriceStore, ADJUST_TOLERANCE
+from SortinoEngine import TRADING_DAYS, risk_free_rate, daily_returns, prefix_sums
+from FundUniverse import FundUniverse
+
+ROLLING_DIR = "Data/rolling"
+MANIFEST = "manifest.json"
+HISTORY_YEARS = 20
+BLOCK = 1000
+
+ROLLING_METRICS = ["Sharpe Ratio", "Sortino Ratio", "Volatility"]
+
+def rolling_metrics(prices, window=TRADING_DAYS, risk_free_rate=risk_free_rate, min_count=None, block=BLOCK):
+    """Trailing-`window` Sharpe, Sortino and annualized volatility (percent) for every ticker and date.
+
+    Same math as calculate_sortino_annual, but from running sums of excess
+    returns, their squares and the downside squares: each window is a
+    difference of two prefix rows, so a step costs O(1) whatever the window
+    length. Windows holding fewer than `min_count` returns (default half the
+    window) are NaN; Sortino is inf when a window has no downside day.
+    Returns {metric: dates x tickers frame}; tickers are processed `block`
+    columns at a time to bound memory.
+    """
+    prices = prices.sort_index()
+    if prices.shape[1] > block:
+        parts = [
+            rolling_metrics(prices.iloc[:, lo:lo + block], window, risk_free_rate, min_count, block)
+            for lo in range(0, prices.shape[1], block)
+        ]
+        return {metric: pd.concat([part[metric] for part in parts], axis=1) for metric in parts[0]}
+    returns, valid, defined = daily_returns(prices)
+    rows = len(prices.index)
+    daily_mar = risk_free_rate / TRADING_DAYS
+    min_count = window // 2 if min_count is None else min_count
+
+    excess = np.where(defined, returns - daily_mar, 0.0)
+    downside = defined & (returns < daily_mar)
+    sums = prefix_sums(np.stack([
+        defined.astype(float), excess, excess ** 2,
+        downside.astype(float), np.where(downside, excess ** 2, 0.0),
+    ], axis=1))
+    lag = np.maximum(np.arange(1, rows + 1) - window, 0)
+    n, ex, ex_sq, n_down, down_sq = (sums[1:] - sums[lag]).transpose(1, 0, 2)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = ex / n
+        annual_std = np.sqrt(np.maximum(ex_sq - n * mean ** 2, 0.0) / (n - 1) * TRADING_DAYS)
+        annual_downside = np.sqrt(down_sq / n_down * TRADING_DAYS)
+        annual_excess = mean * TRADING_DAYS
+        sortino = np.where((n_down == 0) | (annual_downside == 0), np.inf, annual_excess / annual_downside)
+        series = {
+            "Sharpe Ratio": annual_excess / annual_std,
+            "Sortino Ratio": sortino,
+            "Volatility": annual_std * 100,
+        }
+    enough = n >= max(min_count, 2)
+    return {
+        metric: pd.DataFrame(np.where(enough, values, np.nan), index=prices.index, columns=prices.columns)
+        for metric, values in series.items()
+    }
+
+def slug(metric):
+    return metric.lower().replace(" ", "_")
+
+class RollingStore:
+    """Rolling metric series on disk, one Parquet file per metric (dates x tickers).
+
+    `update` appends only the dates after the last stored one, computed from
+    the trailing `window` rows of prices. The whole history is rebuilt when
+    the window, risk-free rate or ticker list changes, or when the stored
+    last closes no longer match (adjusted prices were rewritten).
+    """
+
+    def __init__(self, root=ROLLING_DIR, window=TRADING_DAYS, risk_free_rate=risk_free_rate):
+        self.window = window
+        self.risk_free_rate = risk_free_rate
+        self.root = os.path.join(root, f"{window}d")
+        os.makedirs(self.root, exist_ok=True)
+        self.manifest_path = os.path.join(self.root, MANIFEST)
+        self.manifest = {}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, "r") as f:
+                self.manifest = json.load(f)
+
+    def _path(self, metric):
+        return os.path.join(self.root, f"{slug(metric)}.parquet")
+
+    def series(self, metric):
+        path = self._path(metric)
+        if not os.path.exists(path):
+            return pd.DataFrame()
+        return pd.read_parquet(path)
+
+    def _stale(self, prices):
+        """Why the stored series cannot be extended, or None when they can."""
+        m = self.manifest
+        if not m or not all(os.path.exists(self._path(metric)) for metric in ROLLING_METRICS):
+            return "nothing stored"
+        if m["risk_free_rate"] != self.risk_free_rate or m["tickers"] != list(prices.columns):
+            return "parameters or tickers changed"
+        last = pd.Timestamp(m["last"])
+        if last not in prices.index:
+            return "last stored date no longer in prices"
+        held = prices.loc[:last].ffill().iloc[-1]
+        for ticker, close in m["last_closes"].items():
+            if close is None:
+                continue
+            if abs(held[ticker] - close) > ADJUST_TOLERANCE * abs(close):
+                return f"{ticker} history was adjusted"
+        return None
+
+    def _save(self, prices):
+        last = prices.index[-1]
+        closes = prices.ffill().iloc[-1]
+        self.manifest = {
+            "window": self.window,
+            "risk_free_rate": self.risk_free_rate,
+            "tickers": list(prices.columns),
+            "first": prices.index[0].strftime("%Y-%m-%d"),
+            "last": last.strftime("%Y-%m-%d"),
+            "last_closes": {t: None if np.isnan(v) else float(v) for t, v in closes.items()},
+        }
+        tmp = self.manifest_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp, self.manifest_path)
+
+    def update(self, prices):
+        """Bring the stored series up to the last date in `prices`; returns the number of new dates."""
+        prices = prices.sort_index()
+        if prices.empty:
+            return 0
+        if self._stale(prices) is not None:
+            for metric, frame in rolling_metrics(prices, self.window, self.risk_free_rate).items():
+                frame.to_parquet(self._path(metric))
+            self._save(prices)
+            return len(prices.index)
+
+        last = pd.Timestamp(self.manifest["last"])
+        pos = int(prices.index.searchsorted(last, side="right"))
+        if pos >= len(prices.index):
+            return 0
+        # The new windows reach back `window` rows; one more row seeds the first return,
+        # holding each ticker's latest close so a gap before it still has a previous price.
+        start = max(0, pos - self.window - 1)
+        seed = prices.iloc[:start + 1].ffill().iloc[[-1]]
+        tail = pd.concat([seed, prices.iloc[start + 1:]])
+        for metric, frame in rolling_metrics(tail, self.window, self.risk_free_rate).items():
+            new = frame.iloc[pos - start:]
+            pd.concat([self.series(metric), new]).to_parquet(self._path(metric))
+        self._save(prices)
+        return len(prices.index) - pos
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Keep rolling Sharpe, Sortino and volatility series up to date.")
+    parser.add_argument("--window", type=int, default=TRADING_DAYS, help="Window length in trading days.")
+    parser.add_argument("--years", type=int, default=HISTORY_YEARS, help="Price history to cover.")
+    parser.add_argument("--offline", action="store_true",
+                        help="Use only prices already held in the local price store.")
+    args = parser.parse_args()
+
+    end_date = datetime.today()
+    start_date = end_date - timedelta(days=365 * args.years)
+    symbols = FundUniverse.load().tickers()
+    prices_store = PriceStore(offline=args.offline)
+    prices_store.update(symbols, start_date, end_date)
+    prices = prices_store.window(symbols, start_date, end_date)
+
+    store = RollingStore(window=args.window)
+    added = store.update(prices)
+    print(f"{added} new dates of rolling {args.window}-day metrics for {len(symbols)} funds in '{store.root}'")
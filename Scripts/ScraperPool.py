@@ -0,0 +1,168 @@
+import time
+import queue
+import random
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+# Selenium errors a healthy browser raises about the page it is on, not about itself
+PAGE_ERRORS = {
+    "TimeoutException", "NoSuchElementException", "StaleElementReferenceException",
+    "ElementNotInteractableException", "ElementClickInterceptedException",
+    "JavascriptException", "NoAlertPresentException", "UnexpectedAlertPresentException",
+}
+# Errors talking to a chromedriver process that has gone away
+CONNECTION_ERRORS = {"ConnectionError", "MaxRetryError", "ProtocolError"}
+
+def driver_is_broken(error):
+    """True when `error` means the browser or its session is unusable.
+
+    Matched by class name so this module does not need selenium installed.
+    Parse errors and page-level selenium errors (a slow page's
+    TimeoutException, a missing element) leave the browser usable.
+    """
+    names = {cls.__name__ for cls in type(error).__mro__}
+    if names & CONNECTION_ERRORS:
+        return True
+    return "WebDriverException" in names and not names & PAGE_ERRORS
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, bursts up to `capacity`."""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+class HostRateLimiter:
+    """One token bucket per host, created on first use."""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def acquire(self, url):
+        host = urlparse(url).netloc
+        with self.lock:
+            bucket = self.buckets.get(host)
+            if bucket is None:
+                bucket = self.buckets[host] = TokenBucket(self.rate, self.capacity)
+        bucket.acquire()
+
+class DriverPool:
+    """Fixed-size pool of long-lived browser drivers.
+
+    Drivers are started lazily (one at a time, since chromedriver patching is
+    not safe to run concurrently) and handed out with `with pool.driver() as d:`.
+    A driver whose task failed with a browser or session error (see
+    `driver_is_broken`) is quit and replaced on next use; any other failure
+    hands it back to the pool.
+    """
+
+    def __init__(self, factory, size):
+        self.factory = factory
+        self.size = size
+        self.idle = queue.Queue()
+        self.created = 0
+        self.lock = threading.Lock()
+        self.all = []
+
+    def _checkout(self):
+        while True:
+            try:
+                return self.idle.get_nowait()
+            except queue.Empty:
+                pass
+            with self.lock:
+                if self.created < self.size:
+                    self.created += 1
+                    try:
+                        driver = self.factory()
+                    except Exception:
+                        self.created -= 1
+                        raise
+                    self.all.append(driver)
+                    return driver
+            try:
+                return self.idle.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+    def _discard(self, driver):
+        with self.lock:
+            self.created -= 1
+            if driver in self.all:
+                self.all.remove(driver)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    @contextmanager
+    def driver(self):
+        driver = self._checkout()
+        try:
+            yield driver
+        except Exception as e:
+            if driver_is_broken(e):
+                self._discard(driver)
+            else:
+                self.idle.put(driver)
+            raise
+        else:
+            self.idle.put(driver)
+
+    def close(self):
+        with self.lock:
+            drivers, self.all = self.all, []
+            self.created = 0
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+def backoff_delay(attempt, base=2.0, cap=30.0):
+    """Exponential backoff with full jitter."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+def run_pooled(items, task, pool, limiter, url_for, max_retries=3, label=str):
+    """Run `task(driver, item)` for every item across the pool's drivers.
+
+    Each attempt waits for a token from `limiter` for the item's host and
+    retries with backoff. Returns {item: result}; items that fail every
+    attempt map to None.
+    """
+    def attempt_all(item):
+        for attempt in range(max_retries):
+            limiter.acquire(url_for(item))
+            try:
+                with pool.driver() as driver:
+                    return task(driver, item)
+            except Exception as e:
+                print(f"Attempt {attempt+1} failed for {label(item)}: {e}")
+                if attempt + 1 < max_retries:
+                    time.sleep(backoff_delay(attempt))
+        print(f"Failed to get data for {label(item)} after {max_retries} attempts.")
+        return None
+
+    with ThreadPoolExecutor(max_workers=pool.size) as executor:
+        results = list(executor.map(attempt_all, items))
+    return dict(zip(items, results))
@@ -0,0 +1,218 @@
+import os
+import re
+import json
+import argparse
+import numpy as np
+import pandas as pd
+
+from MetricStore import MetricStore, METRICS_JSON
+from FundUniverse import FundUniverse, UNIVERSE_JSON, risk_profile_for
+
+METADATA_JSON = "Data/fund_metadata.json"
+SOURCES = f"{METRICS_JSON}\n{METADATA_JSON}"
+
+# Higher is better for ratios and returns; lower is better for volatility
+LOWER_IS_BETTER = {"Standard Deviation"}
+
+METRIC_ALIASES = {
+    "sortino": "Sortino Ratio",
+    "sharpe": "Sharpe Ratio",
+    "treynor": "Treynor Ratio",
+    "alpha": "Alpha",
+    "standard deviation": "Standard Deviation",
+    "std dev": "Standard Deviation",
+    "volatility": "Standard Deviation",
+    "volatile": "Standard Deviation",
+    "mean annual return": "Mean Annual Return",
+    "return": "Mean Annual Return",
+    "aum": "AUM",
+    "assets under management": "AUM",
+}
+
+PROFILE_WORDS = [
+    (re.compile(r"\b(low[- ]risk|conservative|safe|safest|retire\w*|stable)\b"), "Conservative"),
+    (re.compile(r"\b(moderate|medium[- ]risk|balanced)\b"), "Moderate"),
+    (re.compile(r"\b(aggressive|high[- ]risk|growth)\b"), "Aggressive"),
+]
+# A ranking needs a subject: funds, or a metric the cube can sort by
+FUND_WORDS = re.compile(r"\b(funds?|etfs?)\b")
+SIZE_WORDS = re.compile(r"\b(largest|biggest|smallest)\b")
+COMPARE_WORDS = re.compile(r"\b(compare|comparison|vs\.?|versus|against|difference|between)\b")
+RANK_WORDS = re.compile(r"\b(recommend\w*|suggest\w*|best|top|highest|lowest|largest|biggest|smallest|rank\w*|which funds?|screen|least|most)\b")
+# Metrics the cube does not hold; such questions go to the LLM instead of a wrong sort
+UNSUPPORTED = re.compile(r"\b(drawdown|expense|fees?|dividends?|yield|turnover|holdings?|beta|capture)\b")
+TOP_K = re.compile(r"\btop\s+(\d+)\b")
+YEARS = re.compile(r"\b(3|5|10)[- ]?(?:y|yr|yrs|year|years)\b")
+
+def parse_aum(text):
+    """'129.4B' -> 1.294e11; NaN when missing."""
+    if not text:
+        return np.nan
+    m = re.match(r"^\s*\$?([\d.,]+)\s*([KMBT]?)", str(text).upper())
+    if not m:
+        return np.nan
+    scale = {"": 1, "K": 1e3, "M": 1e6, "B": 1e9, "T": 1e12}[m.group(2)]
+    return float(m.group(1).replace(",", "")) * scale
+
+class Screener:
+    """Vectorized filters, sorts and top-k over the metric cube plus fund metadata."""
+
+    def __init__(self, store, metadata, profiles=None):
+        self.store = store
+        self.tickers = np.array(store.tickers)
+        meta = [metadata.get(t, {}) for t in store.tickers]
+        self.names = np.array([m.get("name", "") for m in meta], dtype=object)
+        self.categories = np.array([m.get("category", "") for m in meta], dtype=object)
+        self.aum = np.array([parse_aum(m.get("aum")) for m in meta], dtype=np.float64)
+        self.profiles = np.array(
+            [(profiles or {}).get(t) or store.categories.get(t) or risk_profile_for(c)
+             for t, c in zip(store.tickers, self.categories)],
+            dtype=object,
+        )
+
+    @classmethod
+    def from_files(cls, metrics_json=METRICS_JSON, metadata_json=METADATA_JSON, universe_json=UNIVERSE_JSON):
+        with open(metadata_json, "r", encoding="utf-8") as f:
+            metadata = json.load(f)
+        profiles = FundUniverse.load(universe_json).risk_profiles() if os.path.exists(universe_json) else None
+        return cls(MetricStore.load_or_build(metrics_json), metadata, profiles)
+
+    def values(self, metric, horizon="10y"):
+        if metric == "AUM":
+            return self.aum
+        return self.store.column(metric, horizon)
+
+    def mask(self, risk_profiles=None, categories=None, tickers=None, filters=()):
+        """Boolean row mask; `filters` are (metric, horizon, op, threshold) tuples."""
+        keep = np.ones(len(self.tickers), dtype=bool)
+        if risk_profiles:
+            keep &= np.isin(self.profiles, list(risk_profiles))
+        if categories:
+            lowered = np.char.lower(self.categories.astype(str))
+            keep &= np.any([np.char.find(lowered, c.lower()) >= 0 for c in categories], axis=0)
+        if tickers:
+            keep &= np.isin(self.tickers, list(tickers))
+        ops = {">": np.greater, ">=": np.greater_equal, "<": np.less, "<=": np.less_equal, "==": np.equal}
+        for metric, horizon, op, threshold in filters:
+            with np.errstate(invalid="ignore"):
+                keep &= ops[op](self.values(metric, horizon), threshold)
+        return keep
+
+    def rank(self, sort_by="Sortino Ratio", horizon="10y", descending=None, top_k=5, **filters):
+        """Top-k rows by one metric; missing values always sort last."""
+        if descending is None:
+            descending = sort_by not in LOWER_IS_BETTER
+        keep = np.flatnonzero(self.mask(**filters))
+        key = np.asarray(self.values(sort_by, horizon), dtype=np.float64)[keep]
+        key = np.where(np.isnan(key), np.inf, -key if descending else key)
+        order = keep[np.argsort(key, kind="stable")]
+        if top_k:
+            order = order[:top_k]
+        return self.table(order, horizon)
+
+    def compare(self, tickers, horizon=None):
+        """Side-by-side metrics for the given tickers, in the order asked."""
+        rows = self.store.codes(tickers)
+        return self.table(rows, horizon)
+
+    def table(self, rows, horizon=None):
+        horizons = [horizon] if horizon else self.store.horizons
+        data = {
+            "Ticker": self.tickers[rows],
+            "Name": self.names[rows],
+            "Category": self.categories[rows],
+            "Risk Profile": self.profiles[rows],
+            "AUM ($B)": np.round(self.aum[rows] / 1e9, 1),
+        }
+        for metric in self.store.metrics:
+            for h in horizons:
+                label = f"{metric} ({h})" if len(horizons) > 1 or not horizon else metric
+                data[label] = np.round(self.store.column(metric, h)[rows].astype(np.float64), 4)
+        return pd.DataFrame(data).reset_index(drop=True)
+
+    # --- Query routing ---
+    def parse_intent(self, question):
+        """Recognize comparison and ranking questions; None means "send to the LLM".
+
+        A ranking question has to name funds or a metric the store holds
+        (plurals included), besides a ranking word.
+
+        Returns {"type": "compare", "tickers": [...], "horizon": h|None} or
+        {"type": "rank", "sort_by": m, "horizon": h, "descending": bool|None,
+         "top_k": k, "risk_profiles": [...]}.
+        """
+        text = question.lower()
+        known = set(self.store.tickers)
+        mentioned = list(dict.fromkeys(t for t in re.findall(r"\b[A-Z]{2,6}\b", question) if t in known))
+        years = YEARS.search(text)
+        horizon = f"{years.group(1)}y" if years else None
+        if horizon is None and re.search(r"\blong[- ]term\b", text):
+            horizon = "10y"
+        elif horizon is None and re.search(r"\bshort[- ]term\b", text):
+            horizon = "3y"
+
+        if len(mentioned) >= 2 and (COMPARE_WORDS.search(text) or len(mentioned) == len(re.findall(r"\b[A-Z]{2,6}\b", question))):
+            return {"type": "compare", "tickers": mentioned, "horizon": horizon}
+
+        if mentioned or not RANK_WORDS.search(text) or UNSUPPORTED.search(text):
+            return None
+        metric = next((
+            metric for alias, metric in METRIC_ALIASES.items()
+            if re.search(rf"\b{re.escape(alias)}s?\b", text)
+        ), None)
+        if metric is None and not FUND_WORDS.search(text):
+            return None  # "best way to ...", "top reasons to ...": not a fund ranking
+        sort_by = metric or ("AUM" if SIZE_WORDS.search(text) else "Sortino Ratio")
+        profiles = [p for pattern, p in PROFILE_WORDS if pattern.search(text)]
+        descending = None
+        if re.search(r"\b(lowest|least|smallest)\b", text):
+            descending = False
+        elif re.search(r"\b(highest|most)\b", text):
+            descending = True
+        top = TOP_K.search(text)
+        return {
+            "type": "rank",
+            "sort_by": sort_by,
+            "horizon": horizon or "10y",
+            "descending": descending,
+            "top_k": int(top.group(1)) if top else 5,
+            "risk_profiles": profiles,
+        }
+
+    def answer(self, intent):
+        """(title, DataFrame) for an intent from parse_intent."""
+        if intent["type"] == "compare":
+            title = " vs ".join(intent["tickers"])
+            return f"Comparison: {title}", self.compare(intent["tickers"], intent["horizon"])
+        df = self.rank(
+            sort_by=intent["sort_by"],
+            horizon=intent["horizon"],
+            descending=intent.get("descending"),
+            top_k=intent["top_k"],
+            risk_profiles=intent["risk_profiles"],
+        )
+        scope = "/".join(intent["risk_profiles"]) or "All"
+        return f"Top {len(df)} {scope} funds by {intent['sort_by']} ({intent['horizon']})", df
+
+def narrative_prompt(question, title, df):
+    """Short prompt asking the LLM only to explain an already-computed table."""
+    return (
+        "You are an expert mutual fund assistant. The table below was computed directly from "
+        "our fund data and is authoritative; do not invent other numbers. In 3-5 sentences, "
+        "answer the question using the table, and explain any negative risk metrics in plain language.\n\n"
+        f"Question: {question}\n\n{title}\n{df.to_csv(index=False, float_format='%.4g')}"
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Answer comparison/ranking questions from the metric store.")
+    parser.add_argument("question")
+    args = parser.parse_args()
+
+    screener = Screener.from_files()
+    intent = screener.parse_intent(args.question)
+    if intent is None:
+        print("Not a screening question; the advisor would send it to the LLM.")
+    else:
+        title, table = screener.answer(intent)
+        print(title)
+        print(table.to_string(index=False))
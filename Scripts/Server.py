@@ -0,0 +1,279 @@
+import time
+import asyncio
+import argparse
+from collections import deque
+from aiohttp import web
+from dotenv import load_dotenv
+from langchain_community.vectorstores import FAISS
+from langchain.chains import ConversationalRetrievalChain
+
+from EmbeddingCache import cached_embeddings
+from ChatModel import chat_model
+from ConversationMemory import BudgetedConversationMemory
+from HybridRetriever import HybridRetriever
+from ContextPacker import PackedRetriever
+from AnswerCache import AnswerCache, cached_invoke, normalize_question
+from Screener import Screener, SOURCES, narrative_prompt
+from Prompts import PROMPTS
+
+INDEX_DIR = "faiss_index_fund_data"
+WORKERS = 8
+QUEUE_SIZE = 64
+TIMEOUT = 60.0
+SESSION_TTL = 3600.0
+
+class Busy(Exception):
+    pass
+
+class UnknownPrompt(ValueError):
+    pass
+
+class Session:
+    def __init__(self, summary_llm=None):
+        self.memory = BudgetedConversationMemory(
+            llm=summary_llm, memory_key="chat_history", return_messages=True, output_key="answer")
+        self.chains = {}
+        self.lock = asyncio.Lock()
+        self.last_used = time.monotonic()
+
+class AdvisorService:
+    """Owns the index, retriever, LLM and per-session memories; answers through a bounded queue.
+
+    At most `workers` questions run at once. Up to `queue_size` more wait;
+    beyond that requests are refused (HTTP 503) instead of piling up.
+    Requests give up after `timeout` seconds, and a queued job whose caller
+    already gave up is skipped; a job that already started keeps its session
+    busy until it finishes, so a retry never runs alongside it, and resetting
+    a busy session is refused (HTTP 409). Prompts are chosen by name from
+    Prompts.PROMPTS. Identical opening questions that arrive while one is in
+    flight share its answer. Sessions live in this process, so replicas
+    behind a load balancer need affinity on session_id.
+    """
+
+    def __init__(self, index_dir=INDEX_DIR, workers=WORKERS, queue_size=QUEUE_SIZE,
+                 timeout=TIMEOUT, session_ttl=SESSION_TTL):
+        self.index_dir = index_dir
+        self.workers = workers
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.session_ttl = session_ttl
+        self.sessions = {}
+        self.inflight = {}
+        self.latencies = deque(maxlen=1000)
+        self.counts = {"served": 0, "rejected": 0, "timeouts": 0, "coalesced": 0, "errors": 0}
+
+    def load(self):
+        self.embedding = cached_embeddings()
+        vectorstore = FAISS.load_local(self.index_dir, self.embedding, allow_dangerous_deserialization=True)
+        self.retriever = PackedRetriever(base=HybridRetriever.from_vectorstore(vectorstore, k=8))
+        self.llm = chat_model(streaming=False)
+        self.screener = Screener.from_files()
+        self.answer_cache = AnswerCache(self.embedding)
+
+    async def start(self, app):
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        self.tasks = [asyncio.create_task(self.worker()) for _ in range(self.workers)]
+        self.tasks.append(asyncio.create_task(self.evict_sessions()))
+
+    async def stop(self, app):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+
+    # --- Sessions ---
+    def session(self, session_id):
+        session = self.sessions.get(session_id)
+        if session is None:
+            session = self.sessions[session_id] = Session(self.llm)
+        session.last_used = time.monotonic()
+        return session
+
+    def chain(self, session, prompt):
+        """This session's chain for a named prompt (None: the chain's default prompt)."""
+        if prompt not in session.chains:
+            kwargs = {"combine_docs_chain_kwargs": {"prompt": PROMPTS[prompt]}} if prompt else {}
+            session.chains[prompt] = ConversationalRetrievalChain.from_llm(
+                llm=self.llm,
+                retriever=self.retriever,
+                memory=session.memory,
+                return_source_documents=True,
+                output_key="answer",
+                **kwargs
+            )
+        return session.chains[prompt]
+
+    async def evict_sessions(self):
+        while True:
+            await asyncio.sleep(60)
+            cutoff = time.monotonic() - self.session_ttl
+            for session_id in [s for s, v in self.sessions.items() if v.last_used < cutoff and not v.lock.locked()]:
+                del self.sessions[session_id]
+
+    # --- Work queue ---
+    async def worker(self):
+        while True:
+            job, future = await self.queue.get()
+            try:
+                if future.done():
+                    continue  # caller timed out while this was queued
+                result = await job()
+                if not future.done():
+                    future.set_result(result)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            finally:
+                self.queue.task_done()
+
+    async def submit(self, job):
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait((job, future))
+        except asyncio.QueueFull:
+            raise Busy()
+        return await future
+
+    # --- Answering ---
+    def answer(self, session, question, prompt):
+        """Blocking: screener table plus narrative, or the retrieval chain behind the answer cache."""
+        intent = self.screener.parse_intent(question)
+        if intent:
+            title, table = self.screener.answer(intent)
+            answer = self.llm.invoke(narrative_prompt(question, title, table)).content
+            session.memory.save_context({"question": question}, {"answer": answer})
+            table = table.astype(object).where(table.notna(), None)
+            return {"answer": answer, "sources": SOURCES.split("\n"), "title": title,
+                    "table": table.to_dict(orient="split")}
+        result = cached_invoke(self.answer_cache, self.chain(session, prompt), session.memory, self.retriever, question)
+        return {
+            "answer": result.get("answer"),
+            "sources": [d.metadata.get("source", "N/A") for d in result.get("source_documents", [])],
+            "cached": bool(result.get("cached")),
+        }
+
+    async def ask(self, session_id, question, prompt=None):
+        if prompt is not None and prompt not in PROMPTS:
+            raise UnknownPrompt(f"unknown prompt '{prompt}'; choose from {sorted(PROMPTS)}")
+        session = self.session(session_id)
+        await session.lock.acquire()
+        handed_off = False
+        try:
+            key = None
+            if not session.memory.chat_memory.messages:
+                key = (normalize_question(question), prompt)
+                shared = self.inflight.get(key)
+                if shared is not None:
+                    # Same opening question already being answered: share it
+                    try:
+                        reply = await asyncio.shield(shared)
+                    except asyncio.CancelledError:
+                        if not shared.cancelled():
+                            raise
+                        reply = None  # the first caller gave up; answer it ourselves
+                    if reply is not None:
+                        session.memory.save_context({"question": question}, {"answer": reply["answer"]})
+                        self.counts["coalesced"] += 1
+                        return {**reply, "coalesced": True}
+            started = []
+            def job():
+                started.append(True)
+                return asyncio.to_thread(self.answer, session, question, prompt)
+            task = asyncio.ensure_future(self.submit(job))
+            # From here the session stays locked until the worker has finished (or skipped) the job,
+            # even when this caller times out first
+            task.add_done_callback(lambda t: self._release(session, t))
+            handed_off = True
+            if key is not None:
+                self.inflight[key] = task
+                task.add_done_callback(lambda t: self.inflight.pop(key, None) if self.inflight.get(key) is t else None)
+            try:
+                return await asyncio.shield(task)
+            except asyncio.CancelledError:
+                if not started:
+                    task.cancel()  # still queued: the worker skips it
+                raise
+        finally:
+            if not handed_off:
+                session.lock.release()
+
+    def _release(self, session, task):
+        session.lock.release()
+        if not task.cancelled():
+            task.exception()  # retrieved here when the caller already gave up
+
+    # --- HTTP handlers ---
+    async def handle_ask(self, request):
+        try:
+            body = await request.json()
+            question = body["question"].strip()
+            session_id = str(body.get("session_id") or "anonymous")
+            prompt = body.get("prompt")
+        except Exception:
+            return web.json_response({"error": "expected JSON with 'question' and 'session_id'"}, status=400)
+        start = time.perf_counter()
+        try:
+            reply = await asyncio.wait_for(self.ask(session_id, question, prompt), self.timeout)
+        except Busy:
+            self.counts["rejected"] += 1
+            return web.json_response({"error": "busy"}, status=503, headers={"Retry-After": "2"})
+        except UnknownPrompt as e:
+            return web.json_response({"error": str(e)}, status=400)
+        except asyncio.TimeoutError:
+            self.counts["timeouts"] += 1
+            return web.json_response({"error": "timeout"}, status=504)
+        except Exception as e:
+            self.counts["errors"] += 1
+            return web.json_response({"error": str(e)}, status=500)
+        elapsed = time.perf_counter() - start
+        self.latencies.append(elapsed)
+        self.counts["served"] += 1
+        return web.json_response({**reply, "seconds": round(elapsed, 3)})
+
+    async def handle_reset(self, request):
+        body = await request.json()
+        session_id = str(body.get("session_id"))
+        session = self.sessions.get(session_id)
+        if session is not None and session.lock.locked():
+            # A job is still writing to this memory: dropping it now would lose that turn
+            return web.json_response({"error": "session is busy answering"}, status=409, headers={"Retry-After": "2"})
+        self.sessions.pop(session_id, None)
+        return web.json_response({"ok": True})
+
+    async def handle_health(self, request):
+        lat = sorted(self.latencies)
+        pct = lambda p: round(lat[min(len(lat) - 1, int(p * len(lat)))], 3) if lat else None
+        return web.json_response({
+            "queued": self.queue.qsize(),
+            "queue_size": self.queue_size,
+            "workers": self.workers,
+            "sessions": len(self.sessions),
+            "inflight": len(self.inflight),
+            **self.counts,
+            "p50_s": pct(0.50),
+            "p95_s": pct(0.95),
+            "p99_s": pct(0.99),
+            "answer_cache": self.answer_cache.stats(),
+        })
+
+    def app(self):
+        app = web.Application()
+        app.router.add_post("/ask", self.handle_ask)
+        app.router.add_post("/reset", self.handle_reset)
+        app.router.add_get("/health", self.handle_health)
+        app.on_startup.append(self.start)
+        app.on_cleanup.append(self.stop)
+        return app
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the fund advisor over HTTP/JSON.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8700)
+    parser.add_argument("--workers", type=int, default=WORKERS, help="Questions answered concurrently.")
+    parser.add_argument("--queue", type=int, default=QUEUE_SIZE, help="Questions allowed to wait before 503s.")
+    parser.add_argument("--timeout", type=float, default=TIMEOUT, help="Seconds before a request gets a 504.")
+    args = parser.parse_args()
+
+    load_dotenv()
+    service = AdvisorService(workers=args.workers, queue_size=args.queue, timeout=args.timeout)
+    service.load()
+    web.run_app(service.app(), host=args.host, port=args.port)
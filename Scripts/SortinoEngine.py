@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+
+TRADING_DAYS = 252
+
+risk_free_rate = 0.02
+min_rows_per_year = {3: 50, 5: 125, 10: 250}
+periods = [3, 5, 10]
+
+def window_starts(index, periods, end_date=None):
+    """First row of each trailing window, using the same calendar cut-off as yf.download(start=...)."""
+    end_date = end_date or datetime.today()
+    starts = {}
+    for yrs in periods:
+        start_date = pd.Timestamp((end_date - timedelta(days=365 * yrs)).strftime("%Y-%m-%d"))
+        starts[yrs] = int(index.searchsorted(start_date))
+    return starts
+
+def daily_returns(prices):
+    """Close-to-close returns for every column of a wide price matrix.
+
+    Returns (returns, valid, defined): `valid` marks rows holding a close,
+    `defined` marks rows that also have an earlier close to compare against.
+    Undefined returns are zero so they drop out of every sum.
+    """
+    values = prices.to_numpy(dtype=float)
+    valid = ~np.isnan(values)
+    filled = prices.ffill().to_numpy(dtype=float)
+    prev = np.vstack([np.full((1, values.shape[1]), np.nan), filled[:-1]])
+    defined = valid & ~np.isnan(prev)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        returns = np.where(defined, values / prev - 1, 0.0)
+    return returns, valid, defined
+
+def prefix_sums(values):
+    """Cumulative sums along time with a leading zero row, so rows [a, b) sum to P[b] - P[a]."""
+    out = np.zeros((values.shape[0] + 1,) + values.shape[1:], dtype=float)
+    np.cumsum(values, axis=0, out=out[1:])
+    return out
+
+def first_valid_rows(valid):
+    """For every row, the next row (inclusive) holding a close; len(valid) when there is none."""
+    rows = valid.shape[0]
+    nxt = np.where(valid, np.arange(rows)[:, None], rows)
+    return np.minimum.accumulate(nxt[::-1], axis=0)[::-1]
+
+def window_bounds(valid, starts):
+    """Per-horizon (first_return_row, row_count) arrays for windows running to the last row.
+
+    The first close inside a window only seeds the return series, exactly as
+    pct_change().dropna() does on a freshly downloaded window, so returns are
+    summed from the row after it.
+    """
+    rows, cols = valid.shape
+    nxt = np.vstack([first_valid_rows(valid), np.full((1, cols), rows)])
+    valid_prefix = prefix_sums(valid.astype(float))
+    bounds = {}
+    for yrs, start in starts.items():
+        first = np.minimum(nxt[start] + 1, rows)
+        counts = valid_prefix[rows] - valid_prefix[start]
+        bounds[yrs] = (first, counts)
+    return bounds
+
+def window_sum(prefix, first):
+    """Sum of rows from `first` (per column) through the last row."""
+    cols = np.arange(prefix.shape[1])
+    return prefix[-1] - prefix[first, cols]
+
+def sortino_matrix(prices, periods=periods, risk_free_rate=risk_free_rate,
+                   min_rows_per_year=min_rows_per_year, end_date=None):
+    """Annualized Sortino for every ticker and horizon in one pass.
+
+    `prices` is a dates x tickers frame of closes. Returns a tickers x periods
+    frame; NaN where a window has too few rows, inf where it has no downside.
+    """
+    prices = prices.sort_index()
+    returns, valid, defined = daily_returns(prices)
+    daily_mar = risk_free_rate / TRADING_DAYS
+
+    excess = np.where(defined, returns - daily_mar, 0.0)
+    downside = defined & (returns < daily_mar)
+    excess_sum = prefix_sums(excess)
+    count_sum = prefix_sums(defined.astype(float))
+    down_count_sum = prefix_sums(downside.astype(float))
+    down_sq_sum = prefix_sums(np.where(downside, excess ** 2, 0.0))
+
+    starts = window_starts(prices.index, periods, end_date)
+    out = pd.DataFrame(np.nan, index=prices.columns, columns=list(periods))
+    for yrs, (first, counts) in window_bounds(valid, starts).items():
+        n = window_sum(count_sum, first)
+        n_down = window_sum(down_count_sum, first)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean_excess = window_sum(excess_sum, first) / n
+            downside_dev = np.sqrt(window_sum(down_sq_sum, first) / n_down)
+            annual_excess = mean_excess * TRADING_DAYS
+            annual_downside = downside_dev * np.sqrt(TRADING_DAYS)
+            ratio = np.where(
+                (n_down == 0) | (annual_downside == 0),
+                np.inf,
+                annual_excess / annual_downside,
+            )
+        enough = (counts >= min_rows_per_year[yrs]) & (n > 0)
+        out[yrs] = np.where(enough, ratio, np.nan)
+    return out
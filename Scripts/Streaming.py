@@ -0,0 +1,66 @@
+import time
+from langchain_core.callbacks import BaseCallbackHandler
+
+ANSWER_MARK = "Answer:"
+EXPLANATION_MARK = "Explanation:"
+
+class AnswerStream(BaseCallbackHandler):
+    """Renders answer tokens as the LLM streams them.
+
+    Tokens are ignored until retrieval has finished, so the
+    question-condensing call of ConversationalRetrievalChain never reaches
+    the page; call arm() first when streaming a plain LLM call. Text before
+    "Explanation:" goes to `on_answer` (minus a leading "Answer:"), the rest
+    to `on_explanation`; without `on_explanation` everything goes to
+    `on_answer`. Both receive the full text so far, at most every
+    `interval` seconds. `ttft` is the time from creation to the first
+    rendered token.
+    """
+
+    def __init__(self, on_answer, on_explanation=None, interval=0.05):
+        self.on_answer = on_answer
+        self.on_explanation = on_explanation
+        self.interval = interval
+        self.started = time.perf_counter()
+        self.ttft = None
+        self.armed = False
+        self.text = ""
+        self.last_render = 0.0
+
+    def arm(self):
+        self.armed = True
+        return self
+
+    def on_retriever_end(self, documents, **kwargs):
+        self.armed = True
+
+    def on_llm_new_token(self, token, **kwargs):
+        if not self.armed:
+            return
+        if self.ttft is None:
+            self.ttft = time.perf_counter() - self.started
+        self.text += token
+        now = time.perf_counter()
+        if now - self.last_render >= self.interval:
+            self.last_render = now
+            self.render()
+
+    def on_llm_end(self, response, **kwargs):
+        if self.armed and self.text:
+            self.render()
+
+    def split(self):
+        """(answer, explanation) parts of the text streamed so far."""
+        if self.on_explanation is None:
+            return self.text.strip(), ""
+        answer, _, explanation = self.text.partition(EXPLANATION_MARK)
+        answer = answer.strip()
+        if answer.startswith(ANSWER_MARK):
+            answer = answer[len(ANSWER_MARK):].strip()
+        return answer, explanation.strip()
+
+    def render(self):
+        answer, explanation = self.split()
+        self.on_answer(answer)
+        if self.on_explanation is not None and EXPLANATION_MARK in self.text:
+            self.on_explanation(explanation)
@@ -2,22 +2,18 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 import undetected_chromedriver as uc
-from bs4 import BeautifulSoup
-import yfinance as yf
 import numpy as np
-import pandas as pd
 from datetime import datetime, timedelta
 import json
 import time
 import random
+import argparse
+from functools import partial
 
-target_metrics = {
-    "Mean Annual Return",
-    "Sharpe Ratio",
-    "Treynor Ratio",
-    "Standard Deviation",
-    "Alpha"
-}
+from PriceStore import PriceStore
+from ScraperPool import DriverPool, HostRateLimiter, run_pooled
+from YahooRiskParser import target_metrics, parse_risk_table, save_snapshot
+from FundUniverse import FundUniverse, add_shard_argument, shard_path
 
 USER_AGENTS = [
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/113.0.0.0 Safari/537.36",
@@ -29,12 +25,6 @@ risk_free_rate = 0.02
 min_rows_per_year = {3: 50, 5: 125, 10: 250}
 periods = [3, 5, 10]
 
-tickers = {
-    "Conservative": ["VWELX", "VBTLX", "AGG", "FTBFX", "BOND", "VCIT"],
-    "Moderate":     ["VFIAX", "VTMFX", "PRBLX", "MAMOX", "FMTIX", "VBAIX"],
-    "Aggressive":   ["FSPTX", "VSMAX", "VTIAX", "FCPGX"]
-}
-
 def get_driver():
     options = uc.ChromeOptions()
     options.headless = True
@@ -45,31 +35,30 @@ def get_driver():
     driver = uc.Chrome(options=options)
     return driver
 
-def scrape_selected_risk_metrics(ticker, max_retries=3):
-    url = f"https://finance.yahoo.com/quote/{ticker}/risk"
+def risk_url(ticker):
+    return f"https://finance.yahoo.com/quote/{ticker}/risk"
+
+def fetch_risk_page(driver, ticker):
+    """Load the Yahoo risk page for `ticker` on an existing driver and return its HTML."""
+    driver.get(risk_url(ticker))
+    WebDriverWait(driver, 12).until(
+        EC.presence_of_element_located((By.TAG_NAME, "table"))
+    )
+    return driver.page_source
+
+def read_risk_metrics(driver, ticker, snapshot_dir=None):
+    page_source = fetch_risk_page(driver, ticker)
+    if snapshot_dir:
+        save_snapshot(ticker, page_source, snapshot_dir)
+    return parse_risk_table(page_source)
+
+def scrape_selected_risk_metrics(ticker, max_retries=3, snapshot_dir=None):
     attempt = 0
     while attempt < max_retries:
         driver = None
         try:
             driver = get_driver()
-            driver.get(url)
-            WebDriverWait(driver, 12).until(
-                EC.presence_of_element_located((By.TAG_NAME, "table"))
-            )
-            soup = BeautifulSoup(driver.page_source, "html.parser")
-            rows = soup.find_all("tr", class_="yf-1m2lefb useStripingColumn")
-            results = {}
-            for row in rows:
-                cols = row.find_all("td")
-                if len(cols) >= 7:
-                    metric_name = cols[0].text.strip()
-                    if metric_name in target_metrics:
-                        results[metric_name] = {
-                            "3y": cols[1].text.strip(),
-                            "5y": cols[3].text.strip(),
-                            "10y": cols[5].text.strip()
-                        }
-            return results
+            return read_risk_metrics(driver, ticker, snapshot_dir)
         except Exception as e:
             print(f"Attempt {attempt+1} failed for {ticker}: {e}")
             attempt += 1
@@ -80,6 +69,23 @@ def scrape_selected_risk_metrics(ticker, max_retries=3):
     print(f"Failed to get data for {ticker} after {max_retries} attempts.")
     return {}
 
+def scrape_risk_metrics_pooled(symbols, workers=4, rate=0.5, max_retries=3, snapshot_dir=None):
+    """Scrape many tickers concurrently on a pool of long-lived drivers.
+
+    `rate` is the allowed page loads per second against finance.yahoo.com,
+    shared by all workers; it replaces the fixed sleeps between tickers.
+    """
+    pool = DriverPool(get_driver, workers)
+    limiter = HostRateLimiter(rate)
+    try:
+        results = run_pooled(
+            symbols, partial(read_risk_metrics, snapshot_dir=snapshot_dir), pool, limiter,
+            url_for=risk_url, max_retries=max_retries,
+        )
+    finally:
+        pool.close()
+    return {symbol: data or {} for symbol, data in results.items()}
+
 def calculate_sortino_annual(returns, daily_mar):
     daily_excess = returns - daily_mar
     downside_returns = returns[returns < daily_mar]
@@ -93,21 +99,18 @@ def calculate_sortino_annual(returns, daily_mar):
         return None
     return round(annual_excess / annual_downside, 4)
 
-def fetch_sortino(ticker, years):
+def fetch_sortino(ticker, years, store=None):
+    """Sortino from the local price store; refreshes this ticker first when no store is passed in."""
     end_date = datetime.today()
     start_date = end_date - timedelta(days=365 * years)
     try:
-        data = yf.download(
-            ticker,
-            start=start_date.strftime("%Y-%m-%d"),
-            end=end_date.strftime("%Y-%m-%d"),
-            progress=False,
-        )
-        if isinstance(data.columns, pd.MultiIndex):
-            data.columns = data.columns.get_level_values(0)
+        if store is None:
+            store = PriceStore()
+            store.update([ticker], start_date, end_date)
+        data = store.series(ticker, start_date, end_date).to_frame("Close")
         row_count = len(data)
         minimum_required = min_rows_per_year[years]
-        if "Close" not in data.columns or row_count < minimum_required:
+        if row_count < minimum_required:
             return None
         data["Return"] = data["Close"].pct_change().dropna()
         returns = data["Return"].dropna()
@@ -118,13 +121,43 @@ def fetch_sortino(ticker, years):
         return None
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape Yahoo risk metrics and compute Sortino.")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Browser pool size; above 1 scrapes tickers concurrently.")
+    parser.add_argument("--rate", type=float, default=0.5,
+                        help="Page loads per second against Yahoo in pooled mode.")
+    parser.add_argument("--snapshot-dir", default=None,
+                        help="Also save each raw page (gzipped) under this folder for offline re-parsing.")
+    parser.add_argument("--offline", action="store_true",
+                        help="Compute Sortino from prices already in the local price store instead of refreshing it.")
+    add_shard_argument(parser)
+    args = parser.parse_args()
+
+    tickers = FundUniverse.load(shard=args.shard).tickers_by_profile()
     all_results = {}
 
+    # Refresh every ticker's price history in one batched, tail-only pass (a no-op offline)
+    store = PriceStore(offline=args.offline)
+    store.update(
+        [symbol for symbol_list in tickers.values() for symbol in symbol_list],
+        datetime.today() - timedelta(days=365 * max(periods)),
+    )
+
+    pooled = {}
+    if args.workers > 1:
+        symbols = [symbol for symbol_list in tickers.values() for symbol in symbol_list]
+        print(f"Scraping {len(symbols)} tickers on {args.workers} browsers...")
+        pooled = scrape_risk_metrics_pooled(
+            symbols, workers=args.workers, rate=args.rate, snapshot_dir=args.snapshot_dir
+        )
+
     for category, symbol_list in tickers.items():
         for symbol in symbol_list:
-            print(f"Scraping {symbol}...")
-
-            yahoo_data = scrape_selected_risk_metrics(symbol)
+            if args.workers > 1:
+                yahoo_data = pooled.get(symbol, {})
+            else:
+                print(f"Scraping {symbol}...")
+                yahoo_data = scrape_selected_risk_metrics(symbol, snapshot_dir=args.snapshot_dir)
             all_metrics = {}
 
             # Copy over Yahoo metrics if present
@@ -136,7 +169,7 @@ if __name__ == "__main__":
             # Add calculated Sortino for each period
             sortino_dict = {}
             for yrs in periods:
-                sortino = fetch_sortino(symbol, yrs)
+                sortino = fetch_sortino(symbol, yrs, store)
                 label = f"{yrs}y"
                 sortino_dict[label] = "N/A" if sortino is None else sortino
             all_metrics["Sortino Ratio"] = sortino_dict
@@ -147,10 +180,12 @@ if __name__ == "__main__":
                 "Metrics": all_metrics
             }
 
-            time.sleep(random.uniform(2.5, 4.5))
+            if args.workers <= 1:
+                time.sleep(random.uniform(2.5, 4.5))
 
     # Save results to JSON
-    with open("fund_risk_metrics.json", "w") as f:
+    output = shard_path("fund_risk_metrics.json", args.shard)
+    with open(output, "w") as f:
         json.dump(all_results, f, indent=2)
 
-    print("All fund data saved to 'fund_risk_metrics.json'")
+    print(f"All fund data saved to '{output}'")
@@ -0,0 +1,91 @@
+import os
+import gzip
+import glob
+import json
+import argparse
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from lxml import html as lxml_html
+except ImportError:
+    lxml_html = None
+
+target_metrics = {
+    "Mean Annual Return",
+    "Sharpe Ratio",
+    "Treynor Ratio",
+    "Standard Deviation",
+    "Alpha"
+}
+
+SNAPSHOT_DIR = "Data/snapshots/yahoo_risk"
+
+def save_snapshot(ticker, page_source, root=SNAPSHOT_DIR, day=None):
+    """Write a raw risk page to <root>/<YYYY-MM-DD>/<TICKER>.html.gz and return the path."""
+    day = day or datetime.today().strftime("%Y-%m-%d")
+    folder = os.path.join(root, day)
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, f"{ticker}.html.gz")
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        f.write(page_source)
+    return path
+
+def load_snapshot(path):
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return f.read()
+
+def _rows_lxml(page_source):
+    tree = lxml_html.fromstring(page_source)
+    for row in tree.iter("tr"):
+        yield [td.text_content().strip() for td in row.findall("td")]
+
+def _rows_bs4(page_source):
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(page_source, "html.parser")
+    for row in soup.find_all("tr"):
+        yield [td.text.strip() for td in row.find_all("td")]
+
+def parse_risk_table(page_source):
+    """Extract target_metrics from a Yahoo risk page as {metric: {"3y", "5y", "10y"}}.
+
+    Rows are matched on their first cell rather than Yahoo's generated CSS
+    class, so markup churn only breaks parsing if the table layout changes.
+    """
+    rows = _rows_lxml(page_source) if lxml_html is not None else _rows_bs4(page_source)
+    results = {}
+    for cols in rows:
+        if len(cols) >= 7 and cols[0] in target_metrics:
+            results[cols[0]] = {
+                "3y": cols[1],
+                "5y": cols[3],
+                "10y": cols[5]
+            }
+    return results
+
+def parse_snapshot_file(path):
+    ticker = os.path.basename(path).removesuffix(".html.gz")  # tickers like BRK.B keep their dot
+    return ticker, parse_risk_table(load_snapshot(path))
+
+def parse_snapshots(folder, workers=None):
+    """Re-parse every <TICKER>.html.gz in `folder` across processes."""
+    paths = sorted(glob.glob(os.path.join(folder, "*.html.gz")))
+    if not paths:
+        return {}
+    if workers == 1:
+        return dict(map(parse_snapshot_file, paths))
+    chunksize = max(1, len(paths) // ((workers or os.cpu_count() or 1) * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return dict(executor.map(parse_snapshot_file, paths, chunksize=chunksize))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-parse saved Yahoo risk pages without a browser.")
+    parser.add_argument("folder", help="Snapshot folder, e.g. Data/snapshots/yahoo_risk/2025-06-30")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", default="yahoo_risk_metrics.json")
+    args = parser.parse_args()
+
+    parsed = parse_snapshots(args.folder, workers=args.workers)
+    with open(args.output, "w") as f:
+        json.dump(parsed, f, indent=2)
+    print(f"Parsed {len(parsed)} snapshots into '{args.output}'")
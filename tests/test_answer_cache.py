@@ -0,0 +1,91 @@
+import sqlite3
+import pytest
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain.chains import ConversationalRetrievalChain
+from langchain.memory import ConversationBufferMemory
+from langchain.prompts import PromptTemplate
+
+from Fakes import HashEmbeddings, StubChatModel
+from AnswerCache import AnswerCache, cached_invoke, chain_fingerprint
+
+P1 = PromptTemplate.from_template("Answer briefly.\n{context}\nQuestion: {question}")
+P2 = PromptTemplate.from_template("Answer in detail, citing sources.\n{context}\nQuestion: {question}")
+QUESTION = "What is the Sortino ratio of VWELX?"
+
+class CountingRetriever(BaseRetriever):
+    calls: int = 0
+
+    def _get_relevant_documents(self, query, *, run_manager=None):
+        self.calls += 1
+        return [Document(page_content="VWELX Sortino Ratio 10y: 0.91", metadata={"source": "Data/fund_risk_metrics.json"})]
+
+def session(llm, retriever, prompt):
+    memory = ConversationBufferMemory(memory_key="chat_history", return_messages=True, output_key="answer")
+    chain = ConversationalRetrievalChain.from_llm(
+        llm=llm, retriever=retriever, memory=memory, return_source_documents=True,
+        combine_docs_chain_kwargs={"prompt": prompt}, output_key="answer")
+    return chain, memory
+
+@pytest.fixture
+def cache(tmp_path):
+    return AnswerCache(HashEmbeddings(), path=str(tmp_path / "answers.sqlite"), watched=[])
+
+@pytest.fixture
+def llm():
+    return StubChatModel(latency=0.0)
+
+def ask(cache, llm, retriever, prompt, question=QUESTION):
+    chain, memory = session(llm, retriever, prompt)
+    return cached_invoke(cache, chain, memory, retriever, question)
+
+def test_same_prompt_hits_across_sessions(cache, llm):
+    retriever = CountingRetriever()
+    first = ask(cache, llm, retriever, P1)
+    second = ask(cache, llm, retriever, P1)
+    assert not first.get("cached")
+    assert second["cached"] and second["answer"] == first["answer"]
+    assert llm.calls == 1
+
+def test_different_prompt_misses(cache, llm):
+    retriever = CountingRetriever()
+    first = ask(cache, llm, retriever, P1)
+    second = ask(cache, llm, retriever, P2)
+    assert not second.get("cached")
+    assert second["answer"] != first["answer"]
+    assert llm.calls == 2
+    # Each prompt now has its own entry
+    assert ask(cache, llm, retriever, P2)["answer"] == second["answer"]
+
+def test_chain_fingerprint_tracks_prompt_and_model(llm):
+    retriever = CountingRetriever()
+    assert chain_fingerprint(session(llm, retriever, P1)[0]) == chain_fingerprint(session(llm, retriever, P1)[0])
+    assert chain_fingerprint(session(llm, retriever, P1)[0]) != chain_fingerprint(session(llm, retriever, P2)[0])
+
+def test_miss_retrieves_once(cache, llm):
+    retriever = CountingRetriever()
+    result = ask(cache, llm, retriever, P1)
+    assert retriever.calls == 1
+    assert [d.page_content for d in result["source_documents"]] == ["VWELX Sortino Ratio 10y: 0.91"]
+
+def test_follow_up_bypasses_cache(cache, llm):
+    retriever = CountingRetriever()
+    chain, memory = session(llm, retriever, P1)
+    cached_invoke(cache, chain, memory, retriever, QUESTION)
+    result = cached_invoke(cache, chain, memory, retriever, QUESTION)
+    assert not result.get("cached")
+    assert cache.stats()["misses"] == 1
+
+def test_entries_without_chain_never_match(tmp_path, llm):
+    path = str(tmp_path / "answers.sqlite")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE answers (id INTEGER PRIMARY KEY, version TEXT NOT NULL, question TEXT NOT NULL,"
+        " qvec BLOB NOT NULL, context TEXT NOT NULL, answer TEXT NOT NULL, sources TEXT NOT NULL,"
+        " latency REAL NOT NULL, created REAL NOT NULL)")
+    conn.commit()
+    conn.close()
+    cache = AnswerCache(HashEmbeddings(), path=path, watched=[])
+    retriever = CountingRetriever()
+    cache.store(QUESTION, retriever.invoke(QUESTION), {"answer": "old"}, 1.0)
+    assert not ask(cache, llm, retriever, P1).get("cached")
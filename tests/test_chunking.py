@@ -0,0 +1,34 @@
+import pytest
+
+from Chunking import default_splitter, chunk_text
+
+@pytest.mark.parametrize("text, sentences", [
+    ("Rates rose 1.99 pct. Bonds fell.", ["Rates rose 1.99 pct.", "Bonds fell."]),
+    ("See e.g. the U.S. market. Then stop.", ["See e.g. the U.S. market.", "Then stop."]),
+    ('He said "buy." Then sold.', ['He said "buy."', "Then sold."]),
+    ("Funds (like VWELX.) Then more.", ["Funds (like VWELX.)", "Then more."]),
+    # punkt breaks before punctuation that follows the point with no space
+    ('"definition": "The value of assets.", "importance": "High."',
+     ['"definition": "The value of assets.', '", "importance": "High."']),
+    ("Funds in the (U.S.), mostly. End.", ["Funds in the (U.S.), mostly.", "End."]),
+])
+def test_sentence_boundaries(text, sentences):
+    assert default_splitter(text) == sentences
+
+def test_character_packing_matches_old_rule():
+    sentences = [f"Sentence number {i} is here." for i in range(200)]
+    chunks, cur = [], ""
+    for s in sentences:
+        if len(cur) + len(s) < 800:
+            cur += " " + s
+        else:
+            chunks.append(cur.strip())
+            cur = s
+    chunks.append(cur.strip())
+    assert chunk_text(" ".join(sentences)) == chunks
+
+def test_token_budget_and_overlap():
+    text = " ".join(f"Sentence {i} talks about fund risk." for i in range(100))
+    chunks = chunk_text(text, max_tokens=50, overlap=10, token_counter=lambda s: len(s.split()))
+    assert all(len(c.split()) <= 50 for c in chunks)
+    assert chunks[1].split(".")[0] + "." in chunks[0]
@@ -0,0 +1,105 @@
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_community.vectorstores import FAISS
+
+from Fakes import HashEmbeddings
+from Chunking import count_tokens
+from HybridRetriever import HybridRetriever, STATS_EVENT as HYBRID_EVENT
+from ContextPacker import PackedRetriever, parse_entry, STATS_EVENT
+
+METRICS = Document(page_content='Fund: VWELX\nRisk Metrics:\n{"Sharpe Ratio": {"3y": "0.31", "5y": "0.62"}, "Alpha": {"3y": "-0.42", "5y": "0.85"}}',
+                   metadata={"source": "fund_risk_metrics.json", "key": "VWELX"})
+METADATA = Document(page_content='VWELX\n{"name": "Vanguard Wellington", "category": "Allocation--50% to 70% Equity"}',
+                    metadata={"source": "fund_metadata.json", "key": "VWELX"})
+FRAGMENT = Document(page_content="Diversification spreads risk across many holdings and sectors.", metadata={"source": "Definitions.json"})
+
+class ListRetriever(BaseRetriever):
+    docs: list
+
+    def _get_relevant_documents(self, query, *, run_manager=None):
+        return list(self.docs)
+
+class StatsCollector(BaseCallbackHandler):
+    def __init__(self):
+        self.events = {}
+
+    def on_custom_event(self, name, data, **kwargs):
+        self.events[name] = data
+
+def packer(docs=(), **kwargs):
+    return PackedRetriever(base=ListRetriever(docs=list(docs)), **kwargs)
+
+def unit(text, key=None):
+    return {"text": text, "sources": ["x.json"], "key": key}
+
+def test_parse_entry_reads_whole_json_entries_only():
+    assert parse_entry(METADATA) == ("VWELX", {"name": "Vanguard Wellington", "category": "Allocation--50% to 70% Equity"})
+    assert parse_entry(FRAGMENT) == (None, None)
+    cut = Document(page_content='VWELX\n{"name": "Vanguard', metadata={"key": "VWELX"})
+    assert parse_entry(cut) == ("VWELX", None)
+
+def test_dedupe_drops_chunks_contained_in_earlier_ones():
+    longer = Document(page_content=FRAGMENT.page_content + " Rebalance yearly.")
+    other = Document(page_content="Bond funds hold fixed income securities.")
+    assert packer().dedupe([longer, FRAGMENT, other]) == [longer, other]
+    # Containment is measured against the later chunk: a superset is kept
+    assert packer().dedupe([FRAGMENT, longer]) == [FRAGMENT, longer]
+
+def test_merge_groups_entries_by_key():
+    units = packer().merge([METRICS, FRAGMENT, METADATA])
+    assert [u["key"] for u in units] == ["VWELX", None]
+    fund = units[0]
+    assert fund["sources"] == ["fund_risk_metrics.json", "fund_metadata.json"]
+    assert fund["text"].splitlines() == [
+        "VWELX (Vanguard Wellington)",
+        "category: Allocation--50% to 70% Equity",
+        "Metric | 3y | 5y",
+        "Sharpe Ratio | 0.31 | 0.62",
+        "Alpha | -0.42 | 0.85",
+    ]
+    assert units[1]["text"] == FRAGMENT.page_content
+
+def test_mmr_moves_redundant_blocks_down():
+    first = unit("VWELX Sharpe Ratio 3y 0.31 5y 0.62 10y 0.71")
+    echo = unit("VWELX Sharpe Ratio 3y 0.31 5y 0.62 10y 0.70")
+    other = unit("AGG tracks the US aggregate bond market")
+    assert packer().mmr("VWELX Sharpe", [first, echo, other]) == [first, other, echo]
+    assert packer(lambda_mult=1.0).mmr("VWELX Sharpe", [first, echo, other]) == [first, echo, other]
+
+def test_mmr_with_embeddings_puts_the_closest_block_first():
+    blocks = [unit("Bond funds hold fixed income."), unit("VWELX Sharpe Ratio 0.31")]
+    ordered = packer(embedding=HashEmbeddings()).mmr("VWELX Sharpe Ratio 0.31", blocks)
+    assert ordered[0] is blocks[1]
+
+def test_pack_skips_blocks_that_do_not_fit():
+    a, b, c = unit("alpha " * 40), unit("beta " * 200), unit("gamma " * 10)
+    budget = count_tokens(a["text"]) + count_tokens(c["text"])
+    packed, used = packer(max_tokens=budget).pack([a, b, c])
+    assert packed == [a, c] and used == budget
+
+def test_pack_truncates_an_oversized_first_block():
+    big = unit("word " * 500)
+    packed, used = packer(max_tokens=50).pack([big])
+    assert len(packed) == 1 and packed[0]["text"] == big["text"][:200]
+    assert used == count_tokens(big["text"][:200])
+
+def test_invoke_returns_packed_documents_and_reports_stats():
+    retriever = packer([METRICS, FRAGMENT, METADATA, Document(page_content=FRAGMENT.page_content, metadata={"source": "copy.json"})])
+    collector = StatsCollector()
+    docs = retriever.invoke("VWELX", config={"callbacks": [collector]})
+    assert [d.metadata for d in docs] == [
+        {"source": "fund_risk_metrics.json, fund_metadata.json", "key": "VWELX"},
+        {"source": "Definitions.json", "key": None},
+    ]
+    stats = collector.events[STATS_EVENT]
+    assert (stats["retrieved"], stats["after_dedupe"], stats["blocks"]) == (4, 3, 2)
+    assert stats["tokens_after"] == sum(count_tokens(d.page_content) for d in docs)
+    assert "last_stats" not in PackedRetriever.model_fields
+
+def test_base_retriever_stats_reach_the_caller():
+    base = HybridRetriever.from_vectorstore(FAISS.from_documents([METRICS, METADATA, FRAGMENT], HashEmbeddings()), k=3)
+    collector = StatsCollector()
+    PackedRetriever(base=base).invoke("Tell me about VWELX", config={"callbacks": [collector]})
+    assert collector.events[HYBRID_EVENT]["candidates"] == 2
+    assert collector.events[STATS_EVENT]["retrieved"] == 3
@@ -0,0 +1,77 @@
+import threading
+from types import SimpleNamespace
+
+from Fakes import StubChatModel
+from ConversationMemory import BudgetedConversationMemory, summary_executor
+
+class FlakySummarizer:
+    """Fails the first `failures` calls, then returns a summary naming every line it was given."""
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def invoke(self, prompt):
+        with self.lock:
+            self.calls += 1
+            if self.calls <= self.failures:
+                raise RuntimeError("summarizer down")
+        lines = prompt.split("New lines of conversation:")[1].split("New summary:")[0]
+        previous = prompt.split("Current summary:")[1].split("New lines of conversation:")[0].strip()
+        asked = [l.split("Human: ")[1] for l in lines.splitlines() if l.startswith("Human: ")]
+        return SimpleNamespace(content=" ".join(p for p in [previous.replace("(none)", "")] + asked if p).strip())
+
+def memory(llm, **kwargs):
+    return BudgetedConversationMemory(llm=llm, memory_key="chat_history", return_messages=True,
+                                      output_key="answer", window_turns=2, **kwargs)
+
+def talk(mem, turns, start=0):
+    for i in range(start, start + turns):
+        mem.save_context({"question": f"q{i}"}, {"answer": f"a{i}"})
+
+def test_summary_covers_every_evicted_turn():
+    mem = memory(FlakySummarizer())
+    talk(mem, 6)
+    mem.wait()
+    assert mem.summary.split() == ["q0", "q1", "q2", "q3"]
+    assert [m.content for m in mem.chat_memory.messages] == ["q4", "a4", "q5", "a5"]
+    assert mem.stats()["pending_messages"] == 0
+
+def test_failed_summary_is_retried_next_turn():
+    llm = FlakySummarizer(failures=1)
+    mem = memory(llm)
+    talk(mem, 3)
+    mem.wait()
+    assert mem.summary == "" and mem.stats()["summary_errors"] == 1
+    assert mem.stats()["pending_messages"] == 2
+    talk(mem, 1, start=3)
+    mem.wait()
+    assert mem.summary.split() == ["q0", "q1"]
+    assert mem.stats()["pending_messages"] == 0
+
+def test_failed_summaries_fall_back_to_truncation():
+    mem = memory(FlakySummarizer(failures=10 ** 6), max_tokens=20)
+    talk(mem, 200)
+    mem.wait()
+    history = mem.load_memory_variables({})["chat_history"]
+    assert sum(len(m.content) for m in history) <= 20 * 4
+    assert mem.stats()["pending_messages"] <= 20  # bounded by the budget, not by the 400 evicted messages
+
+def test_memories_share_one_executor():
+    first, second = memory(StubChatModel(latency=0.0)), memory(StubChatModel(latency=0.0))
+    talk(first, 4)
+    talk(second, 4)
+    first.wait()
+    second.wait()
+    assert first._future is not None and second._future is not None
+    assert summary_executor() is summary_executor()
+    assert first.summary and second.summary
+
+def test_clear_discards_summary_in_flight():
+    mem = memory(StubChatModel(latency=0.2))
+    talk(mem, 3)
+    mem.clear()
+    mem.wait()
+    assert mem.summary == ""
+    assert mem.stats()["pending_messages"] == 0
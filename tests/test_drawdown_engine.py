@@ -0,0 +1,36 @@
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+from DrawdownEngine import drawdown_matrix
+
+END = datetime(2025, 7, 1)
+DAYS = pd.bdate_range(end="2025-06-30", periods=252 * 4)
+
+def prices(**paths):
+    return pd.DataFrame({ticker: np.asarray(path, dtype=float) for ticker, path in paths.items()}, index=DAYS)
+
+def test_fund_that_never_fell_has_no_duration():
+    table = drawdown_matrix(prices(UP=np.linspace(100, 200, len(DAYS))), periods=[3], end_date=END)
+    row = table.loc[("UP", 3)]
+    assert row["Max Drawdown"] == 0.0
+    assert row["Recovery Date"] == row["Peak Date"]
+    assert row["Duration Days"] == 0
+    assert row["Longest Underwater Days"] == 0
+
+def test_recovered_and_underwater_funds():
+    n = len(DAYS)
+    dip = np.concatenate([np.linspace(100, 120, n // 2), np.linspace(120, 90, n // 4), np.linspace(90, 130, n - n // 2 - n // 4)])
+    sink = np.linspace(100, 60, n)
+    table = drawdown_matrix(prices(DIP=dip, SINK=sink), periods=[3], end_date=END)
+
+    dip_row = table.loc[("DIP", 3)]
+    assert dip_row["Max Drawdown"] == 90 / 120 - 1
+    assert dip_row["Valley Date"] == DAYS[n // 2 + n // 4 - 1]
+    recovery = dip_row["Recovery Date"]
+    assert recovery > dip_row["Valley Date"] and dip[DAYS.get_loc(recovery)] >= 120
+    assert dip_row["Duration Days"] == (recovery - dip_row["Peak Date"]).days
+
+    sink_row = table.loc[("SINK", 3)]
+    assert pd.isna(sink_row["Recovery Date"])
+    assert sink_row["Duration Days"] == (DAYS[-1] - sink_row["Peak Date"]).days
@@ -0,0 +1,91 @@
+import pytest
+
+import EmbeddingCache
+from EmbeddingCache import CachedEmbeddings
+from Fakes import HashEmbeddings
+
+class CountingEmbeddings(HashEmbeddings):
+    def __init__(self):
+        super().__init__(dim=8)
+        self.embedded = []
+
+    def embed_documents(self, texts):
+        self.embedded.extend(texts)
+        return super().embed_documents(texts)
+
+    def embed_query(self, text):
+        self.embedded.append(text)
+        return super().embed_query(text)
+
+class Ticker:
+    """Stands in for the `time` module: every call is one second later."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def time(self):
+        self.now += 1
+        return self.now
+
+@pytest.fixture(autouse=True)
+def clock(monkeypatch):
+    monkeypatch.setattr(EmbeddingCache, "time", Ticker())
+
+def cache(tmp_path, backend=None, **kwargs):
+    return CachedEmbeddings(backend or CountingEmbeddings(), model="hash", path=str(tmp_path / "embeddings.sqlite"), **kwargs)
+
+def rows(embedding):
+    (count,) = embedding.conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+    return count
+
+def test_repeated_texts_are_served_from_the_cache(tmp_path):
+    backend = CountingEmbeddings()
+    embedding = cache(tmp_path, backend)
+    first = embedding.embed_documents(["VWELX", "AGG", "VWELX"])
+    assert backend.embedded == ["VWELX", "AGG"]
+    assert embedding.stats() == {"hits": 0, "misses": 3, "hit_rate": 0.0}
+    assert embedding.embed_documents(["AGG", "VWELX"]) == [first[1], first[0]]
+    assert embedding.embed_query("VWELX") == first[0]
+    assert backend.embedded == ["VWELX", "AGG"]
+    assert embedding.stats() == {"hits": 3, "misses": 3, "hit_rate": 0.5}
+    assert first[0] == pytest.approx(HashEmbeddings(dim=8).embed_query("VWELX"))
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    backend = CountingEmbeddings()
+    embedding = cache(tmp_path, backend, max_entries=2)
+    embedding.embed_documents(["a"])
+    embedding.embed_documents(["b"])
+    embedding.embed_query("a")  # a is now more recent than b
+    embedding.embed_documents(["c"])
+    assert embedding.count == rows(embedding) == 2
+    backend.embedded.clear()
+    embedding.embed_documents(["a", "c"])
+    assert backend.embedded == []
+    embedding.embed_documents(["b"])
+    assert backend.embedded == ["b"]
+    assert embedding.count == rows(embedding) == 2
+
+def test_one_call_larger_than_the_cache_keeps_max_entries(tmp_path):
+    embedding = cache(tmp_path, max_entries=3)
+    embedding.embed_documents([f"text {i}" for i in range(10)])
+    assert embedding.count == rows(embedding) == 3
+
+def test_count_is_read_once_and_kept_exact(tmp_path):
+    embedding = cache(tmp_path)
+    embedding.embed_documents(["a", "b"])
+    # Another thread storing the same text first must not be counted twice
+    embedding._store([(embedding._hash("a"), [0.0] * 8)], now=0)
+    embedding.conn.commit()
+    assert embedding.count == rows(embedding) == 2
+    reopened = cache(tmp_path, max_entries=2)
+    assert reopened.count == 2
+    reopened.embed_documents(["c"])
+    assert reopened.count == rows(reopened) == 2
+    assert reopened.embed_documents(["a"])[0] == embedding.embed_documents(["a"])[0]
+
+def test_models_do_not_share_vectors(tmp_path):
+    embedding = cache(tmp_path)
+    embedding.embed_documents(["VWELX"])
+    other = CachedEmbeddings(CountingEmbeddings(), model="other", path=str(tmp_path / "embeddings.sqlite"))
+    other.embed_documents(["VWELX"])
+    assert other.stats()["misses"] == 1 and other.count == 2
@@ -0,0 +1,44 @@
+import argparse
+import pytest
+
+from FundUniverse import FundUniverse, parse_shard, add_shard_argument, in_shard, shard_path
+
+@pytest.mark.parametrize("text, shard", [("0/1", (0, 1)), ("1/4", (1, 4)), ("3/4", (3, 4))])
+def test_parse_shard(text, shard):
+    assert parse_shard(text) == shard
+
+@pytest.mark.parametrize("text", ["4/4", "-1/4", "0/0", "1", "a/b", "1/2/3", ""])
+def test_parse_shard_rejects(text):
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_shard(text)
+
+def test_shard_argument():
+    parser = argparse.ArgumentParser()
+    add_shard_argument(parser)
+    assert parser.parse_args([]).shard is None
+    assert parser.parse_args(["--shard", "2/3"]).shard == (2, 3)
+    with pytest.raises(SystemExit):
+        parser.parse_args(["--shard", "3/3"])
+
+@pytest.mark.parametrize("count", [1, 2, 3, 4, 7])
+def test_shards_partition_every_fund(count):
+    tickers = FundUniverse.load().tickers() + [f"T{i:04d}" for i in range(500)]
+    for ticker in tickers:
+        assert in_shard(ticker, None)
+        assert sum(in_shard(ticker, (i, count)) for i in range(count)) == 1
+
+def test_sharded_universe_loads_cover_it_once():
+    full = FundUniverse.load().tickers()
+    shards = [FundUniverse.load(shard=(i, 3)).tickers() for i in range(3)]
+    assert sorted(t for shard in shards for t in shard) == sorted(full)
+    # Each shard keeps file order
+    assert all(shard == [t for t in full if t in shard] for shard in shards)
+
+@pytest.mark.parametrize("path, shard, expected", [
+    ("sortino.json", None, "sortino.json"),
+    ("sortino.json", (1, 4), "sortino.shard-1-of-4.json"),
+    ("Data/fund_risk_metrics.json", (0, 2), "Data/fund_risk_metrics.shard-0-of-2.json"),
+    ("Data/rolling", (0, 2), "Data/rolling.shard-0-of-2"),
+])
+def test_shard_path(path, shard, expected):
+    assert shard_path(path, shard) == expected
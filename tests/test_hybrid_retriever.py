@@ -0,0 +1,103 @@
+import math
+import threading
+import numpy as np
+import pytest
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.documents import Document
+from langchain_community.vectorstores import FAISS
+
+from Fakes import HashEmbeddings
+from HybridRetriever import BM25, HybridRetriever, rrf, tokenize, STATS_EVENT
+
+METRICS, METADATA, DEFINITIONS = "fund_risk_metrics.json", "fund_metadata.json", "Definitions.json"
+DOCS = [
+    Document(page_content='Fund: VWELX\nRisk Metrics:\n{"Sharpe Ratio": {"3y": "0.31"}}', metadata={"source": METRICS, "key": "VWELX"}),
+    Document(page_content='VWELX\n{"name": "Vanguard Wellington", "category": "Allocation"}', metadata={"source": METADATA, "key": "VWELX"}),
+    Document(page_content='Fund: VFIAX\nRisk Metrics:\n{"Sharpe Ratio": {"3y": "0.52"}}', metadata={"source": METRICS, "key": "VFIAX"}),
+    Document(page_content='Fund: AGG\nRisk Metrics:\n{"Sharpe Ratio": {"3y": "-0.4"}}', metadata={"source": METRICS, "key": "AGG"}),
+    Document(page_content="Sortino Ratio\nExcess return per unit of downside deviation.", metadata={"source": DEFINITIONS, "key": "Sortino Ratio"}),
+    Document(page_content="Sharpe Ratio\nExcess return per unit of total volatility.", metadata={"source": DEFINITIONS, "key": "Sharpe Ratio"}),
+    Document(page_content="Diversification spreads risk across many holdings.", metadata={"source": DEFINITIONS}),
+]
+
+class StatsCollector(BaseCallbackHandler):
+    def __init__(self):
+        self.events = []
+
+    def on_custom_event(self, name, data, **kwargs):
+        self.events.append((name, data))
+
+@pytest.fixture(scope="module")
+def retriever():
+    return HybridRetriever.from_vectorstore(FAISS.from_documents(DOCS, HashEmbeddings()), k=2)
+
+def contents(docs):
+    return [d.page_content for d in docs]
+
+# --- BM25 and fusion ---
+def test_bm25_matches_the_okapi_formula():
+    texts = ["apple banana", "apple apple cherry", "durian"]
+    bm25 = BM25(texts)
+    scores = bm25.scores("Apple?")
+    avg = np.mean([len(tokenize(t)) for t in texts])
+    idf = math.log(1 + (3 - 2 + 0.5) / (2 + 0.5))
+    for row, (tf, length) in enumerate([(1, 2), (2, 3)]):
+        expected = idf * tf * 2.5 / (tf + 1.5 * (0.25 + 0.75 * length / avg))
+        assert scores[row] == pytest.approx(expected, rel=1e-6)
+    assert scores[2] == 0
+    assert not bm25.scores("kiwi").any()
+    assert bm25.idf["durian"] > bm25.idf["apple"]
+
+def test_rrf_adds_weighted_reciprocal_ranks():
+    fused = rrf([[1, 2], [2, 3]], [1.0, 2.0], k=60)
+    assert fused == pytest.approx({1: 1 / 61, 2: 1 / 62 + 2 / 61, 3: 2 / 62})
+
+# --- Candidate filter ---
+def test_candidates_follow_tickers_and_terms(retriever):
+    index = retriever.index
+    assert sorted(index.candidates("How volatile is VWELX?")) == [0, 1]
+    assert sorted(index.candidates("Compare VWELX and AGG")) == [0, 1, 3]
+    assert list(index.candidates("What does the sortino ratio measure?")) == [4]
+    # Tickers must be written in capitals; unknown ones are ignored
+    assert index.candidates("how volatile is vwelx?") is None
+    assert index.candidates("Is ZZZZ a good fund?") is None
+
+def test_candidates_respect_sources(retriever):
+    index = retriever.index
+    assert list(index.candidates("Tell me about VWELX", sources=[METADATA])) == [1]
+    assert index.candidates("What does the sortino ratio measure?", sources=[METRICS]) is None
+
+# --- Retrieval ---
+def test_named_keys_limit_the_results(retriever):
+    # Both the fund and the term it names are candidates; nothing else is
+    docs = retriever.invoke("What is the Sharpe ratio of VFIAX?")
+    assert {d.metadata["key"] for d in docs} == {"VFIAX", "Sharpe Ratio"}
+    assert {d.metadata["key"] for d in retriever.invoke("Tell me about VWELX")} == {"VWELX"}
+
+def test_too_few_tagged_chunks_are_topped_up(retriever):
+    docs = retriever.model_copy(update={"k": 4}).invoke("What is the Sortino ratio?")
+    assert docs[0].metadata["key"] == "Sortino Ratio"
+    assert len(docs) == 4 and len(set(contents(docs))) == 4
+
+def test_sources_limit_global_search(retriever):
+    docs = retriever.model_copy(update={"sources": [DEFINITIONS], "k": 3}).invoke("diversification")
+    assert {d.metadata["source"] for d in docs} == {DEFINITIONS}
+
+# --- Per-call stats ---
+def test_stats_go_to_each_callers_callbacks(retriever):
+    assert "last_stats" not in HybridRetriever.model_fields
+    collectors = [StatsCollector() for _ in range(8)]
+    queries = ["Tell me about VWELX", "diversification"] * 4
+    threads = [
+        threading.Thread(target=retriever.invoke, args=(q,), kwargs={"config": {"callbacks": [c]}})
+        for q, c in zip(queries, collectors)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    for query, collector in zip(queries, collectors):
+        [(name, stats)] = collector.events
+        assert name == STATS_EVENT
+        assert stats["candidates"] == (2 if "VWELX" in query else None)
+        assert stats["seconds"] >= 0
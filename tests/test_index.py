@@ -0,0 +1,109 @@
+import pytest
+from langchain_core.documents import Document
+
+from Fakes import HashEmbeddings, RateLimited
+from EmbeddingCache import CachedEmbeddings
+from FundUniverse import FundUniverse
+from Index import DocumentSource, update_index, load_manifest, doc_id
+
+FILES = ["Data/fund_risk_metrics.json", "Data/fund_metadata.json", "Data/Definitions.json"]
+
+class CountingEmbeddings(HashEmbeddings):
+    """HashEmbeddings that counts embedded texts and can fail every batch after the first `ok_batches`."""
+
+    def __init__(self, ok_batches=None):
+        super().__init__()
+        self.embedded = 0
+        self.batches = 0
+        self.ok_batches = ok_batches
+
+    def embed_documents(self, texts):
+        self.batches += 1
+        if self.ok_batches is not None and self.batches > self.ok_batches:
+            raise RateLimited(retry_after=0)
+        self.embedded += len(texts)
+        return super().embed_documents(texts)
+
+def docs(n, changed=()):
+    return [
+        Document(page_content=f"Chunk {i} about fund risk{' (revised)' if i in changed else ''}.",
+                 metadata={"source": "synthetic", "key": f"K{i}"})
+        for i in range(n)
+    ]
+
+def build(index_dir, documents, embedding, **kwargs):
+    kwargs.setdefault("model", "hash")
+    return update_index(documents, embedding, str(index_dir), batch_size=4, concurrency=2,
+                        tokens_per_minute=10 ** 9, **kwargs)
+
+def held_texts(store):
+    return sorted(d.page_content for d in store.docstore._dict.values())
+
+def test_unchanged_docs_embed_nothing(tmp_path):
+    embedding = CountingEmbeddings()
+    added, removed, _ = build(tmp_path, docs(20), embedding)
+    assert (added, removed, embedding.embedded) == (20, 0, 20)
+    added, removed, store = build(tmp_path, docs(20), embedding)
+    assert (added, removed, embedding.embedded) == (0, 0, 20)
+    assert held_texts(store) == sorted(d.page_content for d in docs(20))
+
+def test_changed_and_removed_chunks(tmp_path):
+    embedding = CountingEmbeddings()
+    build(tmp_path, docs(20), embedding)
+    current = docs(18, changed={3})
+    added, removed, store = build(tmp_path, current, embedding)
+    assert (added, removed) == (1, 3)
+    assert embedding.embedded == 21
+    assert held_texts(store) == sorted(d.page_content for d in current)
+    assert set(load_manifest(str(tmp_path))["chunks"]) == {doc_id(d) for d in current}
+
+def test_empty_corpus_indexes_nothing(tmp_path):
+    embedding = CountingEmbeddings()
+    assert build(tmp_path, [], embedding) == (0, 0, None)
+    assert load_manifest(str(tmp_path)) is None
+    # Removing every chunk leaves an empty index, not a missing one
+    build(tmp_path, docs(5), embedding)
+    added, removed, store = build(tmp_path, [], embedding)
+    assert (added, removed, store.index.ntotal) == (0, 5, 0)
+    assert load_manifest(str(tmp_path))["chunks"] == {}
+
+def test_model_change_rebuilds(tmp_path):
+    embedding = CountingEmbeddings()
+    build(tmp_path, docs(10), embedding)
+    added, removed, _ = build(tmp_path, docs(10), embedding, model="other")
+    assert (added, removed, embedding.embedded) == (10, 0, 20)
+
+def test_interrupted_build_resumes(tmp_path):
+    failing = CountingEmbeddings(ok_batches=2)
+    with pytest.raises(RateLimited):
+        build(tmp_path, docs(40), failing)
+    saved = len(load_manifest(str(tmp_path))["chunks"])
+    assert saved == failing.embedded == 8
+
+    embedding = CountingEmbeddings()
+    added, _, store = build(tmp_path, docs(40), embedding)
+    assert added == embedding.embedded == 40 - saved
+    assert held_texts(store) == sorted(d.page_content for d in docs(40))
+
+def test_data_files_index_and_reuse_cached_vectors(tmp_path):
+    backend = CountingEmbeddings()
+    embedding = CachedEmbeddings(backend, model="hash", path=str(tmp_path / "embeddings.sqlite"))
+    source = DocumentSource(FILES, funds=set(FundUniverse.load().tickers()))
+    added, _, _ = build(tmp_path / "a", source, embedding)
+    assert added == backend.embedded > 0
+    assert source.stats["skipped"] == 0
+
+    # A fresh index over the same files is served from the embedding cache
+    added_again, _, _ = build(tmp_path / "b", source, embedding)
+    assert added_again == added
+    assert backend.embedded == added
+    assert embedding.stats()["hits"] == added
+
+def test_universe_limits_fund_files_only(tmp_path):
+    metadata = tmp_path / "fund_metadata.json"
+    metadata.write_text('{"VWELX": {"name": "Vanguard Wellington"}, "ZZZZX": {"name": "Not in the universe"}}')
+    definitions = tmp_path / "Definitions.json"
+    definitions.write_text('{"ZZZZX": "A term that happens to look like a ticker"}')
+    source = DocumentSource([str(metadata), str(definitions)], funds={"VWELX"})
+    keys = [(d.metadata["source"], d.metadata["key"]) for d in source]
+    assert keys == [("fund_metadata.json", "VWELX"), ("Definitions.json", "ZZZZX")]
@@ -0,0 +1,58 @@
+import json
+import pytest
+
+from JsonStream import iter_json_items
+
+# Values chosen to straddle small chunk edges: numbers that look whole when cut
+# ("12" of "12.5e3"), escapes, non-ASCII text, literals and nesting
+OBJECT = {
+    "VWELX": {"Sharpe Ratio": {"3y": 0.31, "5y": -12.5e3}, "name": "Vanguard \"Wellington\"\n", "open": True},
+    "BRK.B": [1, 22, 333, -4444, 1e-7, None, False],
+    "Ünïcode ✓": "café \\ ☃",
+    "empty": {},
+    "nested": [[[], {}], [{"a": [1, {"b": "]}"}]}]],
+    "last": 1234567890,
+}
+CHUNK_SIZES = [1, 2, 3, 5, 8, 13, 64, 1 << 16]
+
+def write(tmp_path, name, text):
+    path = tmp_path / name
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+def expected(path):
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        return list(data.items())
+    if isinstance(data, list):
+        return [(None, item) for item in data]
+    return [(None, data)]
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+@pytest.mark.parametrize("indent", [None, 2])
+def test_object_matches_json_load(tmp_path, chunk_size, indent):
+    path = write(tmp_path, "data.json", json.dumps(OBJECT, indent=indent, ensure_ascii=False))
+    assert list(iter_json_items(path, chunk_size=chunk_size)) == expected(path)
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_array_matches_json_load(tmp_path, chunk_size):
+    path = write(tmp_path, "data.json", json.dumps(list(OBJECT.values()) + [0, 7, 12.5, "x"]))
+    assert list(iter_json_items(path, chunk_size=chunk_size)) == expected(path)
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 1 << 16])
+@pytest.mark.parametrize("text", ["{}", " [ ] ", "12.5e3", "-7", '"text"', "null", "true\n"])
+def test_edge_documents_match_json_load(tmp_path, chunk_size, text):
+    path = write(tmp_path, "data.json", text)
+    assert list(iter_json_items(path, chunk_size=chunk_size)) == expected(path)
+
+def test_jsonl_yields_each_line(tmp_path):
+    path = write(tmp_path, "data.jsonl", '{"a": 1}\n\n[2, 3]\n"four"\n')
+    assert list(iter_json_items(path)) == [(None, {"a": 1}), (None, [2, 3]), (None, "four")]
+
+@pytest.mark.parametrize("chunk_size", [1, 1 << 16])
+@pytest.mark.parametrize("text", ['{"a": 1 "b": 2}', '{"a": 1,', "[1, 2", '{"a": tru}'])
+def test_malformed_documents_raise(tmp_path, chunk_size, text):
+    path = write(tmp_path, "data.json", text)
+    with pytest.raises(ValueError):
+        list(iter_json_items(path, chunk_size=chunk_size))
@@ -0,0 +1,76 @@
+import os
+import json
+import numpy as np
+import pytest
+
+from MetricStore import MetricStore, parse_value, format_value, METRICS_JSON
+
+DATA = {
+    "VWELX": {"Alpha": {"3y": "1.99", "5y": "2.27", "10y": "1.97"}, "Sortino Ratio": {"3y": "0.9206", "5y": "N/A", "10y": "Inf"}},
+    "AGG": {"Alpha": {"3y": "-0.42", "5y": "1,234.5", "10y": "12%"}, "Beta": {"3y": "1"}},
+}
+
+@pytest.mark.parametrize("text, value", [
+    ("1.99", np.float32(1.99)), ("1,234.5", 1234.5), ("12%", 12.0), (0.5, 0.5), ("Inf", np.inf), ("-inf", -np.inf),
+])
+def test_parse_value(text, value):
+    assert np.float32(parse_value(text)) == np.float32(value)
+
+@pytest.mark.parametrize("text", [None, "", "N/A", "--", "None", "n/a?"])
+def test_parse_value_missing(text):
+    assert np.isnan(parse_value(text))
+
+@pytest.mark.parametrize("value, text", [(np.float32(0.9206), "0.9206"), (np.float32(1.0), "1"), (np.nan, "N/A"), (np.inf, "Inf"), (-np.inf, "-Inf")])
+def test_format_value(value, text):
+    assert format_value(value) == text
+
+def test_from_dict_codes_every_metric_and_horizon():
+    store = MetricStore.from_dict(DATA)
+    assert store.values.shape == (2, 3, 3) and store.values.dtype == np.float32
+    assert store.metrics == ["Alpha", "Sortino Ratio", "Beta"]
+    assert store.column("Alpha", "5y").tolist() == [np.float32(2.27), 1234.5]
+    # AGG has no Sortino Ratio and only a 3y Beta; VWELX has no Beta
+    assert np.isnan(store.fund("AGG")[1]).all()
+    assert np.isnan(store.metric("Beta")[:, 1:]).all() and np.isnan(store.metric("Beta")[0]).all()
+    assert store.codes(["AGG", "ZZZZ", "VWELX"]).tolist() == [1, 0]
+
+def test_from_dict_reads_the_categorised_shape():
+    store = MetricStore.from_dict({"VWELX": {"Category": "Allocation", "Metrics": DATA["VWELX"]}})
+    assert store.categories == {"VWELX": "Allocation"}
+    assert store.to_dict() == MetricStore.from_dict({"VWELX": DATA["VWELX"]}).to_dict()
+
+def test_build_and_export_round_trip(tmp_path):
+    with open(METRICS_JSON, encoding="utf-8") as f:
+        original = json.load(f)
+    MetricStore.from_json(METRICS_JSON).save(str(tmp_path / "store"))
+    exported = tmp_path / "fund_risk_metrics.json"
+    MetricStore.load(str(tmp_path / "store")).export_json(str(exported))
+    with open(exported, encoding="utf-8") as f:
+        assert json.load(f) == original
+
+def test_load_memory_maps_and_slices_without_copying(tmp_path):
+    root = str(tmp_path / "store")
+    built = MetricStore.from_dict(DATA)
+    built.save(root)
+    store = MetricStore.load(root)
+    assert isinstance(store.values, np.memmap) and not store.values.flags.writeable
+    for view in (store.metric("Alpha"), store.horizon("3y"), store.column("Alpha", "3y"), store.fund("AGG")):
+        assert np.shares_memory(view, store.values)
+    np.testing.assert_array_equal(store.values, built.values)
+    assert (store.tickers, store.metrics, store.horizons) == (built.tickers, built.metrics, built.horizons)
+    loaded = MetricStore.load(root, mmap=False)
+    assert not isinstance(loaded.values, np.memmap)
+    np.testing.assert_array_equal(loaded.values, built.values)
+
+def test_load_or_build_rebuilds_when_the_json_is_newer(tmp_path):
+    json_path, root = str(tmp_path / "metrics.json"), str(tmp_path / "store")
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(DATA, f)
+    assert MetricStore.load_or_build(json_path, root).tickers == ["VWELX", "AGG"]
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump({"VFIAX": DATA["AGG"]}, f)
+    stamp = os.path.getmtime(os.path.join(root, "values.npy"))
+    os.utime(json_path, (stamp - 10, stamp - 10))
+    assert MetricStore.load_or_build(json_path, root).tickers == ["VWELX", "AGG"]
+    os.utime(json_path, (stamp + 10, stamp + 10))
+    assert MetricStore.load_or_build(json_path, root).tickers == ["VFIAX"]
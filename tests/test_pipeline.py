@@ -0,0 +1,121 @@
+import sys
+import pytest
+
+from Pipeline import Pipeline, Stage
+
+def py(code):
+    return [sys.executable, "-c", code]
+
+def write(path, text):
+    return py(f"open({str(path)!r}, 'w').write({text!r})")
+
+def copy(src, dst, sleep=0.0):
+    return py(f"import time; time.sleep({sleep}); open({str(dst)!r}, 'w').write(open({str(src)!r}).read())")
+
+def pipeline(tmp_path, stages, jobs=4):
+    return Pipeline(stages, jobs=jobs, state_file=str(tmp_path / "state.json"), log_dir=str(tmp_path / "logs"))
+
+def run(tmp_path, stages, **kwargs):
+    rows, wall = pipeline(tmp_path, stages).run(**kwargs)
+    return {row["stage"]: row for row in rows}, wall
+
+def statuses(rows):
+    return {name: row["status"] for name, row in rows.items()}
+
+def chain(tmp_path):
+    """source.txt -> a.txt -> b.txt, with `a` listed last so order comes from the dependencies."""
+    source, a, b = (str(tmp_path / name) for name in ("source.txt", "a.txt", "b.txt"))
+    with open(source, "w") as f:
+        f.write("v1")
+    return [
+        Stage("b", copy(a, b), inputs=[a], outputs=[b]),
+        Stage("a", copy(source, a, sleep=0.2), inputs=[source], outputs=[a]),
+    ]
+
+def test_stages_run_after_the_stages_writing_their_inputs(tmp_path):
+    rows, _ = run(tmp_path, chain(tmp_path))
+    assert statuses(rows) == {"b": "ran", "a": "ran"}
+    assert (tmp_path / "b.txt").read_text() == "v1"
+    assert rows["b"]["started"] >= rows["a"]["started"] + rows["a"]["seconds"]
+
+def test_independent_stages_start_together(tmp_path):
+    stages = [Stage(name, copy(__file__, tmp_path / f"{name}.txt", sleep=0.5), outputs=[str(tmp_path / f"{name}.txt")])
+              for name in ("x", "y", "z")]
+    rows, wall = run(tmp_path, stages)
+    assert all(row["status"] == "ran" and row["started"] < 0.3 for row in rows.values())
+    assert wall < sum(row["seconds"] for row in rows.values()) - 0.5
+
+def test_unchanged_inputs_skip_and_edited_inputs_rerun(tmp_path):
+    stages = chain(tmp_path)
+    run(tmp_path, stages)
+    rows, _ = run(tmp_path, stages)
+    assert statuses(rows) == {"b": "skipped", "a": "skipped"}
+    (tmp_path / "source.txt").write_text("v2")
+    rows, _ = run(tmp_path, stages)
+    assert statuses(rows) == {"b": "ran", "a": "ran"}
+    assert (tmp_path / "b.txt").read_text() == "v2"
+
+def test_deleted_output_reruns(tmp_path):
+    stages = chain(tmp_path)
+    run(tmp_path, stages)
+    (tmp_path / "b.txt").unlink()
+    rows, _ = run(tmp_path, stages)
+    assert statuses(rows) == {"b": "ran, unchanged", "a": "skipped"}
+    assert (tmp_path / "b.txt").read_text() == "v1"
+
+def test_editing_an_imported_local_module_reruns(tmp_path):
+    out = tmp_path / "out.txt"
+    (tmp_path / "helper.py").write_text(f"def run():\n    open({str(out)!r}, 'w').write('done')\n")
+    (tmp_path / "step.py").write_text("import helper\nhelper.run()\n")
+    stages = [Stage("step", [sys.executable, str(tmp_path / "step.py")], outputs=[str(out)])]
+    assert statuses(run(tmp_path, stages)[0]) == {"step": "ran"}
+    assert statuses(run(tmp_path, stages)[0]) == {"step": "skipped"}
+    with open(tmp_path / "helper.py", "a") as f:
+        f.write("# tweaked\n")
+    assert statuses(run(tmp_path, stages)[0]) == {"step": "ran, unchanged"}
+
+def test_failed_stage_blocks_its_dependents(tmp_path):
+    a, b, c = (str(tmp_path / name) for name in ("a.txt", "b.txt", "c.txt"))
+    stages = [
+        Stage("a", py("import sys; sys.exit(1)"), outputs=[a]),
+        Stage("b", copy(a, b), inputs=[a], outputs=[b]),
+        Stage("c", copy(b, c), inputs=[b], outputs=[c]),
+        Stage("other", write(tmp_path / "other.txt", "ok"), outputs=[str(tmp_path / "other.txt")]),
+    ]
+    rows, _ = run(tmp_path, stages)
+    assert statuses(rows) == {"a": "failed", "b": "blocked", "c": "blocked", "other": "ran"}
+    assert not (tmp_path / "b.txt").exists()
+    # A failed run leaves no state behind, so the stage is retried
+    assert statuses(run(tmp_path, stages)[0])["a"] == "failed"
+
+def test_volatile_stage_with_unchanged_output_lets_dependents_skip(tmp_path):
+    feed, table = str(tmp_path / "feed.txt"), str(tmp_path / "table.txt")
+    stages = [
+        Stage("fetch", write(feed, "same"), outputs=[feed], volatile=True),
+        Stage("build", copy(feed, table), inputs=[feed], outputs=[table]),
+    ]
+    assert statuses(run(tmp_path, stages)[0]) == {"fetch": "ran", "build": "ran"}
+    assert statuses(run(tmp_path, stages)[0]) == {"fetch": "ran, unchanged", "build": "skipped"}
+    assert statuses(run(tmp_path, stages, offline=True)[0]) == {"fetch": "offline", "build": "skipped"}
+
+def test_cycles_are_rejected(tmp_path):
+    x, y = str(tmp_path / "x"), str(tmp_path / "y")
+    stages = [
+        Stage("a", write(x, ""), inputs=[y], outputs=[x]),
+        Stage("b", write(y, ""), inputs=[x], outputs=[y]),
+    ]
+    with pytest.raises(ValueError, match="cycle"):
+        pipeline(tmp_path, stages)
+
+def test_dry_run_reports_without_running(tmp_path):
+    stages = chain(tmp_path)
+    rows, _ = run(tmp_path, stages, dry_run=True)
+    assert statuses(rows) == {"b": "would run", "a": "would run"}
+    assert not (tmp_path / "a.txt").exists()
+    assert not (tmp_path / "state.json").exists()
+    run(tmp_path, stages)
+    assert statuses(run(tmp_path, stages, dry_run=True)[0]) == {"b": "skipped", "a": "skipped"}
+    # An upstream stage that would run takes its dependents with it
+    (tmp_path / "source.txt").write_text("v2")
+    assert statuses(run(tmp_path, stages, dry_run=True)[0]) == {"b": "would run", "a": "would run"}
+    assert (tmp_path / "b.txt").read_text() == "v1"
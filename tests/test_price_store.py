@@ -0,0 +1,73 @@
+from datetime import datetime
+import pandas as pd
+import pytest
+
+import PriceStore as price_store
+from PriceStore import PriceStore, OVERLAP_DAYS
+
+START = datetime(2015, 1, 1)
+DAYS = pd.bdate_range("2015-01-01", "2025-06-30")
+CLOSES = pd.Series(range(1, len(DAYS) + 1), index=DAYS, dtype=float)
+
+class Feed:
+    """download_closes stand-in serving CLOSES; `fail` makes the next calls come back empty."""
+
+    def __init__(self):
+        self.fail = False
+        self.calls = []
+
+    def __call__(self, symbols, start_date, end_date):
+        self.calls.append((start_date, end_date))
+        if self.fail:
+            return pd.DataFrame(columns=symbols, dtype=float)
+        held = CLOSES[(CLOSES.index >= pd.Timestamp(start_date.date())) & (CLOSES.index < pd.Timestamp(end_date.date()))]
+        return pd.DataFrame({s: held for s in symbols})
+
+@pytest.fixture
+def feed(monkeypatch):
+    feed = Feed()
+    monkeypatch.setattr(price_store, "download_closes", feed)
+    return feed
+
+def expected(end_date):
+    return CLOSES[CLOSES.index < pd.Timestamp(end_date.date())]
+
+def test_failed_first_fetch_keeps_nothing(tmp_path, feed):
+    store = PriceStore(root=str(tmp_path))
+    feed.fail = True
+    assert store.update(["VWELX"], START, datetime(2025, 1, 10)) == []
+    assert store.held("VWELX") is None
+
+    feed.fail = False
+    store.update(["VWELX"], START, datetime(2025, 1, 17))
+    assert feed.calls[-1][0] == START
+    pd.testing.assert_series_equal(store.series("VWELX"), expected(datetime(2025, 1, 17)), check_names=False, check_freq=False)
+
+def test_failed_tail_refresh_leaves_no_gap(tmp_path, feed):
+    store = PriceStore(root=str(tmp_path))
+    store.update(["VWELX"], START, datetime(2025, 1, 3))
+    entry = dict(store.held("VWELX"))
+
+    feed.fail = True
+    store.update(["VWELX"], START, datetime(2025, 1, 17))
+    assert store.held("VWELX") == entry
+
+    feed.fail = False
+    store.update(["VWELX"], START, datetime(2025, 1, 31))
+    pd.testing.assert_series_equal(store.series("VWELX"), expected(datetime(2025, 1, 31)), check_names=False, check_freq=False)
+    assert store.held("VWELX")["fetched_until"] == "2025-01-31"
+
+def test_tail_planned_from_last_held_row(tmp_path, feed):
+    store = PriceStore(root=str(tmp_path))
+    store.update(["VWELX"], START, datetime(2025, 1, 3))
+    store.manifest["VWELX"]["fetched_until"] = "2025-01-20"
+    fetch_start, full = store._plan("VWELX", START, datetime(2025, 1, 31))
+    assert not full
+    assert fetch_start == datetime.strptime(store.held("VWELX")["last"], "%Y-%m-%d") - pd.Timedelta(days=OVERLAP_DAYS)
+
+def test_up_to_date_ticker_is_not_fetched(tmp_path, feed):
+    store = PriceStore(root=str(tmp_path))
+    store.update(["VWELX"], START, datetime(2025, 1, 3))
+    calls = len(feed.calls)
+    assert store.update(["VWELX"], START, datetime(2025, 1, 3)) == []
+    assert len(feed.calls) == calls
@@ -0,0 +1,35 @@
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import pytest
+
+from RiskMetrics import risk_metrics
+from SortinoEngine import window_starts, window_bounds, daily_returns, periods
+
+def synthetic(tickers=6, rows=252 * 6, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range(end="2025-06-30", periods=rows)
+    bench = pd.Series(100 * np.exp(np.cumsum(rng.normal(0.0003, 0.01, rows))), index=index)
+    returns = 0.8 * np.log(bench).diff().fillna(0).to_numpy()[:, None] + rng.normal(0, 0.005, (rows, tickers))
+    prices = pd.DataFrame(100 * np.exp(np.cumsum(returns, axis=0)), index=index, columns=[f"T{i}" for i in range(tickers)])
+    prices[rng.random(prices.shape) < 0.01] = np.nan
+    bench[rng.random(rows) < 0.01] = np.nan
+    return prices, bench
+
+def test_benchmark_statistics_use_only_consecutive_joint_closes():
+    prices, bench = synthetic()
+    end = datetime(2025, 7, 1)
+    metrics = risk_metrics(prices, bench, end_date=end)
+    _, valid, _ = daily_returns(prices)
+    bounds = window_bounds(valid, window_starts(prices.index, periods, end))
+    for j, ticker in enumerate(prices.columns):
+        for yrs in periods:
+            first = bounds[yrs][0][j]
+            both = pd.concat([prices[ticker], bench.reindex(prices.index)], axis=1)
+            r = both.pct_change(fill_method=None).iloc[first:].dropna()
+            fund, market = r.iloc[:, 0], r.iloc[:, 1]
+            up = market > 0
+            assert metrics["Beta"].loc[ticker, yrs] == pytest.approx(fund.cov(market) / market.var(), rel=1e-9)
+            assert metrics["R-Squared"].loc[ticker, yrs] == pytest.approx(fund.corr(market) ** 2 * 100, rel=1e-9)
+            assert metrics["Upside Capture"].loc[ticker, yrs] == pytest.approx(
+                fund[up].mean() / market[up].mean() * 100, rel=1e-9)
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+from RollingMetrics import RollingStore, rolling_metrics, ROLLING_METRICS
+
+WINDOW = 63
+
+def synthetic(tickers=5, rows=400, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range(end="2025-06-30", periods=rows)
+    returns = rng.normal(0.0003, 0.01, (rows, tickers))
+    prices = pd.DataFrame(100 * np.exp(np.cumsum(returns, axis=0)), index=index, columns=[f"T{i}" for i in range(tickers)])
+    prices[rng.random(prices.shape) < 0.03] = np.nan
+    prices.iloc[:80, 0] = np.nan  # a fund that lists late
+    prices.iloc[235:250, 1] = np.nan  # a gap across the first row the appended windows reach back to
+    return prices
+
+def assert_matches_full(store, prices):
+    full = rolling_metrics(prices, WINDOW)
+    for metric in ROLLING_METRICS:
+        pd.testing.assert_frame_equal(store.series(metric), full[metric], check_freq=False, rtol=1e-9, atol=1e-10)
+
+def test_appends_match_a_full_recompute(tmp_path):
+    prices = synthetic()
+    store = RollingStore(root=tmp_path, window=WINDOW)
+    assert store.update(prices.iloc[:305]) == 305
+    assert store.update(prices.iloc[:305]) == 0
+    assert store.update(prices.iloc[:306]) == 1
+    assert store.update(prices) == len(prices) - 306
+    assert_matches_full(store, prices)
+
+def test_appends_survive_reopening(tmp_path):
+    prices = synthetic(seed=1)
+    RollingStore(root=tmp_path, window=WINDOW).update(prices.iloc[:200])
+    store = RollingStore(root=tmp_path, window=WINDOW)
+    assert store.update(prices) == len(prices) - 200
+    assert_matches_full(store, prices)
+
+def test_adjusted_history_rebuilds(tmp_path):
+    prices = synthetic(seed=2)
+    store = RollingStore(root=tmp_path, window=WINDOW)
+    store.update(prices.iloc[:300])
+    adjusted = prices.copy()
+    adjusted.iloc[:, 2] *= 0.98  # a dividend rewrote this fund's adjusted closes
+    assert store.update(adjusted) == len(prices)
+    assert_matches_full(store, adjusted)
+
+def test_new_ticker_rebuilds(tmp_path):
+    prices = synthetic(seed=3)
+    store = RollingStore(root=tmp_path, window=WINDOW)
+    store.update(prices.iloc[:300, :4])
+    assert store.update(prices) == len(prices)
+    assert_matches_full(store, prices)
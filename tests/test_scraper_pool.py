@@ -0,0 +1,129 @@
+import pytest
+
+import ScraperPool
+from ScraperPool import TokenBucket, HostRateLimiter, DriverPool, driver_is_broken, run_pooled
+
+class FakeClock:
+    """Stands in for the `time` module: sleeping just moves the clock forward."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(ScraperPool, "time", clock)
+    return clock
+
+# Named like selenium's, which is not needed to run these tests
+class WebDriverException(Exception):
+    pass
+
+class TimeoutException(WebDriverException):
+    pass
+
+class InvalidSessionIdException(WebDriverException):
+    pass
+
+class MaxRetryError(Exception):
+    pass
+
+class FakeDriver:
+    def __init__(self, number):
+        self.number = number
+        self.quit_calls = 0
+
+    def quit(self):
+        self.quit_calls += 1
+
+def driver_pool(size=1):
+    made = []
+    def factory():
+        made.append(FakeDriver(len(made)))
+        return made[-1]
+    return DriverPool(factory, size), made
+
+# --- Rate limiting ---
+def test_token_bucket_spaces_calls_at_the_rate(clock):
+    bucket = TokenBucket(rate=2)
+    for _ in range(3):
+        bucket.acquire()
+    assert clock.sleeps == [pytest.approx(0.5)] * 2
+    assert clock.now == pytest.approx(1.0)
+
+def test_token_bucket_bursts_up_to_capacity_after_idling(clock):
+    bucket = TokenBucket(rate=1, capacity=3)
+    clock.now += 60  # idle far longer than it takes to refill
+    for _ in range(3):
+        bucket.acquire()
+    assert clock.sleeps == []
+    bucket.acquire()
+    assert clock.sleeps == [pytest.approx(1.0)]
+
+def test_token_bucket_waits_only_for_the_missing_fraction(clock):
+    bucket = TokenBucket(rate=1)
+    bucket.acquire()
+    clock.now += 0.75
+    bucket.acquire()
+    assert clock.sleeps == [pytest.approx(0.25)]
+
+def test_host_rate_limiter_keeps_one_bucket_per_host(clock):
+    limiter = HostRateLimiter(rate=1)
+    limiter.acquire("https://finance.yahoo.com/quote/VWELX/risk")
+    limiter.acquire("https://www.morningstar.com/funds/xnas/vwelx/risk")
+    assert clock.sleeps == []
+    limiter.acquire("https://finance.yahoo.com/quote/AGG/risk")
+    assert clock.sleeps == [pytest.approx(1.0)]
+    assert sorted(limiter.buckets) == ["finance.yahoo.com", "www.morningstar.com"]
+
+# --- Driver reuse ---
+@pytest.mark.parametrize("error, broken", [
+    (ValueError("could not parse the risk table"), False),
+    (TimeoutException("page did not load"), False),
+    (WebDriverException("chrome not reachable"), True),
+    (InvalidSessionIdException("invalid session id"), True),
+    (MaxRetryError("connection refused"), True),
+    (ConnectionRefusedError(), True),
+])
+def test_driver_is_broken(error, broken):
+    assert driver_is_broken(error) is broken
+
+@pytest.mark.parametrize("error", [ValueError("bad table"), TimeoutException("slow page")])
+def test_page_failures_keep_the_driver(error):
+    pool, made = driver_pool()
+    with pytest.raises(type(error)):
+        with pool.driver():
+            raise error
+    with pool.driver() as driver:
+        assert driver is made[0]
+    assert len(made) == 1 and made[0].quit_calls == 0
+
+def test_browser_failures_replace_the_driver():
+    pool, made = driver_pool()
+    with pytest.raises(InvalidSessionIdException):
+        with pool.driver():
+            raise InvalidSessionIdException("invalid session id")
+    assert made[0].quit_calls == 1
+    with pool.driver() as driver:
+        assert driver is made[1]
+    assert pool.all == [made[1]] and pool.created == 1
+
+def test_run_pooled_retries_a_slow_page_on_the_same_browser(clock):
+    pool, made = driver_pool(size=1)
+    seen = []
+    def task(driver, item):
+        seen.append(driver.number)
+        if len(seen) == 1:
+            raise TimeoutException("slow page")
+        return item.lower()
+    results = run_pooled(["VWELX"], task, pool, HostRateLimiter(rate=1), lambda t: f"https://finance.yahoo.com/quote/{t}")
+    assert results == {"VWELX": "vwelx"}
+    assert seen == [0, 0] and len(made) == 1
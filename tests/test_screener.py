@@ -0,0 +1,53 @@
+import json
+import pytest
+
+from MetricStore import MetricStore
+from FundUniverse import FundUniverse
+from Screener import Screener, METADATA_JSON
+
+@pytest.fixture(scope="module")
+def screener():
+    with open(METADATA_JSON, "r", encoding="utf-8") as f:
+        metadata = json.load(f)
+    return Screener(MetricStore.from_json(), metadata, FundUniverse.load().risk_profiles())
+
+@pytest.mark.parametrize("question", [
+    "What is the best way to reduce risk in my portfolio?",
+    "Which metric is most important for retirees?",
+    "What are the top reasons to hold bonds?",
+    "What is the biggest mistake new investors make?",
+    "Explain the Sortino ratio of VWELX.",
+    "Which funds have the lowest expense ratio?",
+])
+def test_not_a_ranking(screener, question):
+    assert screener.parse_intent(question) is None
+
+@pytest.mark.parametrize("question, sort_by, descending", [
+    ("Which funds have the highest returns?", "Mean Annual Return", True),
+    ("Top 3 conservative funds by Sharpe ratio", "Sharpe Ratio", None),
+    ("Which aggressive funds are the least volatile?", "Standard Deviation", False),
+    ("What are the best funds for retirement?", "Sortino Ratio", None),
+    ("Which are the biggest funds?", "AUM", None),
+    ("Which has the highest alphas over 5 years?", "Alpha", True),
+])
+def test_ranking(screener, question, sort_by, descending):
+    intent = screener.parse_intent(question)
+    assert intent["type"] == "rank"
+    assert intent["sort_by"] == sort_by
+    assert intent["descending"] == descending
+
+def test_ranking_details(screener):
+    intent = screener.parse_intent("Top 3 conservative funds by Sharpe ratio over 5 years")
+    assert intent["top_k"] == 3
+    assert intent["horizon"] == "5y"
+    assert intent["risk_profiles"] == ["Conservative"]
+    title, table = screener.answer(intent)
+    assert len(table) == 3
+    assert set(table["Risk Profile"]) == {"Conservative"}
+    assert list(table["Sharpe Ratio"]) == sorted(table["Sharpe Ratio"], reverse=True)
+
+def test_compare(screener):
+    intent = screener.parse_intent("Compare VFIAX and PRBLX on 3 year risk")
+    assert intent == {"type": "compare", "tickers": ["VFIAX", "PRBLX"], "horizon": "3y"}
+    _, table = screener.answer(intent)
+    assert list(table["Ticker"]) == ["VFIAX", "PRBLX"]
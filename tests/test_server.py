@@ -0,0 +1,160 @@
+import json
+import time
+import asyncio
+import threading
+from collections import Counter
+from aiohttp.test_utils import TestClient, TestServer
+from langchain_core.documents import Document
+from langchain_community.vectorstores import FAISS
+
+from Fakes import HashEmbeddings, StubChatModel
+from MetricStore import MetricStore
+from FundUniverse import FundUniverse
+from Screener import Screener, METADATA_JSON
+from HybridRetriever import HybridRetriever
+from ContextPacker import PackedRetriever
+from AnswerCache import AnswerCache
+from Server import AdvisorService
+
+DOCS = [
+    Document(page_content="VWELX Sortino Ratio 10y: 0.91", metadata={"source": "Data/fund_risk_metrics.json"}),
+    Document(page_content="VFIAX tracks the S&P 500 index.", metadata={"source": "Data/fund_metadata.json"}),
+    Document(page_content="Sortino divides excess return by downside deviation.", metadata={"source": "Data/Definitions.json"}),
+]
+
+class RecordingService(AdvisorService):
+    """AdvisorService on offline fakes that records which questions ran and how many overlapped per session."""
+
+    def __init__(self, tmp_path, latency=0.3, **kwargs):
+        super().__init__(**kwargs)
+        self.embedding = HashEmbeddings()
+        self.retriever = PackedRetriever(base=HybridRetriever.from_vectorstore(FAISS.from_documents(DOCS, self.embedding), k=2))
+        self.llm = StubChatModel(latency=latency)
+        with open(METADATA_JSON, "r", encoding="utf-8") as f:
+            metadata = json.load(f)
+        self.screener = Screener(MetricStore.from_json(), metadata, FundUniverse.load().risk_profiles())
+        self.answer_cache = AnswerCache(self.embedding, path=str(tmp_path / "answers.sqlite"), watched=[])
+        self.answered = []
+        self.active = Counter()
+        self.max_active = 0
+        self.record_lock = threading.Lock()
+
+    def answer(self, session, question, prompt):
+        with self.record_lock:
+            self.answered.append(question)
+            self.active[id(session)] += 1
+            self.max_active = max(self.max_active, self.active[id(session)])
+        try:
+            return super().answer(session, question, prompt)
+        finally:
+            with self.record_lock:
+                self.active[id(session)] -= 1
+
+def serve(service, scenario):
+    """Run `scenario(client)` against the service's app on a test server."""
+    async def main():
+        async with TestClient(TestServer(service.app())) as client:
+            return await scenario(client)
+    return asyncio.run(main())
+
+async def ask(client, question, session_id="s1", prompt="app"):
+    response = await client.post("/ask", json={"question": question, "session_id": session_id, "prompt": prompt})
+    return response.status, await response.json(), response.headers
+
+def test_answers_and_routes_screener_questions(tmp_path):
+    service = RecordingService(tmp_path, latency=0.0)
+    async def scenario(client):
+        status, reply, _ = await ask(client, "What is the Sortino ratio of VWELX?")
+        assert status == 200 and reply["answer"] and not reply["cached"]
+        assert set(reply["sources"]) <= {doc.metadata["source"] for doc in DOCS}
+        status, reply, _ = await ask(client, "What is the Sortino ratio of VWELX?", session_id="s2")
+        assert status == 200 and reply["cached"]
+        status, reply, _ = await ask(client, "Top 3 funds by Sharpe ratio", session_id="s3")
+        assert status == 200 and reply["title"].startswith("Top 3")
+        assert len(reply["table"]["data"]) == 3
+    serve(service, scenario)
+
+def test_bad_requests_get_400(tmp_path):
+    service = RecordingService(tmp_path)
+    async def scenario(client):
+        status, reply, _ = await ask(client, "What is VWELX?", prompt="no-such-prompt")
+        assert status == 400 and "unknown prompt" in reply["error"]
+        response = await client.post("/ask", data="not json")
+        assert response.status == 400
+    serve(service, scenario)
+    assert service.answered == []
+
+def test_full_queue_refuses_with_503(tmp_path):
+    service = RecordingService(tmp_path, latency=0.3, workers=1, queue_size=1)
+    async def scenario(client):
+        running = asyncio.ensure_future(ask(client, "Question 0?", session_id="s0"))
+        await asyncio.sleep(0.1)  # the worker has taken it; one more fits in the queue
+        replies = await asyncio.gather(running, *[ask(client, f"Question {i}?", session_id=f"s{i}") for i in range(1, 4)])
+        health = await (await client.get("/health")).json()
+        return replies, health
+    replies, health = serve(service, scenario)
+    statuses = sorted(status for status, _, _ in replies)
+    assert statuses == [200, 200, 503, 503]
+    assert all(headers["Retry-After"] == "2" for status, _, headers in replies if status == 503)
+    assert health["served"] == 2 and health["rejected"] == 2
+
+def test_one_question_at_a_time_per_session(tmp_path):
+    service = RecordingService(tmp_path, latency=0.2, workers=4)
+    async def scenario(client):
+        return await asyncio.gather(*[ask(client, f"Question {i}?") for i in range(3)])
+    replies = serve(service, scenario)
+    assert [status for status, _, _ in replies] == [200, 200, 200]
+    assert service.max_active == 1
+    assert len(service.sessions["s1"].memory.chat_memory.messages) == 6
+
+def test_identical_opening_questions_share_one_answer(tmp_path):
+    service = RecordingService(tmp_path, latency=0.3)
+    async def scenario(client):
+        return await asyncio.gather(*[ask(client, "What is the Sortino ratio?", session_id=f"s{i}") for i in range(3)])
+    replies = serve(service, scenario)
+    assert len({reply["answer"] for _, reply, _ in replies}) == 1
+    assert sum(bool(reply.get("coalesced")) for _, reply, _ in replies) == 2
+    assert service.answered == ["What is the Sortino ratio?"]
+    assert service.llm.calls == 1
+    # Every session still records the exchange
+    assert all(len(service.sessions[f"s{i}"].memory.chat_memory.messages) == 2 for i in range(3))
+
+def test_timed_out_job_keeps_its_session_busy(tmp_path):
+    service = RecordingService(tmp_path, latency=0.5, timeout=0.2)
+    async def scenario(client):
+        status, reply, _ = await ask(client, "First question?")
+        assert status == 504
+        assert service.sessions["s1"].lock.locked()
+        # The retry waits for the first job instead of running alongside it
+        start = time.perf_counter()
+        retry = await service.ask("s1", "Second question?", "app")
+        assert retry["answer"] and time.perf_counter() - start > 0.5
+    serve(service, scenario)
+    assert service.answered == ["First question?", "Second question?"]
+    assert service.max_active == 1
+
+def test_queued_job_is_skipped_after_its_caller_times_out(tmp_path):
+    service = RecordingService(tmp_path, latency=0.5, workers=1, timeout=0.2)
+    async def scenario(client):
+        running = asyncio.ensure_future(ask(client, "Running?", session_id="a"))
+        await asyncio.sleep(0.05)
+        replies = await asyncio.gather(running, ask(client, "Queued?", session_id="b"))
+        await asyncio.sleep(0.6)  # the worker is free again
+        return replies
+    replies = serve(service, scenario)
+    assert [status for status, _, _ in replies] == [504, 504]
+    assert service.answered == ["Running?"]
+    assert not service.sessions["b"].lock.locked()
+
+def test_reset_is_refused_while_a_job_runs(tmp_path):
+    service = RecordingService(tmp_path, latency=0.4, timeout=0.1)
+    async def scenario(client):
+        status, _, _ = await ask(client, "First question?")
+        assert status == 504
+        response = await client.post("/reset", json={"session_id": "s1"})
+        assert response.status == 409 and "s1" in service.sessions
+        while service.sessions["s1"].lock.locked():
+            await asyncio.sleep(0.05)
+        response = await client.post("/reset", json={"session_id": "s1"})
+        assert response.status == 200 and "s1" not in service.sessions
+    serve(service, scenario)
@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+import pytest
+
+from SortinoEngine import sortino_matrix, risk_free_rate, min_rows_per_year, periods
+
+END = datetime(2025, 7, 1, 9, 30)
+
+def calculate_sortino_annual(returns, daily_mar):
+    """The per-window formula Sortino.py used before sortino_matrix."""
+    daily_excess = returns - daily_mar
+    downside_returns = returns[returns < daily_mar]
+    if len(downside_returns) == 0:
+        return np.inf
+    daily_downside_dev = np.sqrt(np.mean((downside_returns - daily_mar) ** 2))
+    daily_excess_mean = np.mean(daily_excess)
+    annual_excess = daily_excess_mean * 252
+    annual_downside = daily_downside_dev * np.sqrt(252)
+    if annual_downside == 0:
+        return np.inf
+    return annual_excess / annual_downside
+
+def loop_sortino(closes, yrs, end_date=END):
+    """One ticker and horizon the old way: a fresh download of the window, then pct_change."""
+    start_date = end_date - timedelta(days=365 * yrs)
+    index = closes.index
+    data = closes[(index >= pd.Timestamp(start_date.strftime("%Y-%m-%d"))) &
+                  (index < pd.Timestamp(end_date.strftime("%Y-%m-%d")))].dropna()
+    if len(data) < min_rows_per_year[yrs]:
+        return np.nan
+    return calculate_sortino_annual(data.pct_change().dropna(), risk_free_rate / 252)
+
+def display(value):
+    """The value as written to sortino.json."""
+    if np.isnan(value):
+        return "N/A"
+    if np.isinf(value):
+        return "Inf"
+    return round(value, 4)
+
+def synthetic(seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range(end="2025-06-30", periods=252 * 11)
+    rows = len(index)
+    prices = pd.DataFrame(
+        100 * np.exp(np.cumsum(rng.normal(0.0003, 0.012, (rows, 6)), axis=0)),
+        index=index, columns=["VWELX", "AGG", "LATE", "YOUNG", "THIN", "UP"])
+    prices[rng.random(prices.shape) < 0.02] = np.nan
+    prices.iloc[:rows - 252 * 4, 2] = np.nan  # listed four years ago: 5y and 10y cover the same closes
+    prices.iloc[:rows - 100, 3] = np.nan  # 100 closes: enough for 3y only
+    prices.iloc[:, 4] = prices.iloc[:, 4].where(rng.random(rows) < 0.015)  # too few closes for any window
+    prices.iloc[:, 5] = np.linspace(50, 150, rows)  # never a downside day
+    prices.iloc[rows - 400:rows - 380, 1] = np.nan  # a long gap inside every window
+    return prices
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_matches_the_per_window_loop(seed):
+    prices = synthetic(seed)
+    matrix = sortino_matrix(prices, end_date=END)
+    for ticker in prices.columns:
+        for yrs in periods:
+            expected = loop_sortino(prices[ticker], yrs)
+            assert display(matrix.at[ticker, yrs]) == display(expected), (ticker, yrs)
+            if np.isfinite(expected):
+                assert matrix.at[ticker, yrs] == pytest.approx(expected, rel=1e-10)
+
+def test_window_coverage():
+    matrix = sortino_matrix(synthetic(), end_date=END)
+    assert matrix.at["LATE", 5] == matrix.at["LATE", 10] != matrix.at["LATE", 3]
+    assert np.isfinite(matrix.at["YOUNG", 3]) and np.isnan(matrix.loc["YOUNG", [5, 10]]).all()
+    assert np.isnan(matrix.loc["THIN"]).all()
+    assert np.isinf(matrix.loc["UP"]).all()
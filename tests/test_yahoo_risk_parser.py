@@ -0,0 +1,55 @@
+import os
+import gzip
+import pytest
+
+import YahooRiskParser as parser_module
+from YahooRiskParser import (
+    parse_risk_table, parse_snapshot_file, parse_snapshots, save_snapshot, load_snapshot, target_metrics,
+)
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "yahoo_risk_VWELX.html")
+EXPECTED = {
+    "Alpha": {"3y": "-0.42", "5y": "0.85", "10y": "1.12"},
+    "Mean Annual Return": {"3y": "0.61", "5y": "0.83", "10y": "0.72"},
+    "Standard Deviation": {"3y": "12.81", "5y": "11.94", "10y": "10.11"},
+    "Sharpe Ratio": {"3y": "0.31", "5y": "0.62", "10y": "0.71"},
+    "Treynor Ratio": {"3y": "4.88", "5y": "9.80", "10y": "10.44"},
+}
+
+@pytest.fixture(scope="module")
+def page():
+    with open(FIXTURE, "r", encoding="utf-8") as f:
+        return f.read()
+
+def test_parses_fund_columns_of_target_rows(page):
+    parsed = parse_risk_table(page)
+    assert parsed == EXPECTED
+    assert set(parsed) == target_metrics
+
+def test_bs4_fallback_matches_lxml(page, monkeypatch):
+    pytest.importorskip("bs4")
+    monkeypatch.setattr(parser_module, "lxml_html", None)
+    assert parse_risk_table(page) == EXPECTED
+
+def test_page_without_the_table_parses_empty():
+    assert parse_risk_table("<html><body><p>Symbols similar to VWELX</p></body></html>") == {}
+
+def test_snapshot_round_trip(page, tmp_path):
+    path = save_snapshot("VWELX", page, root=str(tmp_path), day="2025-06-30")
+    assert path == os.path.join(str(tmp_path), "2025-06-30", "VWELX.html.gz")
+    with gzip.open(path, "rb") as f:
+        assert f.read().decode("utf-8") == page
+    assert load_snapshot(path) == page
+    assert parse_snapshot_file(path) == ("VWELX", EXPECTED)
+
+def test_dotted_tickers_keep_their_name(page, tmp_path):
+    path = save_snapshot("BRK.B", page, root=str(tmp_path), day="2025-06-30")
+    assert parse_snapshot_file(path)[0] == "BRK.B"
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_parse_snapshot_folder(page, tmp_path, workers):
+    for ticker in ("VWELX", "BRK.B", "AGG"):
+        save_snapshot(ticker, page, root=str(tmp_path), day="2025-06-30")
+    parsed = parse_snapshots(os.path.join(str(tmp_path), "2025-06-30"), workers=workers)
+    assert parsed == {"AGG": EXPECTED, "BRK.B": EXPECTED, "VWELX": EXPECTED}
+    assert parse_snapshots(str(tmp_path / "missing")) == {}